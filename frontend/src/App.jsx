@@ -250,10 +250,15 @@ function App() {
       
       // Handle photos (upload new ones)
       if (updatedFeature.photos && updatedFeature.photos.length > 0) {
-        for (const photo of updatedFeature.photos) {
-          if (photo.file && !photo.id) {
-            // New photo
-            await photoAPI.upload(updatedFeature.id, photo.file, photo.caption);
+        const newPhotos = updatedFeature.photos.filter((photo) => photo.file && !photo.id);
+        if (newPhotos.length === 1) {
+          await photoAPI.uploadDirect(updatedFeature.id, newPhotos[0].file, newPhotos[0].caption);
+        } else if (newPhotos.length > 1) {
+          const results = await photoAPI.uploadBatch(updatedFeature.id, newPhotos);
+          const failed = results.filter((result) => !result.success);
+          if (failed.length > 0) {
+            console.error('Some photos failed to upload:', failed);
+            alert(`${failed.length} of ${newPhotos.length} photos failed to upload`);
           }
         }
       }
@@ -160,7 +160,7 @@ function FeatureEditor({ feature, onSave, onCancel, isOpen }) {
               <div className="photo-grid">
                 {photos.map((photo, index) => (
                   <div key={index} className="photo-item">
-                    <img src={photo.url || photo.image} alt={photo.caption || `Photo ${index + 1}`} />
+                    <img src={photo.renditions?.thumbnail || photo.url || photo.image} alt={photo.caption || `Photo ${index + 1}`} />
                     <input
                       type="text"
                       placeholder="Add caption..."
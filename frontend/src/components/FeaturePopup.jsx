@@ -37,7 +37,7 @@ function FeaturePopup({ feature, onEdit, onDelete }) {
             {photos.slice(0, 3).map((photo, idx) => (
               <img 
                 key={idx} 
-                src={photo.url || photo.image} 
+                src={photo.renditions?.thumbnail || photo.url || photo.image} 
                 alt={photo.caption || `Photo ${idx + 1}`}
                 className="popup-photo"
               />
@@ -1,9 +1,18 @@
 import { useState } from 'react';
+import { mapAPI } from '../services/api';
 import './ShareModal.css';
 
+// Export formats offered for download: [format, label]
+const EXPORT_FORMATS = [
+  ['geojson', 'GeoJSON'],
+  ['kml', 'KML'],
+  ['kmz', 'KMZ'],
+  ['csv', 'CSV'],
+];
+
 /**
  * ShareModal Component
- * Modal for sharing maps with visibility controls
+ * Modal for sharing maps with visibility controls and export downloads
  * 
  * @param {Object} props
  * @param {Object} props.map - Map to share
@@ -87,6 +96,19 @@ function ShareModal({ map, isOpen, onClose, onVisibilityChange }) {
             </div>
           )}
 
+          {map.is_public && (
+            <div className="download-section">
+              <h4>Download</h4>
+              <div className="download-links">
+                {EXPORT_FORMATS.map(([format, label]) => (
+                  <a key={format} className="download-link" href={mapAPI.getExportUrl(map.id, format)} download>
+                    {label}
+                  </a>
+                ))}
+              </div>
+            </div>
+          )}
+
           {!map.is_public && (
             <div className="private-notice">
               <p>💡 Make this map public to generate a shareable link</p>
@@ -61,6 +61,19 @@ describe('ShareModal Component', () => {
     expect(screen.getByText('Share Link')).toBeTruthy();
   });
 
+  it('links to exports of public maps without a trailing slash', () => {
+    render(
+      <ShareModal 
+        map={mockMap} 
+        isOpen={true} 
+        onClose={mockOnClose}
+        onVisibilityChange={mockOnVisibilityChange}
+      />
+    );
+    expect(screen.getByText('GeoJSON').getAttribute('href')).toMatch(/\/maps\/1\/export\.geojson$/);
+    expect(screen.getByText('KML').getAttribute('href')).toMatch(/\/maps\/1\/export\.kml$/);
+  });
+
   it('shows private notice for private maps', () => {
     const privateMap = { ...mockMap, is_public: false };
     render(
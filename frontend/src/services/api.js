@@ -132,6 +132,14 @@ export const mapAPI = {
   async getFeatures(mapId) {
     return request(`/maps/${mapId}/features/`);
   },
+
+  /**
+   * Get the download URL of a map export (e.g. format 'geojson')
+   */
+  getExportUrl(mapId, format, params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    return `${API_BASE_URL}/maps/${mapId}/export.${format}${queryString ? `?${queryString}` : ''}`;
+  },
 };
 
 // =============================================================================
@@ -148,10 +156,10 @@ export const featureAPI = {
   },
 
   /**
-   * Get a single feature by ID
+   * Get a single feature by ID, including its stories and photos
    */
   async getById(id) {
-    return request(`/features/${id}/`);
+    return request(`/features/${id}/?include=stories,photos`);
   },
 
   /**
@@ -245,6 +253,9 @@ export const storyAPI = {
 // PHOTO API
 // =============================================================================
 
+// Photos sent per batch upload request
+const BATCH_UPLOAD_SIZE = 20;
+
 export const photoAPI = {
   /**
    * Get all photos (with optional filters)
@@ -279,6 +290,69 @@ export const photoAPI = {
     });
   },
 
+  /**
+   * Upload several photos to a feature, sent in chunks of BATCH_UPLOAD_SIZE
+   * photos per request. photos is a list of { file, caption }.
+   * Returns the per-file results in the same order.
+   */
+  async uploadBatch(featureId, photos) {
+    const results = [];
+    for (let start = 0; start < photos.length; start += BATCH_UPLOAD_SIZE) {
+      const formData = new FormData();
+      formData.append('feature', featureId);
+      photos.slice(start, start + BATCH_UPLOAD_SIZE).forEach(({ file, caption }) => {
+        formData.append('images', file);
+        formData.append('captions', caption || '');
+      });
+
+      try {
+        const data = await request('/photos/batch/', { method: 'POST', body: formData });
+        results.push(...data.results);
+      } catch (error) {
+        // 400 means no photo of the chunk was accepted; keep its per-file errors
+        if (error.status === 400 && error.data?.results) {
+          results.push(...error.data.results);
+        } else {
+          throw error;
+        }
+      }
+    }
+    return results;
+  },
+
+  /**
+   * Upload a photo straight to storage with a presigned POST, falling back
+   * to a regular upload when the server stores photos locally
+   */
+  async uploadDirect(featureId, file, caption = '') {
+    let upload;
+    try {
+      upload = await request('/photos/upload_url/', {
+        method: 'POST',
+        body: JSON.stringify({ feature: featureId, filename: file.name }),
+      });
+    } catch (error) {
+      if (error.status === 501) {
+        return photoAPI.upload(featureId, file, caption);
+      }
+      throw error;
+    }
+
+    const formData = new FormData();
+    Object.entries(upload.fields).forEach(([name, value]) => formData.append(name, value));
+    formData.append('file', file);
+
+    const response = await fetch(upload.url, { method: 'POST', body: formData });
+    if (!response.ok) {
+      throw new APIError('Upload to storage failed', response.status, await response.text());
+    }
+
+    return request('/photos/finalize/', {
+      method: 'POST',
+      body: JSON.stringify({ feature: featureId, key: upload.key, caption }),
+    });
+  },
+
   /**
    * Update a photo
    */
@@ -3,7 +3,7 @@ Django admin configuration for memory_maps app.
 """
 
 from django.contrib import admin
-from .models import Map, MapFeature, Story, Photo, POSTGIS_ENABLED
+from .models import Map, MapFeature, Story, Photo, ImportJob, StorageDeletion, POSTGIS_ENABLED
 
 # Import GIS admin if PostGIS is enabled
 if POSTGIS_ENABLED:
@@ -107,17 +107,23 @@ class StoryAdmin(admin.ModelAdmin):
 class PhotoAdmin(admin.ModelAdmin):
     """Admin interface for Photo model."""
     
-    list_display = ['filename', 'feature', 'uploaded_by', 'file_size_mb', 'uploaded_at']
-    list_filter = ['uploaded_at', 'uploaded_by']
+    list_display = ['filename', 'feature', 'uploaded_by', 'file_size_mb', 'rendition_status', 'uploaded_at']
+    list_filter = ['uploaded_at', 'uploaded_by', 'rendition_status']
     search_fields = ['caption', 'feature__title', 'uploaded_by__username']
-    readonly_fields = ['uploaded_at', 'file_size_mb', 'filename', 'image_preview']
+    readonly_fields = [
+        'uploaded_at', 'updated_at', 'file_size_mb', 'filename', 'rendition_status',
+        'latitude', 'longitude', 'content_hash', 'image_preview'
+    ]
     
     fieldsets = (
         ('Photo Information', {
             'fields': ('feature', 'image', 'caption', 'uploaded_by')
         }),
         ('Metadata', {
-            'fields': ('uploaded_at', 'file_size_mb', 'filename', 'image_preview'),
+            'fields': (
+                'uploaded_at', 'updated_at', 'file_size_mb', 'filename', 'rendition_status',
+                'latitude', 'longitude', 'content_hash', 'image_preview'
+            ),
             'classes': ('collapse',)
         }),
     )
@@ -136,9 +142,49 @@ class PhotoAdmin(admin.ModelAdmin):
         """Display a thumbnail preview of the image."""
         if obj.image:
             from django.utils.html import format_html
+            from .renditions import rendition_urls
+            
+            # Fall back to the original until the thumbnail has been generated
+            url = rendition_urls(obj).get('thumbnail') or obj.image.url
             return format_html(
                 '<img src="{}" style="max-width: 200px; max-height: 200px;" />',
-                obj.image.url
+                url
             )
         return "No image"
     image_preview.short_description = 'Preview'
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """Admin interface for ImportJob model."""
+    
+    list_display = ['id', 'map', 'file_format', 'status', 'imported_count', 'created_by', 'created_at']
+    list_filter = ['status', 'file_format', 'created_at']
+    search_fields = ['map__title', 'created_by__username']
+    readonly_fields = [
+        'processed_count', 'imported_count', 'errors', 'warnings',
+        'created_at', 'started_at', 'finished_at'
+    ]
+    
+    fieldsets = (
+        ('Job', {
+            'fields': ('map', 'created_by', 'file_format', 'file', 'options', 'status')
+        }),
+        ('Progress', {
+            'fields': ('processed_count', 'imported_count', 'errors', 'warnings')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'started_at', 'finished_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+
+@admin.register(StorageDeletion)
+class StorageDeletionAdmin(admin.ModelAdmin):
+    """Admin interface for StorageDeletion model."""
+    
+    list_display = ['name', 'attempts', 'created_at']
+    list_filter = ['attempts', 'created_at']
+    search_fields = ['name', 'image']
+    readonly_fields = ['name', 'image', 'attempts', 'last_error', 'created_at']
@@ -10,4 +10,4 @@ class MemoryMapsConfig(AppConfig):
         """
         Import signal handlers when the app is ready.
         """
-        pass  # Import signals here when needed
+        from . import signals  # noqa: F401
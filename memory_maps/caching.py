@@ -0,0 +1,90 @@
+"""
+Response caching for memory_maps app.
+Serialized responses for public maps are cached under keys that include a
+per-map version number. Any write to a map or its content bumps the
+version, so stale entries are never read again and simply expire.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Version shared by all cached map listings (e.g. public_maps)
+MAP_LIST_VERSION_KEY = 'memory_maps:maps:version'
+
+
+def _version_key(map_id) -> str:
+    return f'memory_maps:map:{map_id}:version'
+
+
+def _get_version(key: str) -> int:
+    """
+    Return the current value of a version counter, creating it if needed.
+
+    New counters start at the current time in nanoseconds rather than 1, so
+    a counter that was evicted from the cache never repeats a version that
+    older response entries may still be stored under.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key: str):
+    """Increment a version counter, restarting it if it was evicted."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_map_version(map_id) -> int:
+    """Return the cache version of a single map."""
+    return _get_version(_version_key(map_id))
+
+
+def get_map_list_version() -> int:
+    """Return the cache version of map listings."""
+    return _get_version(MAP_LIST_VERSION_KEY)
+
+
+def invalidate_map(map_id):
+    """
+    Invalidate cached responses for a map and for map listings.
+
+    Versions are bumped straight away and again once the surrounding
+    transaction commits, so a response rendered from the old rows by
+    another request in the meantime is not kept under the new version.
+
+    Args:
+        map_id: ID of the map whose content changed
+    """
+    def bump():
+        _bump_version(_version_key(map_id))
+        _bump_version(MAP_LIST_VERSION_KEY)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def response_cache_key(name: str, version: int, request, map_id=None) -> str:
+    """
+    Build the cache key of a serialized response.
+
+    Args:
+        name: Name of the cached view
+        version: Map or listing version the response was built from
+        request: Request whose absolute URL (including the query string)
+                 identifies the response
+        map_id: ID of the map, for per-map responses
+
+    Returns:
+        Cache key string
+    """
+    url = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    scope = f'map:{map_id}' if map_id is not None else 'maps'
+    return f'memory_maps:response:{name}:{scope}:{version}:{url}'
@@ -0,0 +1,135 @@
+"""
+Server-side point clustering for memory_maps app.
+Groups point features into cells of a fixed screen size on the Web Mercator
+pixel grid of each zoom level, in PostGIS SQL or in Python over the
+bounding box columns otherwise.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection
+
+from .models import MapFeature, POSTGIS_ENABLED
+from .spatial import MAX_MERCATOR_LAT, TILE_SIZE, Bounds, mercator_pixel
+
+# Width of a cluster grid cell on screen, in pixels
+CLUSTER_CELL_PX = 64
+
+# Zoom level from which raw points are returned instead of clusters
+CLUSTER_MAX_ZOOM = 16
+
+# Number of feature ids returned with each cluster
+CLUSTER_SAMPLE_SIZE = 5
+
+
+def cluster_cell(lng: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """
+    Return the grid cell of a point at a zoom level.
+
+    Cells are CLUSTER_CELL_PX pixels square on screen, so they cover fewer
+    degrees of latitude towards the poles.
+
+    Returns:
+        Tuple of (column, row) from the top-left corner of the world
+    """
+    x, y = mercator_pixel(lng, lat, zoom)
+    return math.floor(x / CLUSTER_CELL_PX), math.floor(y / CLUSTER_CELL_PX)
+
+
+def _cluster(count: int, lng: float, lat: float, ids: List[int]) -> Dict:
+    """Format one cluster for the API response."""
+    return {
+        'lng': round(lng, 6),
+        'lat': round(lat, 6),
+        'count': count,
+        'ids': ids,
+    }
+
+
+def _cluster_postgis(map_id: int, bounds: Optional[Bounds], zoom: int) -> List[Dict]:
+    """Group points in the database by the same grid cells as cluster_cell."""
+    # Grid cells across the width (and height) of the world
+    cells = TILE_SIZE * (2 ** zoom) / CLUSTER_CELL_PX
+    params = [CLUSTER_SAMPLE_SIZE, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT, map_id]
+    envelope = ''
+    if bounds is not None:
+        envelope = 'AND geometry && ST_MakeEnvelope(%s, %s, %s, %s, 4326)'
+        params.extend(bounds)
+    params.extend([cells, cells])
+
+    sql = f"""
+        SELECT
+            count(*),
+            ST_X(ST_Centroid(ST_Collect(geometry))),
+            ST_Y(ST_Centroid(ST_Collect(geometry))),
+            (array_agg(id ORDER BY id))[1:%s]
+        FROM (
+            SELECT id, geometry, radians(LEAST(GREATEST(ST_Y(geometry), %s), %s)) AS lat
+            FROM {MapFeature._meta.db_table}
+            WHERE map_id = %s
+              AND feature_type = 'point'
+              {envelope}
+        ) AS points
+        GROUP BY
+            floor((ST_X(geometry) + 180) / 360 * %s),
+            floor((1 - ln(tan(lat) + 1 / cos(lat)) / pi()) / 2 * %s)
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [_cluster(count, lng, lat, list(ids)) for count, lng, lat, ids in cursor.fetchall()]
+
+
+def _cluster_python(queryset, zoom: int) -> List[Dict]:
+    """Group points by hashing their coordinates into grid cells."""
+    cells = {}
+    rows = queryset.filter(feature_type='point').order_by('id').values_list(
+        'id', 'bbox_min_lng', 'bbox_min_lat'
+    )
+    for pk, lng, lat in rows.iterator():
+        if lng is None or lat is None:
+            continue
+        key = cluster_cell(lng, lat, zoom)
+        entry = cells.get(key)
+        if entry is None:
+            cells[key] = [1, lng, lat, [pk]]
+        else:
+            entry[0] += 1
+            entry[1] += lng
+            entry[2] += lat
+            if len(entry[3]) < CLUSTER_SAMPLE_SIZE:
+                entry[3].append(pk)
+
+    return [
+        _cluster(count, sum_lng / count, sum_lat / count, ids)
+        for count, sum_lng, sum_lat, ids in cells.values()
+    ]
+
+
+def cluster_points(map_id: int, queryset, bounds: Optional[Bounds], zoom: int) -> List[Dict]:
+    """
+    Cluster the point features of a map at a zoom level.
+
+    Points are grouped into square cells CLUSTER_CELL_PX screen pixels
+    wide, aligned with the map's tiles. A fixed grid keeps clusters stable
+    while the user pans, unlike density-based clustering of the visible
+    points.
+
+    Args:
+        map_id: ID of the map
+        queryset: MapFeature queryset of the map, already limited to bounds
+                  (used on the non-PostGIS backend)
+        bounds: Viewport as (min_lng, min_lat, max_lng, max_lat), or None
+        zoom: Web map zoom level
+
+    Returns:
+        List of clusters with centroid, count and sample feature ids,
+        largest first
+    """
+    if POSTGIS_ENABLED and connection.vendor == 'postgresql':
+        clusters = _cluster_postgis(map_id, bounds, zoom)
+    else:
+        clusters = _cluster_python(queryset, zoom)
+    clusters.sort(key=lambda cluster: (-cluster['count'], cluster['ids'][0]))
+    return clusters
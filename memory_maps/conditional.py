@@ -0,0 +1,117 @@
+"""
+Conditional GET support for memory_maps app.
+Computes a cheap validator for a map and its content so unchanged
+responses can be answered with 304 Not Modified.
+"""
+
+import hashlib
+from typing import Optional, Tuple
+
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import Map, MapFeature, Story, Photo
+
+
+def _latest(model, map_lookup: str, field: str):
+    """Subquery returning the newest value of a timestamp field for a map."""
+    rows = (
+        model.objects
+        .filter(**{map_lookup: OuterRef('pk')})
+        .order_by(f'-{field}')
+        .values(field)[:1]
+    )
+    return Subquery(rows)
+
+
+def _total(field: str):
+    """Subquery summing a feature counter column for a map."""
+    rows = (
+        MapFeature.objects
+        .filter(map=OuterRef('pk'))
+        .order_by()
+        .values('map')
+        .annotate(total=Sum(field))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def map_validator(map_id) -> Optional[Tuple[str, int]]:
+    """
+    Compute the ETag and Last-Modified time of a map's content.
+
+    The validator combines the newest updated_at of the map and its
+    features, stories and photos, and the feature, story and photo counts,
+    so deletions change it too. It is computed in one query from
+    the counter columns and timestamp indexes.
+
+    Args:
+        map_id: ID of the map
+
+    Returns:
+        Tuple of (etag, last_modified as a Unix timestamp), or None if the
+        map does not exist
+    """
+    row = (
+        Map.objects
+        .filter(pk=map_id)
+        .annotate(
+            features_updated=_latest(MapFeature, 'map', 'updated_at'),
+            stories_updated=_latest(Story, 'feature__map', 'updated_at'),
+            photos_updated=_latest(Photo, 'feature__map', 'updated_at'),
+            story_total=_total('story_count'),
+            photo_total=_total('photo_count'),
+        )
+        .values_list(
+            'updated_at', 'features_updated', 'stories_updated', 'photos_updated',
+            'feature_count', 'story_total', 'photo_total',
+        )
+        .first()
+    )
+    if row is None:
+        return None
+
+    timestamps = [value for value in row[:4] if value is not None]
+    last_modified = max(timestamps)
+    digest = hashlib.md5(
+        '|'.join(str(value) for value in (map_id,) + tuple(row)).encode('utf-8')
+    ).hexdigest()
+    return quote_etag(digest), int(last_modified.timestamp())
+
+
+def not_modified_response(request, etag: str, last_modified: int):
+    """
+    Return a 304 response if the request's validators still match.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag
+        last_modified: Current Last-Modified time as a Unix timestamp
+
+    Returns:
+        HttpResponseNotModified, or None if the full response is needed
+    """
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag: str, last_modified: int, public: bool):
+    """
+    Add ETag, Last-Modified and revalidation headers to a response.
+
+    Args:
+        response: Response to update
+        etag: ETag of the map content
+        last_modified: Last-Modified time as a Unix timestamp
+        public: Whether shared caches may store the response
+    """
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Clients may keep the response but must revalidate before reusing it
+    if public:
+        patch_cache_control(response, public=True, no_cache=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,91 @@
+"""
+Denormalized counter maintenance for memory_maps app.
+Keeps Map.feature_count, MapFeature.story_count and MapFeature.photo_count
+in step with the rows they count.
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Map, MapFeature, Story, Photo
+
+# (parent model, counter field, child model, child foreign key)
+COUNTERS = [
+    (Map, 'feature_count', MapFeature, 'map'),
+    (MapFeature, 'story_count', Story, 'feature'),
+    (MapFeature, 'photo_count', Photo, 'feature'),
+]
+
+
+def adjust_counter(model, pk, field: str, delta: int):
+    """
+    Atomically add delta to a counter column with an F() expression.
+    
+    Args:
+        model: Model class holding the counter
+        pk: Primary key of the row to update
+        field: Name of the counter field
+        delta: Amount to add (negative to subtract)
+    """
+    if delta:
+        model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def actual_count(child_model, fk: str):
+    """
+    Build a subquery expression counting child rows per parent row.
+    
+    Args:
+        child_model: Model class being counted
+        fk: Name of the child's foreign key to the parent
+        
+    Returns:
+        Expression usable in annotate() or update()
+    """
+    counts = (
+        child_model.objects
+        .filter(**{fk: OuterRef('pk')})
+        .order_by()
+        .values(fk)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def find_drift():
+    """
+    Find rows whose stored counters disagree with the actual row counts.
+    
+    Returns:
+        List of (model, pk, field, stored, actual) tuples
+    """
+    drift = []
+    for model, field, child_model, fk in COUNTERS:
+        rows = (
+            model.objects
+            .annotate(actual=actual_count(child_model, fk))
+            .exclude(**{field: F('actual')})
+            .values_list('pk', field, 'actual')
+        )
+        for pk, stored, actual in rows.iterator():
+            drift.append((model, pk, field, stored, actual))
+    return drift
+
+
+def repair_counters():
+    """
+    Recompute every counter column from the underlying rows.
+    
+    Returns:
+        Number of rows updated
+    """
+    updated = 0
+    for model, field, child_model, fk in COUNTERS:
+        updated += (
+            model.objects
+            .annotate(actual=actual_count(child_model, fk))
+            .exclude(**{field: F('actual')})
+            .update(**{field: actual_count(child_model, fk)})
+        )
+    return updated
@@ -0,0 +1,154 @@
+"""
+Deferred deletion of stored photo files for memory_maps app.
+Deleting photos, directly or through Map, MapFeature and User cascades
+and queryset deletes, queues their image and rendition files in the
+StorageDeletion table, as are the uploads of deleted import jobs.
+Workers running the drain_storage_deletions management command remove
+them in batches, using S3 DeleteObjects requests on S3 storage.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Photo, StorageDeletion
+
+logger = logging.getLogger(__name__)
+
+# Files deleted per batch, the most S3 DeleteObjects accepts in one request
+DELETE_BATCH_SIZE = 1000
+
+# Failed deletions are retried this many times, then left for inspection
+MAX_ATTEMPTS = 5
+
+
+def queue_photo_files(photos: Iterable[Tuple[str, Dict]]) -> int:
+    """
+    Queue the image and rendition files of deleted photos for deletion.
+
+    Args:
+        photos: (image name, renditions) pairs, e.g. from
+                values_list('image', 'renditions')
+
+    Returns:
+        Number of files queued
+    """
+    rows = []
+    for image, renditions in photos:
+        if not image:
+            continue
+        rows.append(StorageDeletion(name=image, image=image))
+        rows.extend(StorageDeletion(name=name, image=image) for name in (renditions or {}).values())
+    StorageDeletion.objects.bulk_create(rows, batch_size=DELETE_BATCH_SIZE)
+    return len(rows)
+
+
+def queue_files(names: Iterable[str]) -> int:
+    """
+    Queue stored files that no photo uses, such as import uploads, for deletion.
+
+    Args:
+        names: Storage names
+
+    Returns:
+        Number of files queued
+    """
+    rows = [StorageDeletion(name=name, image=name) for name in names if name]
+    StorageDeletion.objects.bulk_create(rows, batch_size=DELETE_BATCH_SIZE)
+    return len(rows)
+
+
+def queue_photos(queryset) -> int:
+    """
+    Queue the files of the photos in a queryset, with one SELECT and batched INSERTs.
+
+    Args:
+        queryset: Photo queryset about to be deleted
+
+    Returns:
+        Number of files queued
+    """
+    return queue_photo_files(queryset.values_list('image', 'renditions').iterator(chunk_size=DELETE_BATCH_SIZE))
+
+
+def delete_files(storage, names: List[str]) -> Dict[str, str]:
+    """
+    Delete files from storage, with a single DeleteObjects request on S3.
+
+    Args:
+        storage: Photo storage
+        names: Up to DELETE_BATCH_SIZE storage names
+
+    Returns:
+        Error message by storage name, for files that could not be deleted
+    """
+    from .uploads import bucket_key, direct_upload_storage
+
+    errors = {}
+    if direct_upload_storage() is not None:
+        keys = {bucket_key(storage, name): name for name in names}
+        response = storage.bucket.meta.client.delete_objects(
+            Bucket=storage.bucket_name,
+            Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True},
+        )
+        for error in response.get('Errors', []):
+            errors[keys.get(error['Key'], error['Key'])] = f"{error.get('Code')}: {error.get('Message')}"
+        return errors
+
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception as e:
+            errors[name] = str(e)
+    return errors
+
+
+def drain_storage_deletions(batch_size: int = DELETE_BATCH_SIZE) -> Tuple[int, int, int]:
+    """
+    Delete one batch of queued files.
+
+    Files whose image is still used by a photo (such as a shared upload)
+    are dropped from the queue without being deleted. Rows are locked with
+    SKIP LOCKED where the database supports it, so several workers can run
+    at once.
+
+    Args:
+        batch_size: Most rows handled, at most DELETE_BATCH_SIZE
+
+    Returns:
+        Tuple of (files deleted, files kept as still in use, failures)
+    """
+    batch_size = min(batch_size, DELETE_BATCH_SIZE)
+    storage = Photo._meta.get_field('image').storage
+
+    with transaction.atomic():
+        queryset = StorageDeletion.objects.filter(attempts__lt=MAX_ATTEMPTS).order_by('attempts', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        rows = list(queryset[:batch_size])
+        if not rows:
+            return 0, 0, 0
+
+        in_use = set(
+            Photo.objects.filter(image__in={row.image for row in rows}).values_list('image', flat=True)
+        )
+        names = list(dict.fromkeys(row.name for row in rows if row.image not in in_use))
+        try:
+            errors = delete_files(storage, names) if names else {}
+        except Exception as e:
+            logger.exception("Deleting %d stored file(s) failed", len(names))
+            errors = {name: str(e) for name in names}
+
+        # Failed rows stay queued for another attempt; the rest are done
+        failed = [row for row in rows if row.name in errors]
+        for row in failed:
+            StorageDeletion.objects.filter(pk=row.pk).update(
+                attempts=F('attempts') + 1, last_error=errors[row.name]
+            )
+        StorageDeletion.objects.filter(pk__in=[row.pk for row in rows if row.name not in errors]).delete()
+
+    deleted = sum(1 for name in names if name not in errors)
+    kept = sum(1 for row in rows if row.image in in_use)
+    return deleted, kept, len(failed)
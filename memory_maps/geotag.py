@@ -0,0 +1,227 @@
+"""
+EXIF geotagging of photos for memory_maps app.
+GPS coordinates are read from photo EXIF headers, without decoding pixel
+data, and can be used to attach photos to a nearby point feature, which
+is created when no existing point is close enough.
+"""
+
+import json
+import math
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import MapFeature, Photo, POSTGIS_ENABLED
+
+# Photos within this distance (in metres) of a point feature are attached to it
+DEFAULT_TOLERANCE_M = 50.0
+
+# Bytes read from the start of a stored photo; JPEG EXIF segments are at
+# most 64KB and come before the image data
+HEADER_BYTES = 128 * 1024
+
+# Mean Earth radius in metres
+EARTH_RADIUS_M = 6371008.8
+
+# Metres per degree of latitude
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def _degrees(value, ref: str) -> float:
+    """Convert an EXIF (degrees, minutes, seconds) value to signed decimal degrees."""
+    degrees, minutes, seconds = (float(part) for part in value)
+    decimal = degrees + minutes / 60 + seconds / 3600
+    return -decimal if ref in ('S', 'W') else decimal
+
+
+def gps_coordinates(gps: Dict) -> Optional[Tuple[float, float]]:
+    """
+    Read the location from an EXIF GPS IFD.
+
+    Args:
+        gps: GPS IFD dictionary keyed by tag number
+
+    Returns:
+        Tuple of (latitude, longitude), or None if the location is missing
+        or invalid
+    """
+    from PIL.ExifTags import GPS
+
+    try:
+        lat = _degrees(gps[GPS.GPSLatitude], gps.get(GPS.GPSLatitudeRef, 'N'))
+        lng = _degrees(gps[GPS.GPSLongitude], gps.get(GPS.GPSLongitudeRef, 'E'))
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+
+    # Comparisons are False for NaN, so it is rejected here too
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    # Cameras without a fix often write zeros
+    if lat == 0 and lng == 0:
+        return None
+    return lat, lng
+
+
+def read_gps(file) -> Optional[Tuple[float, float]]:
+    """
+    Read the GPS location from an image file's EXIF data.
+
+    Image.open only parses headers, so the pixel data is never decoded.
+
+    Args:
+        file: Binary file-like object positioned at the start of the image
+
+    Returns:
+        Tuple of (latitude, longitude), or None if the image has no location
+    """
+    from PIL import ExifTags, Image
+
+    try:
+        with Image.open(file) as image:
+            gps = image.getexif().get_ifd(ExifTags.IFD.GPSInfo)
+    except Exception:
+        # Unreadable images simply have no location
+        return None
+    return gps_coordinates(gps)
+
+
+def read_photo_gps(photo: Photo) -> Optional[Tuple[float, float]]:
+    """
+    Read the GPS location of a stored photo from the first HEADER_BYTES of its file.
+
+    On S3 a ranged GET is used, as opening the file through the storage
+    would download all of it.
+
+    Args:
+        photo: Photo with a saved image
+
+    Returns:
+        Tuple of (latitude, longitude), or None if the photo has no location
+    """
+    from .uploads import bucket_key, direct_upload_storage
+
+    storage = direct_upload_storage()
+    if storage is not None:
+        obj = storage.bucket.Object(bucket_key(storage, photo.image.name))
+        head = obj.get(Range=f'bytes=0-{HEADER_BYTES - 1}')['Body'].read()
+    else:
+        with photo.image.storage.open(photo.image.name, 'rb') as image_file:
+            head = image_file.read(HEADER_BYTES)
+    return read_gps(BytesIO(head))
+
+
+def distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in metres (haversine formula)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def search_bounds(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """Return a (min_lng, min_lat, max_lng, max_lat) box containing a circle around a point."""
+    d_lat = radius_m / METERS_PER_DEGREE
+    d_lng = d_lat / max(math.cos(math.radians(lat)), 0.01)
+    return lng - d_lng, lat - d_lat, lng + d_lng, lat + d_lat
+
+
+def feature_is_near(feature: MapFeature, lat: float, lng: float, tolerance_m: float) -> bool:
+    """
+    Return True if a location lies within the tolerance of a feature's bounding box.
+
+    A photo taken inside a park polygon, or beside a point, already has a
+    good feature and is left where it is.
+    """
+    if feature.bbox_min_lng is None:
+        return False
+    nearest_lng = min(max(lng, feature.bbox_min_lng), feature.bbox_max_lng)
+    nearest_lat = min(max(lat, feature.bbox_min_lat), feature.bbox_max_lat)
+    return distance_m(lat, lng, nearest_lat, nearest_lng) <= tolerance_m
+
+
+def find_point_feature(map_id: int, lat: float, lng: float, tolerance_m: float) -> Optional[MapFeature]:
+    """
+    Find the nearest point feature of a map within the tolerance of a location.
+
+    Candidates are selected on the stored bbox columns, which uses the
+    (map, bbox_*) index on every backend, and then measured exactly.
+
+    Args:
+        map_id: Map to search
+        lat: Latitude
+        lng: Longitude
+        tolerance_m: Largest distance in metres
+
+    Returns:
+        The nearest MapFeature, or None
+    """
+    min_lng, min_lat, max_lng, max_lat = search_bounds(lat, lng, tolerance_m)
+    candidates = MapFeature.objects.filter(
+        map_id=map_id,
+        feature_type='point',
+        bbox_min_lng__gte=min_lng,
+        bbox_min_lng__lte=max_lng,
+        bbox_min_lat__gte=min_lat,
+        bbox_min_lat__lte=max_lat,
+    ).select_related('map')
+
+    best, best_distance = None, tolerance_m
+    for feature in candidates:
+        distance = distance_m(lat, lng, feature.bbox_min_lat, feature.bbox_min_lng)
+        if distance <= best_distance:
+            best, best_distance = feature, distance
+    return best
+
+
+def create_point_feature(map_id: int, lat: float, lng: float, title: str) -> MapFeature:
+    """Create a point feature for a photo location."""
+    if POSTGIS_ENABLED:
+        from django.contrib.gis.geos import Point
+        geometry = Point(lng, lat, srid=4326)
+    else:
+        geometry = json.dumps({'type': 'Point', 'coordinates': [lng, lat]})
+
+    return MapFeature.objects.create(
+        map_id=map_id,
+        feature_type='point',
+        geometry=geometry,
+        title=title[:200],
+        description=f"Created from photo location: lat={lat:.6f}, lng={lng:.6f}",
+        category='photo',
+    )
+
+
+def place_photos(photos: Iterable[Photo], tolerance_m: float = DEFAULT_TOLERANCE_M) -> List[Photo]:
+    """
+    Attach geotagged photos that are far from their feature to a nearby point feature.
+
+    Photos without a location, or already within the tolerance of their
+    feature, are left alone. Otherwise the nearest point feature of the
+    same map within the tolerance is used, and one is created if there is
+    none. Features are created as they are needed, so later photos taken
+    at the same spot share them.
+
+    Only the in-memory photos are changed; the caller saves them.
+
+    Args:
+        photos: Photos with latitude, longitude and feature set
+        tolerance_m: Matching distance in metres
+
+    Returns:
+        Photos whose feature was changed
+    """
+    moved = []
+    for photo in photos:
+        if photo.latitude is None or photo.longitude is None:
+            continue
+        if feature_is_near(photo.feature, photo.latitude, photo.longitude, tolerance_m):
+            continue
+
+        map_id = photo.feature.map_id
+        feature = find_point_feature(map_id, photo.latitude, photo.longitude, tolerance_m)
+        if feature is None:
+            title = f"Photo location {photo.latitude:.5f}, {photo.longitude:.5f}"
+            feature = create_point_feature(map_id, photo.latitude, photo.longitude, title)
+        photo.feature = feature
+        moved.append(photo)
+    return moved
@@ -0,0 +1,463 @@
+"""
+GIS data export utilities for memory_maps app.
+Streams the features of a map as GeoJSON, KML/KMZ, CSV or FlatGeobuf from
+a server-side cursor, so memory use does not grow with the size of the map.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.text import slugify
+
+from .gis_import import KML_NAMESPACE
+from .models import MapFeature, POSTGIS_ENABLED
+from .simplify import GeometryOptions, geometry_expression
+from .spatial import simplify_geojson
+
+# Rows fetched per round trip from the database cursor
+EXPORT_CHUNK_SIZE = 2000
+
+# Features serialized into each chunk of a streamed response
+WRITE_BATCH_SIZE = 500
+
+# Coordinate decimals written by PostGIS when no precision is given
+# (8 decimals is about a millimetre)
+DEFAULT_EXPORT_PRECISION = 8
+
+# MapFeature fields exported as feature properties, in order
+EXPORT_FIELDS = [
+    'title', 'description', 'category', 'feature_type',
+    'story_count', 'photo_count', 'created_at', 'updated_at',
+]
+
+
+def _text(value: Any) -> str:
+    """Format a property value as text for KML and CSV output."""
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class BaseExporter:
+    """
+    Shared row fetching for the exporters.
+
+    Features are read with values_list() and iterator(), which uses a
+    server-side cursor on PostgreSQL and skips model instances entirely.
+    Geometries are produced as GeoJSON text: by ST_AsGeoJSON on PostGIS,
+    or straight from the stored GeoJSON otherwise.
+    """
+
+    content_type = 'application/octet-stream'
+    extension = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        """Return True if the libraries this format needs are installed."""
+        return True
+
+    def __init__(self, map_instance, options: Optional[GeometryOptions] = None,
+                 chunk_size: int = EXPORT_CHUNK_SIZE):
+        """
+        Initialize exporter with a Map instance.
+
+        Args:
+            map_instance: Map whose features are exported
+            options: Simplification and precision to apply, or None
+            chunk_size: Number of rows fetched per database round trip
+        """
+        self.map = map_instance
+        self.options = options
+        self.chunk_size = chunk_size
+
+    def filename(self) -> str:
+        """Return the download file name."""
+        name = slugify(self.map.title) or f'map-{self.map.pk}'
+        return f'{name}.{self.extension}'
+
+    def database_geometry(self, expression, precision: int):
+        """
+        Return the PostGIS function rendering a geometry for this format.
+
+        Args:
+            expression: Geometry expression (see simplify.geometry_expression)
+            precision: Number of decimal places to write
+
+        Returns:
+            Query expression producing text
+        """
+        from django.contrib.gis.db.models.functions import AsGeoJSON
+        return AsGeoJSON(expression, precision=precision)
+
+    def format_geometry(self, geojson: str) -> str:
+        """
+        Convert stored GeoJSON text to this format on non-PostGIS backends.
+
+        Args:
+            geojson: GeoJSON geometry text
+
+        Returns:
+            Geometry text in the output format
+        """
+        return geojson
+
+    def rows(self) -> Iterator[Tuple[int, Dict[str, Any], str]]:
+        """
+        Yield the features of the map in primary key order.
+
+        Yields:
+            Tuples of (feature id, properties dictionary, geometry text in
+            the output format)
+        """
+        options = self.options
+        features = MapFeature.objects.filter(map=self.map).order_by('id')
+
+        if POSTGIS_ENABLED:
+            precision = DEFAULT_EXPORT_PRECISION
+            if options is not None and options.precision is not None:
+                precision = options.precision
+            features = features.annotate(
+                geometry_text=self.database_geometry(
+                    geometry_expression(options, reduce_precision=False), precision
+                )
+            )
+            columns = ['geometry_text']
+        else:
+            columns = ['geometry']
+            if options is not None and options.column and options.column != 'geometry':
+                columns.append(options.column)
+
+        rows = features.values_list('id', *EXPORT_FIELDS, *columns)
+        for row in rows.iterator(chunk_size=self.chunk_size):
+            pk = row[0]
+            properties = dict(zip(EXPORT_FIELDS, row[1:len(EXPORT_FIELDS) + 1]))
+            geometry, *stored = row[len(EXPORT_FIELDS) + 1:]
+
+            if not POSTGIS_ENABLED and options is not None:
+                if stored and stored[0]:
+                    geometry = stored[0]
+                if options.tolerance or options.precision is not None:
+                    simplified = simplify_geojson(geometry, options.tolerance or 0.0, options.precision)
+                    if simplified:
+                        geometry = json.dumps(simplified)
+            if not POSTGIS_ENABLED:
+                geometry = self.format_geometry(geometry)
+
+            yield pk, properties, geometry
+
+    def stream(self) -> Iterator[str]:
+        """Yield the export file in chunks."""
+        raise NotImplementedError
+
+
+class GeoJSONExporter(BaseExporter):
+    """Export features as a GeoJSON FeatureCollection."""
+
+    content_type = 'application/geo+json'
+    extension = 'geojson'
+
+    def stream(self) -> Iterator[str]:
+        """
+        Yield the FeatureCollection in chunks of WRITE_BATCH_SIZE features.
+
+        Geometry text is inserted into the output as is, without being
+        parsed and re-serialized.
+        """
+        yield '{"type":"FeatureCollection","name":%s,"features":[' % json.dumps(self.map.title)
+
+        parts = []
+        separator = ''
+        for pk, properties, geometry in self.rows():
+            parts.append(
+                '%s{"type":"Feature","id":%d,"geometry":%s,"properties":%s}' % (
+                    separator, pk, geometry, json.dumps(properties, cls=DjangoJSONEncoder)
+                )
+            )
+            separator = ','
+            if len(parts) >= WRITE_BATCH_SIZE:
+                yield ''.join(parts)
+                parts = []
+
+        parts.append(']}')
+        yield ''.join(parts)
+
+
+def _kml_coordinates(positions: List[List[float]]) -> str:
+    """Format GeoJSON positions as a KML coordinates element."""
+    text = ' '.join(','.join(repr(value) for value in position[:3]) for position in positions)
+    return f'<coordinates>{text}</coordinates>'
+
+
+def _kml_polygon(rings: List[List[List[float]]]) -> str:
+    """Format GeoJSON polygon rings as a KML Polygon element."""
+    if not rings:
+        return '<Polygon/>'
+    outer = f'<outerBoundaryIs><LinearRing>{_kml_coordinates(rings[0])}</LinearRing></outerBoundaryIs>'
+    inner = ''.join(
+        f'<innerBoundaryIs><LinearRing>{_kml_coordinates(ring)}</LinearRing></innerBoundaryIs>'
+        for ring in rings[1:]
+    )
+    return f'<Polygon>{outer}{inner}</Polygon>'
+
+
+def geojson_to_kml(geometry: Any) -> str:
+    """
+    Convert a GeoJSON geometry to a KML geometry element.
+
+    Args:
+        geometry: GeoJSON string or dictionary
+
+    Returns:
+        KML fragment (empty string for unreadable geometries)
+    """
+    geojson = json.loads(geometry) if isinstance(geometry, str) else geometry
+    if not isinstance(geojson, dict):
+        return ''
+
+    geom_type = geojson.get('type')
+    coords = geojson.get('coordinates')
+
+    if geom_type == 'Point':
+        return f'<Point>{_kml_coordinates([coords])}</Point>'
+    if geom_type == 'LineString':
+        return f'<LineString>{_kml_coordinates(coords)}</LineString>'
+    if geom_type == 'Polygon':
+        return _kml_polygon(coords)
+    if geom_type == 'MultiPoint':
+        parts = [f'<Point>{_kml_coordinates([point])}</Point>' for point in coords]
+    elif geom_type == 'MultiLineString':
+        parts = [f'<LineString>{_kml_coordinates(line)}</LineString>' for line in coords]
+    elif geom_type == 'MultiPolygon':
+        parts = [_kml_polygon(polygon) for polygon in coords]
+    elif geom_type == 'GeometryCollection':
+        parts = [geojson_to_kml(child) for child in geojson.get('geometries', [])]
+    else:
+        return ''
+    return f'<MultiGeometry>{"".join(parts)}</MultiGeometry>'
+
+
+class KMLExporter(BaseExporter):
+    """
+    Export features as a KML document, the reverse of KMLImporter.
+    Properties other than the title and description go to ExtendedData.
+    """
+
+    content_type = 'application/vnd.google-earth.kml+xml'
+    extension = 'kml'
+
+    def database_geometry(self, expression, precision: int):
+        """Render geometries with ST_AsKML."""
+        from django.contrib.gis.db.models.functions import AsKML
+        return AsKML(expression, precision=precision)
+
+    def format_geometry(self, geojson: str) -> str:
+        """Convert stored GeoJSON to a KML geometry element."""
+        return geojson_to_kml(geojson)
+
+    def _placemark(self, pk: int, properties: Dict[str, Any], geometry: str) -> str:
+        """Format one feature as a KML Placemark."""
+        data = ''.join(
+            f'<Data name={quoteattr(name)}><value>{escape(_text(value))}</value></Data>'
+            for name, value in properties.items()
+            if name not in ('title', 'description')
+        )
+        return (
+            f'<Placemark id="feature-{pk}">'
+            f'<name>{escape(properties["title"])}</name>'
+            f'<description>{escape(properties["description"] or "")}</description>'
+            f'<ExtendedData>{data}</ExtendedData>'
+            f'{geometry}'
+            f'</Placemark>\n'
+        )
+
+    def stream(self) -> Iterator[str]:
+        """Yield the KML document in chunks of WRITE_BATCH_SIZE placemarks."""
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<kml xmlns="{KML_NAMESPACE}"><Document>'
+            f'<name>{escape(self.map.title)}</name>\n'
+        )
+
+        parts = []
+        for row in self.rows():
+            parts.append(self._placemark(*row))
+            if len(parts) >= WRITE_BATCH_SIZE:
+                yield ''.join(parts)
+                parts = []
+
+        parts.append('</Document></kml>\n')
+        yield ''.join(parts)
+
+
+class _ZipStream(io.RawIOBase):
+    """Unseekable sink that collects what zipfile writes until drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return and forget the bytes written so far."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class KMZExporter(KMLExporter):
+    """
+    Export features as a KMZ archive containing doc.kml.
+
+    The archive is written to an unseekable stream, so zipfile puts the
+    sizes and CRC after the compressed data and nothing is buffered beyond
+    the compressor's own window.
+    """
+
+    content_type = 'application/vnd.google-earth.kmz'
+    extension = 'kmz'
+
+    def stream(self) -> Iterator[bytes]:
+        """Yield the KMZ archive as it is compressed."""
+        sink = _ZipStream()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open('doc.kml', 'w', force_zip64=True) as entry:
+                for chunk in super().stream():
+                    entry.write(chunk.encode('utf-8'))
+                    data = sink.drain()
+                    if data:
+                        yield data
+        yield sink.drain()
+
+
+class CSVExporter(BaseExporter):
+    """
+    Export features as CSV, the reverse of CoordinateImporter.
+
+    Each row has lat, lng and name columns followed by the other
+    properties. Points are written at their coordinates; lines and polygons
+    at the centre of their bounding box, read from the bbox columns so no
+    geometry is fetched at all.
+    """
+
+    content_type = 'text/csv'
+    extension = 'csv'
+
+    # Header row; name holds the feature title
+    COLUMNS = ['id', 'lat', 'lng', 'name'] + [field for field in EXPORT_FIELDS if field != 'title']
+
+    def rows(self) -> Iterator[List[Any]]:
+        """Yield one CSV row per feature in primary key order."""
+        fields = [field for field in EXPORT_FIELDS if field != 'title']
+        rows = (
+            MapFeature.objects
+            .filter(map=self.map)
+            .order_by('id')
+            .values_list('id', 'bbox_min_lat', 'bbox_max_lat', 'bbox_min_lng', 'bbox_max_lng', 'title', *fields)
+        )
+        for pk, min_lat, max_lat, min_lng, max_lng, title, *values in rows.iterator(chunk_size=self.chunk_size):
+            lat = lng = None
+            if min_lat is not None:
+                lat = (min_lat + max_lat) / 2
+                lng = (min_lng + max_lng) / 2
+            yield [pk, lat, lng, title] + [_text(value) for value in values]
+
+    def stream(self) -> Iterator[str]:
+        """Yield the CSV file in chunks of WRITE_BATCH_SIZE rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.COLUMNS)
+
+        count = 0
+        for row in self.rows():
+            writer.writerow(row)
+            count += 1
+            if count % WRITE_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        yield buffer.getvalue()
+
+
+# Bytes read from the finished FlatGeobuf file per response chunk
+FILE_CHUNK_SIZE = 64 * 1024
+
+# FlatGeobuf property types of the exported fields
+FLATGEOBUF_SCHEMA = {
+    'geometry': 'Unknown',
+    'properties': {
+        'title': 'str',
+        'description': 'str',
+        'category': 'str',
+        'feature_type': 'str',
+        'story_count': 'int',
+        'photo_count': 'int',
+        'created_at': 'datetime',
+        'updated_at': 'datetime',
+    },
+}
+
+
+class FlatGeobufExporter(BaseExporter):
+    """
+    Export features as FlatGeobuf with a packed Hilbert R-tree index.
+
+    The spatial index sits in front of the features, so the file cannot be
+    streamed as rows are read. It is written with Fiona to a temporary file
+    on disk, which is then streamed and deleted.
+    """
+
+    content_type = 'application/flatgeobuf'
+    extension = 'fgb'
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import fiona  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def stream(self) -> Iterator[bytes]:
+        """Write the FlatGeobuf file, then yield it in FILE_CHUNK_SIZE chunks."""
+        import fiona
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, self.filename())
+            with fiona.open(path, 'w', driver='FlatGeobuf', schema=FLATGEOBUF_SCHEMA,
+                            crs='EPSG:4326', SPATIAL_INDEX='YES') as collection:
+                records = []
+                for _, properties, geometry in self.rows():
+                    properties = dict(properties)
+                    for field in ('created_at', 'updated_at'):
+                        properties[field] = _text(properties[field]) or None
+                    records.append(fiona.Feature.from_dict(
+                        geometry=json.loads(geometry), properties=properties
+                    ))
+                    if len(records) >= WRITE_BATCH_SIZE:
+                        collection.writerecords(records)
+                        records = []
+                if records:
+                    collection.writerecords(records)
+
+            with open(path, 'rb') as output:
+                while True:
+                    chunk = output.read(FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
@@ -6,10 +6,16 @@ Handles importing GeoJSON, KML/KMZ, and coordinate data.
 import json
 import zipfile
 import csv
-from io import BytesIO, StringIO
+import shutil
+import tempfile
+from contextlib import ExitStack, nullcontext
+from io import BytesIO, StringIO, TextIOWrapper
 from typing import Dict, List, Tuple, Optional, Any
 from django.core.exceptions import ValidationError
-from .models import MapFeature, POSTGIS_ENABLED
+from django.db import transaction
+from .caching import invalidate_map
+from .counters import adjust_counter
+from .models import Map, MapFeature, POSTGIS_ENABLED
 
 # Conditional imports for PostGIS
 if POSTGIS_ENABLED:
@@ -21,23 +27,284 @@ else:
     MultiPolygon = None
 
 
-class GeoJSONImporter:
+# Number of features written per INSERT in batched imports
+DEFAULT_BATCH_SIZE = 1000
+
+# Number of processed features between progress reports
+PROGRESS_INTERVAL = 500
+
+
+class BaseImporter:
     """
-    Import GeoJSON data and create MapFeature objects.
-    Supports both FeatureCollection and individual Feature objects.
+    Shared state and batched writing for the importers.
+    
+    In batched mode (batch_size set) features are validated in memory and
+    written with bulk_create, one batch at a time, inside a single
+    transaction. Without a batch size each feature is saved individually.
+    
+    Set atomic to False to commit each batch on its own instead, so progress
+    is visible to other connections while a long import runs.
     """
     
-    def __init__(self, map_instance):
+    def __init__(self, map_instance, batch_size: Optional[int] = None,
+                 progress_callback=None):
         """
         Initialize importer with a Map instance.
         
         Args:
             map_instance: Map object to attach imported features to
+            batch_size: Number of features per bulk INSERT, or None to
+                        save features one at a time
+            progress_callback: Optional callable taking the importer, called
+                               every PROGRESS_INTERVAL processed features
         """
         self.map = map_instance
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+        self.atomic = True
         self.errors = []
         self.warnings = []
+        self.imported_count = 0
         self.imported_features = []
+        self.processed = 0
+        self._pending = []
+    
+    def _reset(self):
+        """Clear the results of a previous import."""
+        self.errors = []
+        self.warnings = []
+        self.imported_count = 0
+        self.imported_features = []
+        self.processed = 0
+        self._pending = []
+    
+    def _transaction(self):
+        """Return the context manager wrapping a whole batched import."""
+        return transaction.atomic() if self.atomic else nullcontext()
+    
+    def _tick(self):
+        """Count a processed feature and report progress periodically."""
+        self.processed += 1
+        if self.progress_callback and self.processed % PROGRESS_INTERVAL == 0:
+            self.progress_callback(self)
+    
+    def _record_imported(self, features: List[MapFeature]):
+        """
+        Count saved features and keep their (id, title) for the response.
+        
+        The instances themselves are not kept, so memory does not grow
+        with the geometries of a large import.
+        """
+        self.imported_count += len(features)
+        self.imported_features.extend((feature.pk, feature.title) for feature in features)
+    
+    def _queue_feature(self, map_feature: MapFeature, label: str):
+        """
+        Queue a validated, unsaved feature for the next bulk INSERT.
+        Bounds are computed unless the caller has already set them, and
+        the simplified geometry columns are filled in.
+        
+        Args:
+            map_feature: Unsaved MapFeature
+            label: Identifier used when reporting a failed batch
+        """
+        if map_feature.bbox_min_lng is None:
+            map_feature.update_bounds()
+        map_feature.update_simplified()
+        self._pending.append((label, map_feature))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+    
+    def _flush(self):
+        """
+        Write queued features with bulk_create.
+        
+        Each batch runs in a savepoint, so a database error only discards
+        that batch; it is reported as one error naming the batch's range.
+        """
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, []
+        
+        try:
+            with transaction.atomic():
+                features = [feature for _, feature in pending]
+                created = MapFeature.objects.bulk_create(features, batch_size=self.batch_size)
+                # Bulk writes skip post_save, so maintain the counter here
+                adjust_counter(Map, self.map.pk, 'feature_count', len(created))
+        except Exception as e:
+            first, last = pending[0][0], pending[-1][0]
+            self.errors.append(f"{first} to {last}: {str(e)}")
+            return
+        
+        # Bulk writes skip post_save, so cached responses are invalidated here
+        invalidate_map(self.map.pk)
+        
+        self.map.feature_count += len(created)
+        self._record_imported(created)
+
+
+class GeoJSONStreamError(ValueError):
+    """Raised when a streamed GeoJSON document is malformed."""
+
+
+class GeoJSONStream:
+    """
+    Incremental reader for large GeoJSON documents.
+    
+    Walks the top-level object of a UTF-8 GeoJSON file, decoding the members
+    of the 'features' array one at a time. Other top-level members (type,
+    crs, name, ...) are small and are collected into `header`; for a single
+    Feature document the header is the feature itself.
+    """
+    
+    def __init__(self, file_obj, chunk_size: int = 64 * 1024):
+        """
+        Initialize the stream.
+        
+        Args:
+            file_obj: Binary file-like object containing UTF-8 JSON
+            chunk_size: Number of bytes read from the file at a time
+        """
+        import codecs
+        
+        self.file = file_obj
+        self.chunk_size = chunk_size
+        self.header = {}
+        self.saw_features = False
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _read(self) -> bool:
+        """Append the next chunk of the file to the buffer. Returns False at EOF."""
+        if self._eof:
+            return False
+        
+        # Drop text that has already been consumed
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        
+        chunk = self.file.read(self.chunk_size)
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if not chunk:
+            self._eof = True
+            self._buffer += self._text_decoder.decode(b'', final=True)
+            return False
+        
+        self._buffer += self._text_decoder.decode(chunk)
+        return True
+    
+    def _peek(self) -> str:
+        """Skip whitespace and return the next character ('' at EOF)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return ''
+    
+    def _expect(self, char: str):
+        """Consume the next non-whitespace character, which must be char."""
+        found = self._peek()
+        if found != char:
+            raise GeoJSONStreamError(
+                f"Invalid JSON: expected '{char}' but found '{found or 'end of file'}'"
+            )
+        self._pos += 1
+    
+    def _value(self):
+        """Decode the next complete JSON value from the stream."""
+        self._peek()
+        # Values larger than the buffer are retried with geometrically more
+        # data, so a huge feature is not re-parsed once per chunk
+        chunks = 1
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if any([self._read() for _ in range(chunks)]):
+                    chunks *= 2
+                    continue
+                raise GeoJSONStreamError(f"Invalid JSON: {str(e)}")
+            
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._read():
+                continue
+            
+            self._pos = end
+            return value
+    
+    def features(self):
+        """
+        Yield the members of the top-level 'features' array.
+        
+        Yields:
+            GeoJSON feature dictionaries
+        """
+        self._expect('{')
+        
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise GeoJSONStreamError("Invalid JSON: object keys must be strings")
+            self._expect(':')
+            
+            if key == 'features':
+                if self._peek() != '[':
+                    raise GeoJSONStreamError("'features' must be an array")
+                self.saw_features = True
+                yield from self._array_items()
+            else:
+                self.header[key] = self._value()
+                if key == 'type' and self.header[key] not in ('FeatureCollection', 'Feature'):
+                    raise GeoJSONStreamError(f"Unsupported GeoJSON type: {self.header[key]}")
+            
+            separator = self._peek()
+            self._pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise GeoJSONStreamError(
+                    f"Invalid JSON: expected ',' or '}}' but found '{separator or 'end of file'}'"
+                )
+    
+    def _array_items(self):
+        """Yield the members of the array starting at the current position."""
+        self._expect('[')
+        
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        
+        while True:
+            yield self._value()
+            
+            separator = self._peek()
+            self._pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise GeoJSONStreamError(
+                    f"Invalid JSON: expected ',' or ']' but found '{separator or 'end of file'}'"
+                )
+
+
+class GeoJSONImporter(BaseImporter):
+    """
+    Import GeoJSON data and create MapFeature objects.
+    Supports both FeatureCollection and individual Feature objects.
+    """
     
     def validate_geojson(self, geojson_data: Dict) -> bool:
         """
@@ -158,9 +425,7 @@ class GeoJSONImporter:
             Tuple of (count_imported, errors, warnings)
         """
         # Reset state
-        self.errors = []
-        self.warnings = []
-        self.imported_features = []
+        self._reset()
         
         # Validate
         if not self.validate_geojson(geojson_data):
@@ -173,14 +438,107 @@ class GeoJSONImporter:
             self.warnings.append("No features found in GeoJSON")
             return 0, self.errors, self.warnings
         
+        self._import_features(features)
+        
+        return self.imported_count, self.errors, self.warnings
+    
+    def import_from_file(self, file_obj, chunk_size: int = 64 * 1024) -> Tuple[int, List[str], List[str]]:
+        """
+        Import GeoJSON from a file object without loading the whole document.
+        
+        Features are parsed one at a time from the 'features' array and fed
+        to the importer, so memory use does not grow with the file size.
+        If the document turns out to be malformed part way through, a
+        batched import is rolled back.
+        
+        Args:
+            file_obj: Binary file-like object containing UTF-8 GeoJSON
+            chunk_size: Number of bytes read from the file at a time
+            
+        Returns:
+            Tuple of (count_imported, errors, warnings)
+        """
+        # Reset state
+        self._reset()
+        
+        stream = GeoJSONStream(file_obj, chunk_size)
+        
+        try:
+            count = self._import_features(stream.features())
+            
+            header = stream.header
+            geojson_type = header.get('type')
+            
+            if geojson_type == 'Feature':
+                count = self._import_features([header])
+            elif geojson_type != 'FeatureCollection':
+                raise GeoJSONStreamError(f"Unsupported GeoJSON type: {geojson_type}")
+            elif not stream.saw_features:
+                raise GeoJSONStreamError("FeatureCollection must have 'features' array")
+        except (GeoJSONStreamError, UnicodeDecodeError) as e:
+            if isinstance(e, UnicodeDecodeError):
+                self.errors.append("File must be UTF-8 encoded")
+            else:
+                self.errors.append(str(e))
+            if self.batch_size and self.atomic:
+                # The batched transaction was rolled back
+                self.imported_count = 0
+                self.imported_features = []
+                self.map.refresh_from_db(fields=['feature_count'])
+            return self.imported_count, self.errors, self.warnings
+        
+        if not count:
+            self.warnings.append("No features found in GeoJSON")
+        
+        return self.imported_count, self.errors, self.warnings
+    
+    def _import_features(self, features) -> int:
+        """
+        Import an iterable of GeoJSON features, batched or one at a time.
+        
+        Args:
+            features: Iterable of GeoJSON feature dictionaries
+            
+        Returns:
+            Number of features read from the iterable
+        """
+        if self.batch_size:
+            return self._import_batched(features)
+        
         # Import each feature
+        count = 0
         for idx, feature in enumerate(features):
+            count += 1
             try:
                 self._import_feature(feature, idx)
             except Exception as e:
                 self.errors.append(f"Feature {idx}: {str(e)}")
+            self._tick()
+        return count
+    
+    def _import_batched(self, features) -> int:
+        """
+        Validate features in memory and write them in bulk, in one transaction.
         
-        return len(self.imported_features), self.errors, self.warnings
+        Args:
+            features: Iterable of GeoJSON feature dictionaries
+            
+        Returns:
+            Number of features read from the iterable
+        """
+        count = 0
+        with self._transaction():
+            for idx, feature in enumerate(features):
+                count += 1
+                try:
+                    map_feature = self._build_feature(feature, idx)
+                except Exception as e:
+                    self.errors.append(f"Feature {idx}: {str(e)}")
+                else:
+                    self._queue_feature(map_feature, f"Feature {idx}")
+                self._tick()
+            self._flush()
+        return count
     
     def _import_feature(self, feature: Dict, index: int):
         """
@@ -190,6 +548,27 @@ class GeoJSONImporter:
             feature: GeoJSON feature dictionary
             index: Feature index for error reporting
         """
+        map_feature = self._build_feature(feature, index)
+        
+        # Save using Django's base save method to bypass full_clean validation
+        # The geometry has already been validated during conversion
+        map_feature.update_bounds()
+        map_feature.update_simplified()
+        super(MapFeature, map_feature).save()
+        
+        self._record_imported([map_feature])
+    
+    def _build_feature(self, feature: Dict, index: int) -> MapFeature:
+        """
+        Validate a GeoJSON feature and build an unsaved MapFeature.
+        
+        Args:
+            feature: GeoJSON feature dictionary
+            index: Feature index for default titles
+            
+        Returns:
+            Unsaved MapFeature instance
+        """
         if not isinstance(feature, dict):
             raise ValueError(f"Feature must be a dictionary")
         
@@ -213,7 +592,7 @@ class GeoJSONImporter:
         category = properties.get('category', '')
         
         # Create MapFeature
-        map_feature = MapFeature(
+        return MapFeature(
             map=self.map,
             feature_type=feature_type,
             geometry=geom_obj,
@@ -221,31 +600,84 @@ class GeoJSONImporter:
             description=description,
             category=category[:100]  # Truncate to max length
         )
-        
-        # Save using Django's base save method to bypass full_clean validation
-        # The geometry has already been validated during conversion
-        super(MapFeature, map_feature).save()
-        
-        self.imported_features.append(map_feature)
 
 
-class KMLImporter:
+class FlatGeobufImporter(GeoJSONImporter):
     """
-    Import KML/KMZ data and create MapFeature objects.
-    Uses fastkml library for parsing.
+    Import FlatGeobuf files and create MapFeature objects.
+    Records are read one at a time with Fiona and imported as GeoJSON
+    features, so titles and categories follow the GeoJSON importer.
     """
     
-    def __init__(self, map_instance):
+    def import_from_file(self, file_obj) -> Tuple[int, List[str], List[str]]:
         """
-        Initialize importer with a Map instance.
+        Import FlatGeobuf from a file object.
+        
+        GDAL needs a file on disk, so uploads that are not already stored
+        in a temporary file are copied to one first.
         
         Args:
-            map_instance: Map object to attach imported features to
+            file_obj: Binary file-like object containing FlatGeobuf data
+            
+        Returns:
+            Tuple of (count_imported, errors, warnings)
         """
-        self.map = map_instance
-        self.errors = []
-        self.warnings = []
-        self.imported_features = []
+        # Reset state
+        self._reset()
+        
+        try:
+            import fiona
+            from fiona.model import to_dict
+        except ImportError:
+            self.errors.append("Fiona library not installed. Install with: pip install Fiona")
+            return 0, self.errors, self.warnings
+        
+        def features(collection):
+            for record in collection:
+                yield {
+                    'type': 'Feature',
+                    'geometry': to_dict(record['geometry']) if record['geometry'] else None,
+                    'properties': dict(record['properties']),
+                }
+        
+        try:
+            with ExitStack() as stack:
+                if hasattr(file_obj, 'temporary_file_path'):
+                    path = file_obj.temporary_file_path()
+                else:
+                    temp = stack.enter_context(tempfile.NamedTemporaryFile(suffix='.fgb'))
+                    file_obj.seek(0)
+                    shutil.copyfileobj(file_obj, temp)
+                    temp.flush()
+                    path = temp.name
+                
+                collection = stack.enter_context(fiona.open(path, driver='FlatGeobuf'))
+                count = self._import_features(features(collection))
+        except fiona.errors.FionaError as e:
+            self.errors.append(f"Failed to read FlatGeobuf: {str(e)}")
+            if self.batch_size and self.atomic:
+                # The batched transaction was rolled back
+                self.imported_count = 0
+                self.imported_features = []
+                self.map.refresh_from_db(fields=['feature_count'])
+            return self.imported_count, self.errors, self.warnings
+        
+        if not count:
+            self.warnings.append("No features found in FlatGeobuf file")
+        
+        return self.imported_count, self.errors, self.warnings
+
+
+# Namespace of KML 2.2 documents
+KML_NAMESPACE = 'http://www.opengis.net/kml/2.2'
+
+
+class KMLImporter(BaseImporter):
+    """
+    Import KML/KMZ data and create MapFeature objects.
+    Placemarks are parsed one at a time with lxml's iterparse, so memory use
+    does not grow with the size of the document.
+    """
     
     def import_from_file(self, file_obj) -> Tuple[int, List[str], List[str]]:
         """
@@ -258,9 +690,7 @@ class KMLImporter:
             Tuple of (count_imported, errors, warnings)
         """
         # Reset state
-        self.errors = []
-        self.warnings = []
-        self.imported_features = []
+        self._reset()
         
         # Check if it's a KMZ (ZIP) file
         try:
@@ -269,7 +699,7 @@ class KMLImporter:
                 return self._import_kmz(file_obj)
             else:
                 file_obj.seek(0)
-                return self._import_kml(file_obj.read())
+                return self._import_kml(file_obj)
         except Exception as e:
             self.errors.append(f"Failed to read file: {str(e)}")
             return 0, self.errors, self.warnings
@@ -293,9 +723,9 @@ class KMLImporter:
                     self.errors.append("No KML file found in KMZ archive")
                     return 0, self.errors, self.warnings
                 
-                # Use the first KML file found
-                kml_content = kmz.read(kml_files[0])
-                return self._import_kml(kml_content)
+                # Stream the first KML file found without extracting it
+                with kmz.open(kml_files[0]) as kml_file:
+                    return self._import_kml(kml_file)
         except zipfile.BadZipFile:
             self.errors.append("Invalid KMZ file format")
             return 0, self.errors, self.warnings
@@ -303,12 +733,16 @@ class KMLImporter:
             self.errors.append(f"Failed to extract KMZ: {str(e)}")
             return 0, self.errors, self.warnings
     
-    def _import_kml(self, kml_content: bytes) -> Tuple[int, List[str], List[str]]:
+    def _import_kml(self, kml_source) -> Tuple[int, List[str], List[str]]:
         """
-        Parse and import KML content using simple XML parsing.
+        Parse and import KML content placemark by placemark.
+        
+        Each Placemark is imported as soon as its end tag is parsed and then
+        cleared, along with the placemarks before it, so the document tree
+        never holds more than one placemark at a time.
         
         Args:
-            kml_content: KML data as bytes
+            kml_source: Binary file-like object, or KML data as bytes
             
         Returns:
             Tuple of (count_imported, errors, warnings)
@@ -319,28 +753,52 @@ class KMLImporter:
             self.errors.append("lxml library not installed. Install with: pip install lxml")
             return 0, self.errors, self.warnings
         
+        if isinstance(kml_source, bytes):
+            kml_source = BytesIO(kml_source)
+        
+        ns = {'kml': KML_NAMESPACE}
+        
         try:
-            # Parse KML XML
-            tree = etree.fromstring(kml_content)
-            
-            # Define KML namespace
-            ns = {'kml': 'http://www.opengis.net/kml/2.2'}
+            placemarks = etree.iterparse(
+                kml_source,
+                events=('end',),
+                tag=f'{{{KML_NAMESPACE}}}Placemark',
+                resolve_entities=False,
+            )
             
-            # Find all Placemarks
-            placemarks = tree.findall('.//kml:Placemark', ns)
-            
-            for placemark in placemarks:
-                try:
-                    self._import_kml_placemark(placemark, ns)
-                except Exception as e:
+            with self._transaction() if self.batch_size else nullcontext():
+                for _, placemark in placemarks:
                     name = placemark.findtext('kml:name', 'unknown', ns)
-                    self.errors.append(f"Failed to import placemark '{name}': {str(e)}")
+                    try:
+                        if self.batch_size:
+                            map_feature = self._build_placemark(placemark, ns)
+                            if map_feature is not None:
+                                # Same checks as a single save, without querying the map
+                                map_feature.full_clean(exclude=['map'])
+                                self._queue_feature(map_feature, f"Placemark '{name}'")
+                        else:
+                            self._import_kml_placemark(placemark, ns)
+                    except Exception as e:
+                        self.errors.append(f"Failed to import placemark '{name}': {str(e)}")
+                    self._tick()
+                    
+                    # Free the parsed placemark and the siblings already handled
+                    placemark.clear()
+                    while placemark.getprevious() is not None:
+                        del placemark.getparent()[0]
+                
+                self._flush()
             
-            return len(self.imported_features), self.errors, self.warnings
+            return self.imported_count, self.errors, self.warnings
             
         except Exception as e:
             self.errors.append(f"Failed to parse KML: {str(e)}")
-            return 0, self.errors, self.warnings
+            if self.batch_size and self.atomic:
+                # The batched transaction was rolled back
+                self.imported_count = 0
+                self.imported_features = []
+                self.map.refresh_from_db(fields=['feature_count'])
+            return self.imported_count, self.errors, self.warnings
     
     def _import_kml_placemark(self, placemark, ns):
         """
@@ -350,6 +808,26 @@ class KMLImporter:
             placemark: lxml Element for Placemark
             ns: Namespace dictionary
         """
+        map_feature = self._build_placemark(placemark, ns)
+        if map_feature is None:
+            return
+        
+        map_feature.full_clean()
+        map_feature.save()
+        
+        self._record_imported([map_feature])
+    
+    def _build_placemark(self, placemark, ns) -> Optional[MapFeature]:
+        """
+        Build an unsaved MapFeature from a KML Placemark.
+        
+        Args:
+            placemark: lxml Element for Placemark
+            ns: Namespace dictionary
+            
+        Returns:
+            Unsaved MapFeature, or None if the placemark has no geometry
+        """
         # Extract name and description
         name = placemark.findtext('kml:name', 'Unnamed', ns)
         description = placemark.findtext('kml:description', '', ns)
@@ -406,7 +884,7 @@ class KMLImporter:
         
         if not feature_type or not geometry_json:
             self.warnings.append(f"Placemark '{name}' has no valid geometry")
-            return
+            return None
         
         # Convert to appropriate format
         if POSTGIS_ENABLED:
@@ -416,7 +894,7 @@ class KMLImporter:
             geom_obj = geometry_json
         
         # Create MapFeature
-        map_feature = MapFeature(
+        return MapFeature(
             map=self.map,
             feature_type=feature_type,
             geometry=geom_obj,
@@ -424,37 +902,43 @@ class KMLImporter:
             description=description[:1000],
             category="imported"
         )
-        
-        map_feature.full_clean()
-        map_feature.save()
-        
-        self.imported_features.append(map_feature)
 
 
-class CoordinateImporter:
+class CoordinateImporter(BaseImporter):
     """
     Import coordinates from CSV and create Point features.
+    
+    In batched mode rows are validated without going through full_clean and
+    written with bulk_create; the point geometries built here are always
+    valid, so only the coordinate ranges and the name need checking.
     """
     
-    def __init__(self, map_instance):
+    def import_from_csv(self, csv_content: str, lat_col: str = 'lat', 
+                       lng_col: str = 'lng', name_col: str = 'name') -> Tuple[int, List[str], List[str]]:
         """
-        Initialize importer with a Map instance.
+        Import coordinates from CSV content.
         
         Args:
-            map_instance: Map object to attach imported features to
+            csv_content: CSV data as string
+            lat_col: Name of latitude column
+            lng_col: Name of longitude column
+            name_col: Name of name/title column
+            
+        Returns:
+            Tuple of (count_imported, errors, warnings)
         """
-        self.map = map_instance
-        self.errors = []
-        self.warnings = []
-        self.imported_features = []
+        # Reset state
+        self._reset()
+        
+        return self._import_csv(StringIO(csv_content), lat_col, lng_col, name_col)
     
-    def import_from_csv(self, csv_content: str, lat_col: str = 'lat', 
-                       lng_col: str = 'lng', name_col: str = 'name') -> Tuple[int, List[str], List[str]]:
+    def import_from_file(self, file_obj, lat_col: str = 'lat',
+                         lng_col: str = 'lng', name_col: str = 'name') -> Tuple[int, List[str], List[str]]:
         """
-        Import coordinates from CSV content.
+        Import coordinates from a CSV file object, reading it row by row.
         
         Args:
-            csv_content: CSV data as string
+            file_obj: Binary file-like object containing UTF-8 CSV data
             lat_col: Name of latitude column
             lng_col: Name of longitude column
             name_col: Name of name/title column
@@ -463,13 +947,39 @@ class CoordinateImporter:
             Tuple of (count_imported, errors, warnings)
         """
         # Reset state
-        self.errors = []
-        self.warnings = []
-        self.imported_features = []
+        self._reset()
+        
+        text = TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+        try:
+            return self._import_csv(text, lat_col, lng_col, name_col)
+        except UnicodeDecodeError:
+            self.errors.append("File must be UTF-8 encoded")
+            if self.batch_size and self.atomic:
+                # The batched transaction was rolled back
+                self.imported_count = 0
+                self.imported_features = []
+                self.map.refresh_from_db(fields=['feature_count'])
+            return self.imported_count, self.errors, self.warnings
+        finally:
+            # Leave the caller's file open
+            text.detach()
+    
+    def _import_csv(self, csv_file, lat_col: str, lng_col: str,
+                    name_col: str) -> Tuple[int, List[str], List[str]]:
+        """
+        Validate the CSV headers and import every row.
         
+        Args:
+            csv_file: Text file-like object containing CSV data
+            lat_col: Name of latitude column
+            lng_col: Name of longitude column
+            name_col: Name of name/title column
+            
+        Returns:
+            Tuple of (count_imported, errors, warnings)
+        """
         try:
             # Parse CSV
-            csv_file = StringIO(csv_content)
             reader = csv.DictReader(csv_file)
             
             # Validate headers
@@ -485,18 +995,88 @@ class CoordinateImporter:
                 self.errors.append(f"Longitude column '{lng_col}' not found. Available: {', '.join(reader.fieldnames)}")
                 return 0, self.errors, self.warnings
             
+            if self.batch_size:
+                self._import_rows_batched(reader, lat_col, lng_col, name_col)
+                return self.imported_count, self.errors, self.warnings
+            
             # Import each row
             for idx, row in enumerate(reader, start=1):
                 try:
                     self._import_coordinate(row, idx, lat_col, lng_col, name_col)
                 except Exception as e:
                     self.errors.append(f"Row {idx}: {str(e)}")
+                self._tick()
             
-            return len(self.imported_features), self.errors, self.warnings
+            return self.imported_count, self.errors, self.warnings
             
+        except UnicodeDecodeError:
+            raise
         except Exception as e:
             self.errors.append(f"Failed to parse CSV: {str(e)}")
-            return 0, self.errors, self.warnings
+            if self.batch_size and self.atomic:
+                # The batched transaction was rolled back
+                self.imported_count = 0
+                self.imported_features = []
+                self.map.refresh_from_db(fields=['feature_count'])
+            return self.imported_count, self.errors, self.warnings
+    
+    def _import_rows_batched(self, reader, lat_col: str, lng_col: str, name_col: str):
+        """
+        Build features for every CSV row and write them with bulk_create.
+        
+        Args:
+            reader: csv.DictReader positioned after the header row
+            lat_col: Latitude column name
+            lng_col: Longitude column name
+            name_col: Name column name
+        """
+        has_name = name_col in reader.fieldnames
+        map_id = self.map.pk
+        
+        with self._transaction():
+            for idx, row in enumerate(reader, start=1):
+                self._tick()
+                
+                try:
+                    lat = float(row[lat_col])
+                    lng = float(row[lng_col])
+                except (TypeError, ValueError) as e:
+                    self.errors.append(f"Row {idx}: Invalid coordinates: {str(e)}")
+                    continue
+                
+                # Comparisons are False for NaN, so it is rejected here too
+                if not -90 <= lat <= 90:
+                    self.errors.append(f"Row {idx}: Latitude {lat} out of range (-90 to 90)")
+                    continue
+                if not -180 <= lng <= 180:
+                    self.errors.append(f"Row {idx}: Longitude {lng} out of range (-180 to 180)")
+                    continue
+                
+                name = row[name_col] if has_name else f"Point {idx}"
+                if not name or not name.strip():
+                    self.errors.append(f"Row {idx}: Name is empty")
+                    continue
+                
+                if POSTGIS_ENABLED:
+                    geom_obj = Point(lng, lat, srid=4326)
+                else:
+                    geom_obj = json.dumps({'type': 'Point', 'coordinates': [lng, lat]})
+                
+                map_feature = MapFeature(
+                    map_id=map_id,
+                    feature_type='point',
+                    geometry=geom_obj,
+                    title=name[:200],
+                    description=f"Imported from CSV: lat={lat}, lng={lng}",
+                    category="imported",
+                    bbox_min_lng=lng,
+                    bbox_min_lat=lat,
+                    bbox_max_lng=lng,
+                    bbox_max_lat=lat,
+                )
+                self._queue_feature(map_feature, f"Row {idx}")
+            
+            self._flush()
     
     def _import_coordinate(self, row: Dict, index: int, lat_col: str, lng_col: str, name_col: str):
         """
@@ -547,4 +1127,4 @@ class CoordinateImporter:
         map_feature.full_clean()
         map_feature.save()
         
-        self.imported_features.append(map_feature)
+        self._record_imported([map_feature])
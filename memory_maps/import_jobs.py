@@ -0,0 +1,201 @@
+"""
+Background import job runner for memory_maps app.
+Jobs are stored in the ImportJob table and claimed by worker processes
+running the process_import_jobs management command, so no message broker
+is required. Jobs left running by a worker that died are finished by
+reclaim_stale_jobs.
+"""
+
+import logging
+import os
+from datetime import timedelta
+from typing import Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .gis_import import (
+    GeoJSONImporter, KMLImporter, CoordinateImporter, FlatGeobufImporter, DEFAULT_BATCH_SIZE
+)
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Upload extensions mapped to ImportJob.file_format values
+FORMAT_EXTENSIONS = {
+    '.geojson': 'geojson',
+    '.json': 'geojson',
+    '.kml': 'kml',
+    '.kmz': 'kml',
+    '.csv': 'csv',
+    '.fgb': 'flatgeobuf',
+}
+
+# Jobs still running this long after they started are assumed to belong to
+# a worker that died, so it must be longer than the slowest import
+STALE_JOB_TIMEOUT = timedelta(hours=2)
+
+
+def guess_file_format(filename: str) -> Optional[str]:
+    """
+    Infer an import format from a file name.
+
+    Args:
+        filename: Name of the uploaded file
+
+    Returns:
+        ImportJob file_format value, or None if the extension is unknown
+    """
+    ext = os.path.splitext(filename or '')[1].lower()
+    return FORMAT_EXTENSIONS.get(ext)
+
+
+def claim_next_job() -> Optional[ImportJob]:
+    """
+    Mark the oldest pending job as running and return it.
+
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several workers can poll the queue without picking the same job.
+
+    Returns:
+        The claimed ImportJob, or None if the queue is empty
+    """
+    with transaction.atomic():
+        queryset = ImportJob.objects.filter(
+            status=ImportJob.STATUS_PENDING
+        ).order_by('created_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+
+        job = queryset.first()
+        if job is None:
+            return None
+
+        job.status = ImportJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def reclaim_stale_jobs(timeout: timedelta = STALE_JOB_TIMEOUT) -> int:
+    """
+    Finish running jobs whose worker stopped without recording a result.
+
+    Batches already committed by the dead worker are kept, so the job is
+    not run again. It is marked partial or failed, like an import that
+    hit an error, and its uploaded file is deleted.
+
+    Args:
+        timeout: How long after starting a running job is considered abandoned
+
+    Returns:
+        Number of jobs reclaimed
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = ImportJob.objects.filter(
+            status=ImportJob.STATUS_RUNNING, started_at__lt=now - timeout
+        ).order_by('started_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+
+        jobs = list(queryset)
+        for job in jobs:
+            logger.warning("Import job %s did not finish and was reclaimed", job.pk)
+            job.errors = list(job.errors or []) + [
+                "The import stopped before finishing. Features imported before it stopped were kept."
+            ]
+            job.status = ImportJob.STATUS_PARTIAL if job.imported_count else ImportJob.STATUS_FAILED
+            job.finished_at = now
+            _delete_job_file(job)
+            job.save(update_fields=['errors', 'status', 'finished_at', 'file'])
+    return len(jobs)
+
+
+def _delete_job_file(job):
+    """Delete a job's uploaded file, which is only needed while the job runs."""
+    if job.file:
+        job.file.delete(save=False)
+        job.file = ''
+
+
+def _report_progress(job):
+    """Return an importer progress callback that updates the job row."""
+    def callback(importer):
+        ImportJob.objects.filter(pk=job.pk).update(
+            processed_count=importer.processed,
+            imported_count=importer.imported_count,
+        )
+    return callback
+
+
+def _run_importer(job, importer):
+    """
+    Run the importer matching the job's file format.
+
+    Returns:
+        Tuple of (count, errors, warnings) from the importer
+    """
+    options = job.options or {}
+    with job.file.open('rb') as file_obj:
+        if job.file_format in ('geojson', 'kml', 'flatgeobuf'):
+            return importer.import_from_file(file_obj)
+
+        return importer.import_from_file(
+            file_obj,
+            options.get('lat_col', 'lat'),
+            options.get('lng_col', 'lng'),
+            options.get('name_col', 'name'),
+        )
+
+
+def run_import_job(job: ImportJob) -> ImportJob:
+    """
+    Run a claimed import job and record its outcome.
+
+    Progress counts are written to the job row while the import runs.
+    Batches are committed one at a time so features already
+    imported stay visible to clients polling the job.
+
+    Args:
+        job: ImportJob in the running state
+
+    Returns:
+        The updated ImportJob
+    """
+    importers = {
+        'geojson': lambda: GeoJSONImporter(job.map, batch_size=DEFAULT_BATCH_SIZE),
+        'kml': lambda: KMLImporter(job.map, batch_size=DEFAULT_BATCH_SIZE),
+        'csv': lambda: CoordinateImporter(job.map, batch_size=DEFAULT_BATCH_SIZE),
+        'flatgeobuf': lambda: FlatGeobufImporter(job.map, batch_size=DEFAULT_BATCH_SIZE),
+    }
+
+    importer = importers[job.file_format]()
+    importer.progress_callback = _report_progress(job)
+    importer.atomic = False
+
+    try:
+        count, errors, warnings = _run_importer(job, importer)
+    except Exception as e:
+        logger.exception("Import job %s failed", job.pk)
+        count, errors, warnings = importer.imported_count, [str(e)], importer.warnings
+
+    job.processed_count = importer.processed
+    job.imported_count = count
+    job.errors = errors
+    job.warnings = warnings
+    job.finished_at = timezone.now()
+    if not errors:
+        job.status = ImportJob.STATUS_SUCCEEDED
+    elif count:
+        job.status = ImportJob.STATUS_PARTIAL
+    else:
+        job.status = ImportJob.STATUS_FAILED
+
+    _delete_job_file(job)
+
+    job.save(update_fields=[
+        'processed_count', 'imported_count', 'errors', 'warnings',
+        'status', 'finished_at', 'file',
+    ])
+    return job
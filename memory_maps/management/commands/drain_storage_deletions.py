@@ -0,0 +1,49 @@
+"""
+Management command to delete the stored files of deleted photos.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from memory_maps.deletions import DELETE_BATCH_SIZE, drain_storage_deletions
+
+
+class Command(BaseCommand):
+    """Worker loop that drains the StorageDeletion queue in batches."""
+    
+    help = "Delete queued photo files from storage, using batched S3 DeleteObjects requests"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Drain the files currently queued and exit",
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=10.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DELETE_BATCH_SIZE,
+            help=f"Number of files deleted per request (default and maximum: {DELETE_BATCH_SIZE})",
+        )
+    
+    def handle(self, *args, **options):
+        while True:
+            deleted, kept, failed = drain_storage_deletions(options['batch_size'])
+            
+            if not (deleted or kept or failed):
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+            
+            self.stdout.write(f"Deleted {deleted} file(s), kept {kept} still in use, {failed} failed")
+            if failed and options['once'] and not (deleted or kept):
+                # Only failing rows are left; they are retried on a later run
+                return
@@ -0,0 +1,110 @@
+"""
+Management command to read photo locations from their EXIF data.
+"""
+
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from memory_maps.caching import invalidate_map
+from memory_maps.counters import adjust_counter
+from memory_maps.geotag import DEFAULT_TOLERANCE_M, place_photos, read_photo_gps
+from memory_maps.models import MapFeature, Photo
+
+
+class Command(BaseCommand):
+    """Fill Photo.latitude and longitude for photos whose EXIF data has not been read."""
+
+    help = "Read GPS locations from photo EXIF headers, optionally attaching photos to point features"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--map',
+            type=int,
+            dest='map_id',
+            help="Only process photos of this map",
+        )
+        parser.add_argument(
+            '--place',
+            action='store_true',
+            help="Attach geotagged photos taken away from their feature to a point feature at their location",
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=DEFAULT_TOLERANCE_M,
+            help=f"Distance in metres for matching point features (default: {DEFAULT_TOLERANCE_M:g})",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help="Number of photos updated per query (default: 200)",
+        )
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.filter(geotag_checked=False)
+        if options['map_id'] is not None:
+            photos = photos.filter(feature__map_id=options['map_id'])
+        photos = photos.select_related('feature').only(
+            'id', 'image', 'feature_id', 'latitude', 'longitude', 'geotag_checked', 'updated_at',
+            'feature__map_id', 'feature__bbox_min_lng', 'feature__bbox_min_lat',
+            'feature__bbox_max_lng', 'feature__bbox_max_lat'
+        ).order_by('id')
+
+        # Only the header of each file is read, and photos are handled in
+        # batches, so memory use does not grow with the number of photos
+        checked = located = moved = 0
+        batch = []
+        for photo in photos.iterator(chunk_size=options['batch_size']):
+            try:
+                location = read_photo_gps(photo)
+            except Exception as e:
+                self.stderr.write(f"Photo {photo.pk}: {str(e)}")
+                location = None
+            photo.latitude, photo.longitude = location or (None, None)
+            photo.geotag_checked = True
+            located += location is not None
+            batch.append(photo)
+            if len(batch) >= options['batch_size']:
+                checked, moved = self.save_batch(batch, options, checked, moved)
+                batch = []
+        if batch:
+            checked, moved = self.save_batch(batch, options, checked, moved)
+
+        message = f"Checked {checked} photo(s), {located} with a location"
+        if options['place']:
+            message += f", {moved} attached to a point feature"
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def save_batch(self, batch, options, checked, moved):
+        """Write a batch of photos, placing them first when requested."""
+        # bulk_update does not apply auto_now
+        fields = ['latitude', 'longitude', 'geotag_checked', 'updated_at']
+        now = timezone.now()
+        for photo in batch:
+            photo.updated_at = now
+        with transaction.atomic():
+            placed = []
+            if options['place']:
+                old_features = {photo.pk: photo.feature for photo in batch}
+                placed = place_photos(batch, options['tolerance'])
+                fields.append('feature')
+            Photo.objects.bulk_update(batch, fields)
+
+            # Bulk writes skip the signals, so maintain counters and caches here
+            changes = Counter()
+            map_ids = set()
+            for photo in placed:
+                old_feature = old_features[photo.pk]
+                changes[old_feature.pk] -= 1
+                changes[photo.feature_id] += 1
+                map_ids.update((old_feature.map_id, photo.feature.map_id))
+            for feature_id, delta in changes.items():
+                adjust_counter(MapFeature, feature_id, 'photo_count', delta)
+
+        for map_id in map_ids:
+            invalidate_map(map_id)
+        return checked + len(batch), moved + len(placed)
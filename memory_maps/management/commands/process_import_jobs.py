@@ -0,0 +1,58 @@
+"""
+Management command to run queued import jobs.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from memory_maps.import_jobs import STALE_JOB_TIMEOUT, claim_next_job, reclaim_stale_jobs, run_import_job
+
+
+class Command(BaseCommand):
+    """Worker loop that claims and runs pending ImportJob rows."""
+    
+    help = "Process queued GeoJSON, KML and CSV import jobs"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Run the jobs currently queued and exit",
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty",
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=STALE_JOB_TIMEOUT.total_seconds() / 60,
+            help="Minutes after which a running job is assumed to belong to a dead worker "
+                 f"(default: {STALE_JOB_TIMEOUT.total_seconds() / 60:g})",
+        )
+    
+    def handle(self, *args, **options):
+        timeout = timedelta(minutes=options['timeout'])
+        while True:
+            reclaimed = reclaim_stale_jobs(timeout)
+            if reclaimed:
+                self.stdout.write(f"Reclaimed {reclaimed} import job(s) left running by a stopped worker")
+            
+            job = claim_next_job()
+            
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+            
+            self.stdout.write(f"Running import job {job.pk} ({job.file_format})")
+            job = run_import_job(job)
+            self.stdout.write(
+                f"Import job {job.pk} {job.status}: {job.imported_count} imported, "
+                f"{len(job.errors)} error(s)"
+            )
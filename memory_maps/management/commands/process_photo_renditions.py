@@ -0,0 +1,54 @@
+"""
+Management command to generate photo thumbnails and renditions.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from memory_maps.renditions import STALE_CLAIM_TIMEOUT, claim_pending_photo, process_photo, reclaim_stale_photos
+
+
+class Command(BaseCommand):
+    """Worker loop that generates renditions for newly uploaded photos."""
+    
+    help = "Generate thumbnail, medium and WebP/AVIF renditions of uploaded photos"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Process the photos currently pending and exit",
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when no photo is pending",
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=STALE_CLAIM_TIMEOUT.total_seconds() / 60,
+            help="Minutes after which a photo still processing is queued again "
+                 f"(default: {STALE_CLAIM_TIMEOUT.total_seconds() / 60:g})",
+        )
+    
+    def handle(self, *args, **options):
+        timeout = timedelta(minutes=options['timeout'])
+        while True:
+            reclaimed = reclaim_stale_photos(timeout)
+            if reclaimed:
+                self.stdout.write(f"Queued {reclaimed} photo(s) left processing by a stopped worker again")
+            
+            photo = claim_pending_photo()
+            
+            if photo is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+            
+            photo = process_photo(photo)
+            self.stdout.write(f"Photo {photo.pk}: renditions {photo.rendition_status}")
@@ -0,0 +1,51 @@
+"""
+Management command to recompute denormalized counters.
+"""
+
+from django.core.management.base import BaseCommand
+
+from memory_maps.caching import invalidate_map
+from memory_maps.counters import find_drift, repair_counters
+from memory_maps.models import Map, MapFeature
+
+
+class Command(BaseCommand):
+    """Find and repair drift in feature, story and photo counters."""
+    
+    help = "Recompute Map.feature_count, MapFeature.story_count and MapFeature.photo_count"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Report drifted counters without fixing them",
+        )
+    
+    def handle(self, *args, **options):
+        drift = find_drift()
+        
+        for model, pk, field, stored, actual in drift:
+            self.stdout.write(
+                f"{model.__name__} {pk}: {field} is {stored}, should be {actual}"
+            )
+        
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All counters are correct"))
+            return
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} counter(s) out of date"))
+            return
+        
+        updated = repair_counters()
+        
+        # Counters are shown in cached responses of the affected maps
+        map_ids = {pk for model, pk, *_ in drift if model is Map}
+        feature_ids = [pk for model, pk, *_ in drift if model is MapFeature]
+        map_ids.update(
+            MapFeature.objects.filter(pk__in=feature_ids).values_list('map_id', flat=True)
+        )
+        for map_id in map_ids:
+            invalidate_map(map_id)
+        
+        self.stdout.write(self.style.SUCCESS(f"Repaired {updated} counter(s)"))
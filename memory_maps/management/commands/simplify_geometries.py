@@ -0,0 +1,58 @@
+"""
+Management command to fill the simplified geometry columns.
+"""
+
+from django.core.management.base import BaseCommand
+
+from memory_maps.caching import invalidate_map
+from memory_maps.models import MapFeature
+from memory_maps.simplify import GEOMETRY_LEVELS, simplified_levels
+
+
+class Command(BaseCommand):
+    """Recompute MapFeature.geometry_low and geometry_mid for existing rows."""
+    
+    help = "Fill the simplified geometry columns used at low zoom levels"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--map',
+            type=int,
+            dest='map_id',
+            help="Only process features of this map",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help="Number of features updated per query (default: 500)",
+        )
+    
+    def handle(self, *args, **options):
+        columns = [column for column, _ in GEOMETRY_LEVELS]
+        
+        # Points are never simplified, so their columns stay null
+        features = MapFeature.objects.exclude(feature_type='point')
+        if options['map_id'] is not None:
+            features = features.filter(map_id=options['map_id'])
+        features = features.only('id', 'map_id', 'feature_type', 'geometry', *columns).order_by('id')
+        
+        batch = []
+        map_ids = set()
+        updated = 0
+        for feature in features.iterator(chunk_size=options['batch_size']):
+            for column, value in simplified_levels(feature.feature_type, feature.geometry).items():
+                setattr(feature, column, value)
+            batch.append(feature)
+            map_ids.add(feature.map_id)
+            if len(batch) >= options['batch_size']:
+                updated += MapFeature.objects.bulk_update(batch, columns)
+                batch = []
+        if batch:
+            updated += MapFeature.objects.bulk_update(batch, columns)
+        
+        # Responses selected by zoom level may now differ
+        for map_id in map_ids:
+            invalidate_map(map_id)
+        
+        self.stdout.write(self.style.SUCCESS(f"Simplified {updated} feature(s)"))
@@ -0,0 +1,62 @@
+# Generated by Django 4.2 on 2026-10-16 00:00
+
+from django.db import migrations, models
+
+
+def populate_bounds(apps, schema_editor):
+    """Fill the bbox columns for existing features."""
+    from memory_maps.spatial import geometry_bounds
+
+    MapFeature = apps.get_model('memory_maps', 'MapFeature')
+    batch = []
+    for feature in MapFeature.objects.only('id', 'geometry').iterator(chunk_size=2000):
+        bounds = geometry_bounds(feature.geometry)
+        if bounds is None:
+            continue
+        (feature.bbox_min_lng, feature.bbox_min_lat,
+         feature.bbox_max_lng, feature.bbox_max_lat) = bounds
+        batch.append(feature)
+        if len(batch) >= 2000:
+            MapFeature.objects.bulk_update(
+                batch, ['bbox_min_lng', 'bbox_min_lat', 'bbox_max_lng', 'bbox_max_lat']
+            )
+            batch = []
+    if batch:
+        MapFeature.objects.bulk_update(
+            batch, ['bbox_min_lng', 'bbox_min_lat', 'bbox_max_lng', 'bbox_max_lat']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0004_convert_to_postgis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mapfeature',
+            name='bbox_min_lng',
+            field=models.FloatField(blank=True, editable=False, help_text='Westernmost longitude of the geometry', null=True),
+        ),
+        migrations.AddField(
+            model_name='mapfeature',
+            name='bbox_min_lat',
+            field=models.FloatField(blank=True, editable=False, help_text='Southernmost latitude of the geometry', null=True),
+        ),
+        migrations.AddField(
+            model_name='mapfeature',
+            name='bbox_max_lng',
+            field=models.FloatField(blank=True, editable=False, help_text='Easternmost longitude of the geometry', null=True),
+        ),
+        migrations.AddField(
+            model_name='mapfeature',
+            name='bbox_max_lat',
+            field=models.FloatField(blank=True, editable=False, help_text='Northernmost latitude of the geometry', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='mapfeature',
+            index=models.Index(fields=['map', 'bbox_min_lng', 'bbox_max_lng', 'bbox_min_lat', 'bbox_max_lat'], name='memory_maps_map_id_827a5e_idx'),
+        ),
+        migrations.RunPython(populate_bounds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-16 00:00
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(child_model, fk):
+    counts = (
+        child_model.objects
+        .filter(**{fk: OuterRef('pk')})
+        .order_by()
+        .values(fk)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def populate_counters(apps, schema_editor):
+    """Fill the counter columns from the existing rows."""
+    Map = apps.get_model('memory_maps', 'Map')
+    MapFeature = apps.get_model('memory_maps', 'MapFeature')
+    Story = apps.get_model('memory_maps', 'Story')
+    Photo = apps.get_model('memory_maps', 'Photo')
+
+    Map.objects.update(feature_count=_count(MapFeature, 'map'))
+    MapFeature.objects.update(
+        story_count=_count(Story, 'feature'),
+        photo_count=_count(Photo, 'feature'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0005_mapfeature_bbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='map',
+            name='feature_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of features in this map'),
+        ),
+        migrations.AddField(
+            model_name='mapfeature',
+            name='story_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of stories attached to this feature'),
+        ),
+        migrations.AddField(
+            model_name='mapfeature',
+            name='photo_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of photos attached to this feature'),
+        ),
+        migrations.AddIndex(
+            model_name='map',
+            index=models.Index(fields=['is_public', '-feature_count'], name='memory_maps_is_publ_36a545_idx'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+import django.db.models.deletion
+import memory_maps.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('memory_maps', '0006_counter_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_format', models.CharField(choices=[('geojson', 'GeoJSON'), ('kml', 'KML/KMZ'), ('csv', 'CSV Coordinates')], help_text='Format of the uploaded file', max_length=10)),
+                ('file', models.FileField(help_text='Uploaded file, removed once the job finishes', max_length=255, upload_to=memory_maps.models.import_upload_path)),
+                ('options', models.JSONField(blank=True, default=dict, help_text='Importer options, e.g. CSV column names')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('partial', 'Partially succeeded'), ('failed', 'Failed')], default='pending', help_text='Current state of the job', max_length=10)),
+                ('processed_count', models.PositiveIntegerField(default=0, help_text='Number of features read so far')),
+                ('imported_count', models.PositiveIntegerField(default=0, help_text='Number of features created so far')),
+                ('errors', models.JSONField(blank=True, default=list, help_text='Error messages reported by the importer')),
+                ('warnings', models.JSONField(blank=True, default=list, help_text='Warning messages reported by the importer')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When this job was queued')),
+                ('started_at', models.DateTimeField(blank=True, help_text='When a worker started this job', null=True)),
+                ('finished_at', models.DateTimeField(blank=True, help_text='When this job finished', null=True)),
+                ('created_by', models.ForeignKey(help_text='User who queued this import', on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+                ('map', models.ForeignKey(help_text='The map features are imported into', on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='memory_maps.map')),
+            ],
+            options={
+                'verbose_name': 'Import Job',
+                'verbose_name_plural': 'Import Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='memory_maps_status_0feea9_idx'), models.Index(fields=['created_by', '-created_at'], name='memory_maps_created_4db720_idx')],
+            },
+        ),
+    ]
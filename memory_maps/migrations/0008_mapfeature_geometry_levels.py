@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.contrib.gis.db import models as gis_models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0007_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mapfeature',
+            name='geometry_low',
+            field=gis_models.GeometryField(blank=True, editable=False, help_text='Geometry simplified for zoom levels 0-6', null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='mapfeature',
+            name='geometry_mid',
+            field=gis_models.GeometryField(blank=True, editable=False, help_text='Geometry simplified for zoom levels 7-11', null=True, spatial_index=False, srid=4326),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0008_mapfeature_geometry_levels'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='file_format',
+            field=models.CharField(choices=[('geojson', 'GeoJSON'), ('kml', 'KML/KMZ'), ('csv', 'CSV Coordinates'), ('flatgeobuf', 'FlatGeobuf')], help_text='Format of the uploaded file', max_length=10),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0009_importjob_flatgeobuf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='rendition_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', editable=False, help_text='Progress of thumbnail and rendition generation', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Storage names of the generated renditions, by rendition name'),
+        ),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['rendition_status', 'uploaded_at'], name='memory_maps_renditi_41f56f_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0010_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, help_text='Latitude where the photo was taken, from its EXIF data', null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, help_text='Longitude where the photo was taken, from its EXIF data', null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='geotag_checked',
+            field=models.BooleanField(default=False, editable=False, help_text="Whether the photo's EXIF data has been read for a location"),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0011_photo_geotag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the image file', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['uploaded_by', 'content_hash'], name='memory_maps_uploade_b17b31_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0012_photo_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name of the file to delete', max_length=255)),
+                ('image', models.CharField(help_text='Photo image the file belongs to; the file is kept while a photo still uses that image', max_length=255)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of failed delete attempts')),
+                ('last_error', models.TextField(blank=True, help_text='Error from the last failed attempt')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='When the file was queued for deletion')),
+            ],
+            options={
+                'verbose_name': 'Storage Deletion',
+                'verbose_name_plural': 'Storage Deletions',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['attempts', 'id'], name='memory_maps_attempt_0f9d25_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['image'], name='memory_maps_image_e0177a_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-17 00:00
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def populate_updated_at(apps, schema_editor):
+    """Start existing photos from their upload time."""
+    Photo = apps.get_model('memory_maps', 'Photo')
+    Photo.objects.update(updated_at=F('uploaded_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory_maps', '0013_storagedeletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='When this photo was last updated'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['feature', '-updated_at'], name='memory_maps_feature_5fed9e_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 """
 Django models for memory_maps app.
-Defines Map, MapFeature, Story, and Photo models with PostGIS support.
+Defines Map, MapFeature, Story, Photo and ImportJob models with PostGIS support.
 """
 
 from django.db import models
@@ -20,6 +20,21 @@ except (ImportError, ImproperlyConfigured):
     gis_models = None
 
 
+def _exclude_counter_fields(instance, counter_fields, save_kwargs):
+    """
+    Keep save() from writing back stale copies of counter columns.
+    
+    Counters are changed with F() updates that the in-memory instance may not
+    have seen, so updates of existing rows save every field except them.
+    """
+    if instance._state.adding or save_kwargs.get('update_fields') is not None:
+        return
+    save_kwargs['update_fields'] = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in counter_fields
+    ]
+
+
 class Map(models.Model):
     """
     Represents a personal memory map with geographic features.
@@ -59,6 +74,13 @@ class Map(models.Model):
         help_text="Default zoom level (1-20, where 1 is world view)"
     )
     
+    # Denormalized counter, maintained by signal handlers (see counters.py)
+    feature_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of features in this map"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -76,6 +98,7 @@ class Map(models.Model):
         indexes = [
             models.Index(fields=['owner', '-created_at']),
             models.Index(fields=['is_public', '-created_at']),
+            models.Index(fields=['is_public', '-feature_count']),
         ]
     
     def __str__(self):
@@ -107,13 +130,9 @@ class Map(models.Model):
     def save(self, *args, **kwargs):
         """Override save to run full_clean validation."""
         self.full_clean()
+        _exclude_counter_fields(self, ['feature_count'], kwargs)
         super().save(*args, **kwargs)
     
-    @property
-    def feature_count(self):
-        """Return the number of features in this map."""
-        return self.features.count()
-    
     @property
     def is_owned_by(self):
         """Return the owner's username for easy access."""
@@ -160,6 +179,39 @@ class MapFeature(models.Model):
             help_text="GeoJSON geometry representation (fallback for non-PostGIS)"
         )
     
+    # Simplified copies of the geometry for low zoom levels (see simplify.py),
+    # null when simplification would not remove any vertices
+    if POSTGIS_ENABLED:
+        geometry_low = gis_models.GeometryField(
+            null=True,
+            blank=True,
+            editable=False,
+            srid=4326,
+            spatial_index=False,
+            help_text="Geometry simplified for zoom levels 0-6"
+        )
+        geometry_mid = gis_models.GeometryField(
+            null=True,
+            blank=True,
+            editable=False,
+            srid=4326,
+            spatial_index=False,
+            help_text="Geometry simplified for zoom levels 7-11"
+        )
+    else:
+        geometry_low = models.TextField(
+            null=True,
+            blank=True,
+            editable=False,
+            help_text="GeoJSON geometry simplified for zoom levels 0-6"
+        )
+        geometry_mid = models.TextField(
+            null=True,
+            blank=True,
+            editable=False,
+            help_text="GeoJSON geometry simplified for zoom levels 7-11"
+        )
+    
     title = models.CharField(
         max_length=200,
         help_text="Title or name of this feature"
@@ -176,6 +228,45 @@ class MapFeature(models.Model):
         help_text="Category or type classification (e.g., 'permaculture', 'amenity')"
     )
     
+    # Bounding box of the geometry, stored as plain columns so viewport
+    # queries can use a B-tree index on backends without a spatial index
+    bbox_min_lng = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Westernmost longitude of the geometry"
+    )
+    bbox_min_lat = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Southernmost latitude of the geometry"
+    )
+    bbox_max_lng = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Easternmost longitude of the geometry"
+    )
+    bbox_max_lat = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Northernmost latitude of the geometry"
+    )
+    
+    # Denormalized counters, maintained by signal handlers (see counters.py)
+    story_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of stories attached to this feature"
+    )
+    photo_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of photos attached to this feature"
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -194,6 +285,7 @@ class MapFeature(models.Model):
             models.Index(fields=['map', '-created_at']),
             models.Index(fields=['feature_type']),
             models.Index(fields=['category']),
+            models.Index(fields=['map', 'bbox_min_lng', 'bbox_max_lng', 'bbox_min_lat', 'bbox_max_lat']),
         ]
     
     def __str__(self):
@@ -243,19 +335,29 @@ class MapFeature(models.Model):
                 })
     
     def save(self, *args, **kwargs):
-        """Override save to run full_clean validation."""
+        """Override save to run full_clean validation and refresh derived geometry columns."""
         self.full_clean()
+        self.update_bounds()
+        self.update_simplified()
+        _exclude_counter_fields(self, ['story_count', 'photo_count'], kwargs)
         super().save(*args, **kwargs)
     
-    @property
-    def story_count(self):
-        """Return the number of stories attached to this feature."""
-        return self.stories.count()
-    
-    @property
-    def photo_count(self):
-        """Return the number of photos attached to this feature."""
-        return self.photos.count()
+    def update_bounds(self):
+        """Recompute the bounding box columns from the current geometry."""
+        from .spatial import geometry_bounds
+        
+        bounds = geometry_bounds(self.geometry)
+        if bounds is None:
+            bounds = (None, None, None, None)
+        (self.bbox_min_lng, self.bbox_min_lat,
+         self.bbox_max_lng, self.bbox_max_lat) = bounds
+    
+    def update_simplified(self):
+        """Recompute the simplified geometry columns from the current geometry."""
+        from .simplify import simplified_levels
+        
+        for column, value in simplified_levels(self.feature_type, self.geometry).items():
+            setattr(self, column, value)
     
     def get_coordinates(self):
         """
@@ -462,11 +564,70 @@ class Photo(models.Model):
         help_text="User who uploaded this photo"
     )
     
+    # Resized copies generated after upload (see renditions.py)
+    RENDITIONS_PENDING = 'pending'
+    RENDITIONS_PROCESSING = 'processing'
+    RENDITIONS_READY = 'ready'
+    RENDITIONS_FAILED = 'failed'
+    
+    RENDITION_STATUS_CHOICES = [
+        (RENDITIONS_PENDING, 'Pending'),
+        (RENDITIONS_PROCESSING, 'Processing'),
+        (RENDITIONS_READY, 'Ready'),
+        (RENDITIONS_FAILED, 'Failed'),
+    ]
+    
+    rendition_status = models.CharField(
+        max_length=10,
+        choices=RENDITION_STATUS_CHOICES,
+        default=RENDITIONS_PENDING,
+        editable=False,
+        help_text="Progress of thumbnail and rendition generation"
+    )
+    
+    renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Storage names of the generated renditions, by rendition name"
+    )
+    
+    # Identical uploads by the same user share one stored file
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 of the image file"
+    )
+    
+    # Location read from the photo's GPS EXIF data (see geotag.py)
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Latitude where the photo was taken, from its EXIF data"
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Longitude where the photo was taken, from its EXIF data"
+    )
+    geotag_checked = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Whether the photo's EXIF data has been read for a location"
+    )
+    
     # Timestamps
     uploaded_at = models.DateTimeField(
         auto_now_add=True,
         help_text="When this photo was uploaded"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="When this photo was last updated"
+    )
     
     class Meta:
         ordering = ['-uploaded_at']
@@ -474,7 +635,11 @@ class Photo(models.Model):
         verbose_name_plural = 'Photos'
         indexes = [
             models.Index(fields=['feature', '-uploaded_at']),
+            models.Index(fields=['feature', '-updated_at']),
             models.Index(fields=['uploaded_by', '-uploaded_at']),
+            models.Index(fields=['rendition_status', 'uploaded_at']),
+            models.Index(fields=['uploaded_by', 'content_hash']),
+            models.Index(fields=['image']),
         ]
     
     def __str__(self):
@@ -513,16 +678,47 @@ class Photo(models.Model):
             })
     
     def save(self, *args, **kwargs):
-        """Override save to run full_clean validation."""
+        """Override save to run full_clean validation and store new images, sharing identical files."""
         self.full_clean()
+        replaced = None
+        if self.image and not self.image._committed:
+            replaced = self._set_new_image()
         super().save(*args, **kwargs)
+        
+        if replaced is not None:
+            # The old image and its renditions are deleted once no photo uses them
+            from .deletions import queue_photo_files
+            queue_photo_files([replaced])
     
-    def delete(self, *args, **kwargs):
-        """Override delete to remove the image file from storage."""
-        # Delete the file from storage
-        if self.image:
-            self.image.delete(save=False)
-        super().delete(*args, **kwargs)
+    def _set_new_image(self):
+        """
+        Prepare an uploaded image for saving.
+        
+        The file is hashed in chunks. If the uploader already has a photo
+        with the same content, that stored file is reused and nothing is
+        uploaded (see uploads.share_file); otherwise renditions are queued.
+        
+        Returns:
+            Tuple of (image name, renditions) being replaced, or None
+        """
+        from .uploads import file_sha256, share_file
+        
+        replaced = None
+        if self.pk:
+            replaced = Photo.objects.filter(pk=self.pk).values_list('image', 'renditions').first()
+        
+        self.content_hash = file_sha256(self.image)
+        existing = Photo.objects.filter(
+            uploaded_by_id=self.uploaded_by_id, content_hash=self.content_hash
+        ).exclude(pk=self.pk).exclude(image='').order_by('id').first()
+        
+        if existing is not None and existing.image.storage.exists(existing.image.name):
+            # Assigning the name marks the file as already stored
+            share_file(self, existing)
+        else:
+            self.renditions = {}
+            self.rendition_status = self.RENDITIONS_PENDING
+        return replaced
     
     @property
     def file_size_mb(self):
@@ -538,3 +734,180 @@ class Photo(models.Model):
         if self.image:
             return os.path.basename(self.image.name)
         return None
+
+
+def import_upload_path(instance, filename):
+    """
+    Generate upload path for queued import files.
+    Path format: imports/{user_id}/{map_id}/{filename}
+    """
+    from django.utils.text import get_valid_filename
+    
+    return f'imports/{instance.created_by_id}/{instance.map_id}/{get_valid_filename(filename)}'
+
+
+class ImportJob(models.Model):
+    """
+    A GeoJSON, KML/KMZ or CSV import queued to run outside the request.
+    Jobs are picked up by the process_import_jobs management command.
+    """
+    
+    FORMAT_CHOICES = [
+        ('geojson', 'GeoJSON'),
+        ('kml', 'KML/KMZ'),
+        ('csv', 'CSV Coordinates'),
+        ('flatgeobuf', 'FlatGeobuf'),
+    ]
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_PARTIAL = 'partial'
+    STATUS_FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_PARTIAL, 'Partially succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    map = models.ForeignKey(
+        Map,
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        help_text="The map features are imported into"
+    )
+    
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='import_jobs',
+        help_text="User who queued this import"
+    )
+    
+    file_format = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        help_text="Format of the uploaded file"
+    )
+    
+    file = models.FileField(
+        upload_to=import_upload_path,
+        max_length=255,
+        help_text="Uploaded file, removed once the job finishes"
+    )
+    
+    options = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Importer options, e.g. CSV column names"
+    )
+    
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        help_text="Current state of the job"
+    )
+    
+    # Progress
+    processed_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of features read so far"
+    )
+    imported_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of features created so far"
+    )
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Error messages reported by the importer"
+    )
+    warnings = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Warning messages reported by the importer"
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When this job was queued"
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When a worker started this job"
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When this job finished"
+    )
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Import Job'
+        verbose_name_plural = 'Import Jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_by', '-created_at']),
+        ]
+    
+    def __str__(self):
+        """String representation of the import job."""
+        return f"{self.get_file_format_display()} import into {self.map.title} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        """Return True once the job has stopped running."""
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_PARTIAL, self.STATUS_FAILED)
+
+
+class StorageDeletion(models.Model):
+    """
+    A stored file waiting to be deleted, written when a photo or an
+    unfinished import job is deleted.
+    Rows are drained in batches by the drain_storage_deletions management
+    command, so deleting many photos never waits on storage requests.
+    """
+    
+    name = models.CharField(
+        max_length=255,
+        help_text="Storage name of the file to delete"
+    )
+    
+    image = models.CharField(
+        max_length=255,
+        help_text="Photo image the file belongs to; the file is kept while a photo still uses that image"
+    )
+    
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of failed delete attempts"
+    )
+    
+    last_error = models.TextField(
+        blank=True,
+        help_text="Error from the last failed attempt"
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the file was queued for deletion"
+    )
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Storage Deletion'
+        verbose_name_plural = 'Storage Deletions'
+        indexes = [
+            models.Index(fields=['attempts', 'id']),
+        ]
+    
+    def __str__(self):
+        """String representation of the queued deletion."""
+        return self.name
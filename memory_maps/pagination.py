@@ -0,0 +1,60 @@
+"""
+Pagination classes for memory_maps app.
+Listings keep page-number pagination by default and switch to keyset
+(cursor) pagination when a client asks for it.
+"""
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over the view's ordering with an id tie-breaker.
+
+    Each page is fetched with a WHERE on the first ordering field instead
+    of an OFFSET, and no COUNT(*) is run, so deep pages cost the same as
+    the first one when that field leads an index, e.g. (map, -created_at).
+    Rows sharing a timestamp (such as one import batch) are stepped
+    through with a small offset bounded by the size of the group.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        """Use the view's ordering, adding 'id' so the order is total."""
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering.append('id')
+        return tuple(ordering)
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to KeysetPagination on request.
+
+    Clients opt in with ?pagination=cursor and then follow the 'next' and
+    'previous' links, which carry the cursor. Existing clients that walk
+    ?page=N are unaffected.
+    """
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.keyset = None
+
+    def use_cursor(self, request) -> bool:
+        """Return True if the request asked for cursor pagination."""
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
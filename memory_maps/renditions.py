@@ -0,0 +1,248 @@
+"""
+Photo rendition pipeline for memory_maps app.
+Thumbnails and resized WebP/AVIF copies of uploaded photos are generated
+by worker processes running the process_photo_renditions management
+command, and stored next to the original through the photo's storage.
+"""
+
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+from typing import Dict, List, Optional
+
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .caching import invalidate_map
+from .deletions import queue_photo_files
+from .models import Photo
+
+logger = logging.getLogger(__name__)
+
+# Photos still processing this long after being claimed are assumed to
+# belong to a worker that died, and are queued again
+STALE_CLAIM_TIMEOUT = timedelta(minutes=15)
+
+# Renditions generated for each photo: (name, longest side in pixels, format)
+RENDITIONS = [
+    ('thumbnail', 320, 'JPEG'),
+    ('medium', 1280, 'JPEG'),
+    ('medium_webp', 1280, 'WEBP'),
+    ('medium_avif', 1280, 'AVIF'),
+]
+
+# File extensions and encoder options of the rendition formats
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'AVIF': 'avif'}
+FORMAT_OPTIONS = {
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+    'WEBP': {'quality': 80, 'method': 4},
+    'AVIF': {'quality': 60},
+}
+
+
+def supported_renditions() -> List[tuple]:
+    """Return the renditions whose format Pillow can encode."""
+    from PIL import features
+
+    # Pillow's codec names match the file extensions
+    return [rendition for rendition in RENDITIONS if features.check(FORMAT_EXTENSIONS[rendition[2]])]
+
+
+def rendition_name(image_name: str, rendition: str, image_format: str) -> str:
+    """
+    Build the storage name of a rendition, next to the original image.
+
+    e.g. photos/1/2/beach.jpg -> photos/1/2/renditions/beach_thumbnail.jpg
+
+    Args:
+        image_name: Storage name of the original image
+        rendition: Rendition name
+        image_format: Pillow format name of the rendition
+
+    Returns:
+        Storage name
+    """
+    directory, filename = os.path.split(image_name)
+    stem = os.path.splitext(filename)[0]
+    return f'{directory}/renditions/{stem}_{rendition}.{FORMAT_EXTENSIONS[image_format]}'
+
+
+def render(image, size: int, image_format: str) -> bytes:
+    """
+    Encode a copy of an image scaled to fit within a square.
+
+    Args:
+        image: Pillow image, already rotated upright
+        size: Longest side of the rendition in pixels (images are never
+              scaled up)
+        image_format: Pillow format name
+
+    Returns:
+        Encoded image bytes
+    """
+    from PIL import Image
+
+    copy = image.copy()
+    copy.thumbnail((size, size), Image.LANCZOS)
+    if image_format == 'JPEG' and copy.mode != 'RGB':
+        copy = copy.convert('RGB')
+    elif copy.mode not in ('RGB', 'RGBA'):
+        copy = copy.convert('RGBA' if 'A' in copy.getbands() else 'RGB')
+
+    output = BytesIO()
+    copy.save(output, format=image_format, **FORMAT_OPTIONS[image_format])
+    return output.getvalue()
+
+
+def generate_renditions(photo: Photo) -> Dict[str, str]:
+    """
+    Generate and store the renditions of a photo.
+
+    Args:
+        photo: Photo whose image has been saved to storage
+
+    Returns:
+        Dictionary of rendition name to storage name
+    """
+    from PIL import Image, ImageOps
+
+    storage = photo.image.storage
+    with photo.image.open('rb') as image_file:
+        with Image.open(image_file) as image:
+            # Camera photos are often stored sideways with an EXIF rotation
+            image = ImageOps.exif_transpose(image)
+            image.load()
+
+    renditions = {}
+    for name, size, image_format in supported_renditions():
+        path = rendition_name(photo.image.name, name, image_format)
+        if storage.exists(path):
+            storage.delete(path)
+        renditions[name] = storage.save(path, ContentFile(render(image, size, image_format)))
+    return renditions
+
+
+def rendition_urls(photo: Photo) -> Dict[str, str]:
+    """Return the URLs of a photo's renditions, by rendition name."""
+    if photo.rendition_status != Photo.RENDITIONS_READY:
+        return {}
+    storage = photo.image.storage
+    return {name: storage.url(path) for name, path in (photo.renditions or {}).items()}
+
+
+def claim_pending_photo() -> Optional[Photo]:
+    """
+    Mark the oldest photo waiting for renditions as processing and return it.
+
+    Photos sharing a stored image (see uploads.share_file) are rendered
+    once: only the first pending photo of an image can be claimed, and
+    claiming it marks the image's other pending photos as processing too.
+    Rows are locked with SKIP LOCKED where the database supports it, so
+    several workers can run at once.
+
+    Returns:
+        The claimed Photo, or None if no photo is pending
+    """
+    with transaction.atomic():
+        queryset = Photo.objects.filter(
+            rendition_status=Photo.RENDITIONS_PENDING
+        ).exclude(
+            image__in=Photo.objects.filter(rendition_status=Photo.RENDITIONS_PROCESSING).values('image')
+        ).exclude(
+            Exists(Photo.objects.filter(
+                image=OuterRef('image'), rendition_status=Photo.RENDITIONS_PENDING, pk__lt=OuterRef('pk')
+            ))
+        ).order_by('uploaded_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+
+        photo = queryset.select_related('feature').first()
+        if photo is None:
+            return None
+
+        Photo.objects.filter(image=photo.image.name, rendition_status=Photo.RENDITIONS_PENDING).update(
+            rendition_status=Photo.RENDITIONS_PROCESSING, updated_at=timezone.now()
+        )
+        photo.rendition_status = Photo.RENDITIONS_PROCESSING
+    return photo
+
+
+def reclaim_stale_photos(timeout: timedelta = STALE_CLAIM_TIMEOUT) -> int:
+    """
+    Queue photos again whose worker stopped while generating their renditions.
+
+    Claiming a photo sets its updated_at, so photos still processing after
+    the timeout are marked pending for another worker to claim.
+
+    Args:
+        timeout: How long after being claimed a photo is considered abandoned
+
+    Returns:
+        Number of photos queued again
+    """
+    now = timezone.now()
+    return Photo.objects.filter(
+        rendition_status=Photo.RENDITIONS_PROCESSING, updated_at__lt=now - timeout
+    ).update(rendition_status=Photo.RENDITIONS_PENDING, updated_at=now)
+
+
+def process_photo(photo: Photo) -> Photo:
+    """
+    Generate the renditions of a claimed photo and record the outcome.
+
+    The outcome is also recorded on the other unfinished photos sharing
+    its image, and an image already rendered for another photo is not
+    rendered again. Rows are updated with a queryset update rather than
+    save(), which would validate the original image again, so updated_at
+    is set here.
+
+    Args:
+        photo: Photo in the processing state
+
+    Returns:
+        The updated Photo
+    """
+    rendered = Photo.objects.filter(
+        image=photo.image.name, rendition_status=Photo.RENDITIONS_READY
+    ).exclude(pk=photo.pk).values_list('renditions', flat=True).first()
+    if rendered is not None:
+        photo.rendition_status = Photo.RENDITIONS_READY
+        photo.renditions = rendered
+    else:
+        try:
+            renditions = generate_renditions(photo)
+        except Exception:
+            logger.exception("Renditions of photo %s failed", photo.pk)
+            photo.rendition_status = Photo.RENDITIONS_FAILED
+            photo.renditions = {}
+        else:
+            photo.rendition_status = Photo.RENDITIONS_READY
+            photo.renditions = renditions
+
+    fields = {
+        'rendition_status': photo.rendition_status,
+        'renditions': photo.renditions,
+        'updated_at': timezone.now(),
+    }
+    updated = Photo.objects.filter(pk=photo.pk).update(**fields)
+    sharing = Photo.objects.filter(
+        image=photo.image.name,
+        rendition_status__in=[Photo.RENDITIONS_PENDING, Photo.RENDITIONS_PROCESSING],
+    ).exclude(pk=photo.pk)
+    map_ids = set(sharing.values_list('feature__map_id', flat=True))
+    sharing.update(**fields)
+
+    if updated:
+        map_ids.add(photo.feature.map_id)
+    else:
+        # The photo was deleted while its renditions were being generated;
+        # files still used by a photo sharing the image are kept
+        queue_photo_files([(photo.image.name, photo.renditions)])
+
+    # Photo URLs are part of cached feature responses
+    for map_id in map_ids:
+        invalidate_map(map_id)
+    return photo
@@ -5,7 +5,7 @@ Handles serialization of spatial data and file uploads.
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Map, MapFeature, Story, Photo
+from .models import Map, MapFeature, Story, Photo, ImportJob
 
 try:
     from rest_framework_gis.serializers import GeoFeatureModelSerializer
@@ -80,34 +80,127 @@ class PhotoSerializer(serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
     file_size_mb = serializers.FloatField(read_only=True)
     filename = serializers.CharField(read_only=True)
+    renditions = serializers.SerializerMethodField()
     
     class Meta:
         model = Photo
         fields = [
             'id', 'feature', 'image', 'caption',
             'uploaded_by', 'uploaded_at',
-            'file_size_mb', 'filename'
+            'file_size_mb', 'filename',
+            'rendition_status', 'renditions',
+            'latitude', 'longitude'
         ]
-        read_only_fields = ['id', 'uploaded_by', 'uploaded_at', 'file_size_mb', 'filename']
+        read_only_fields = [
+            'id', 'uploaded_by', 'uploaded_at', 'file_size_mb', 'filename',
+            'rendition_status', 'renditions', 'latitude', 'longitude'
+        ]
+    
+    def get_renditions(self, obj):
+        """URLs of the resized copies, empty until they have been generated."""
+        from .renditions import rendition_urls
+        return rendition_urls(obj)
     
     def validate_image(self, value):
         """Validate image file size and type."""
-        # Check file size (max 10MB)
-        if value.size > 10 * 1024 * 1024:
-            raise serializers.ValidationError("Image file size cannot exceed 10MB.")
-        
-        # Check file extension
-        import os
-        valid_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-        ext = os.path.splitext(value.name)[1].lower()
-        if ext not in valid_extensions:
+        return validate_photo_image(value)
+
+
+def validate_photo_image(value):
+    """
+    Validate an uploaded photo's size and extension.
+    Shared by single and batch photo uploads.
+    """
+    # Check file size (max 10MB)
+    if value.size > 10 * 1024 * 1024:
+        raise serializers.ValidationError("Image file size cannot exceed 10MB.")
+    
+    # Check file extension
+    import os
+    valid_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+    ext = os.path.splitext(value.name)[1].lower()
+    if ext not in valid_extensions:
+        raise serializers.ValidationError(
+            f'Invalid file extension "{ext}". Allowed: {", ".join(valid_extensions)}'
+        )
+    
+    return value
+
+
+class PhotoBatchFileSerializer(serializers.Serializer):
+    """One file of a batch photo upload; the feature is checked once for the whole batch."""
+
+    image = serializers.ImageField()
+    caption = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+
+    def validate_image(self, value):
+        """Validate image file size and type."""
+        return validate_photo_image(value)
+
+
+class PhotoUploadURLSerializer(serializers.Serializer):
+    """Request for a presigned direct-to-storage photo upload."""
+
+    feature = serializers.PrimaryKeyRelatedField(queryset=MapFeature.objects.select_related('map'))
+    filename = serializers.CharField(max_length=255)
+
+    def validate_filename(self, value):
+        """Validate the photo extension."""
+        from .uploads import PHOTO_CONTENT_TYPES, photo_content_type
+
+        if photo_content_type(value) is None:
+            import os
+            ext = os.path.splitext(value)[1].lower()
             raise serializers.ValidationError(
-                f'Invalid file extension "{ext}". Allowed: {", ".join(valid_extensions)}'
+                f'Invalid file extension "{ext}". Allowed: {", ".join(PHOTO_CONTENT_TYPES)}'
             )
-        
         return value
 
 
+class PhotoFinalizeSerializer(serializers.Serializer):
+    """Completes a direct upload by creating the Photo for the uploaded object."""
+
+    feature = serializers.PrimaryKeyRelatedField(queryset=MapFeature.objects.select_related('map'))
+    key = serializers.CharField(max_length=100)
+    caption = serializers.CharField(max_length=500, required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        """Check the object was issued to this user and feature, and has been uploaded."""
+        from .uploads import (
+            MAX_PHOTO_SIZE, direct_upload_storage, photo_content_type, upload_prefix, uploaded_object
+        )
+
+        user = self.context['request'].user
+        key = attrs['key']
+        if not key.startswith(upload_prefix(attrs['feature'], user) + '/') or '..' in key:
+            raise serializers.ValidationError({'key': 'This upload key was not issued for this feature.'})
+        if photo_content_type(key) is None:
+            raise serializers.ValidationError({'key': 'Invalid file extension.'})
+        if Photo.objects.filter(image=key).exists():
+            raise serializers.ValidationError({'key': 'This upload has already been finalized.'})
+
+        obj = uploaded_object(direct_upload_storage(), key)
+        if obj is None:
+            raise serializers.ValidationError({'key': 'The photo has not been uploaded.'})
+        if obj.content_length > MAX_PHOTO_SIZE:
+            raise serializers.ValidationError({'key': 'Image file size cannot exceed 10MB.'})
+        if obj.content_type != photo_content_type(key):
+            raise serializers.ValidationError({'key': f'Unexpected content type "{obj.content_type}".'})
+        return attrs
+
+    def create(self, validated_data):
+        """Create the Photo pointing at the uploaded object."""
+        photo = Photo(
+            feature=validated_data['feature'],
+            caption=validated_data['caption'],
+            uploaded_by=self.context['request'].user,
+        )
+        # Assigning the name keeps the file as committed, so nothing is re-uploaded
+        photo.image.name = validated_data['key']
+        photo.save()
+        return photo
+
+
 class StorySerializer(serializers.ModelSerializer):
     """Serializer for Story model."""
     
@@ -137,14 +230,43 @@ class StorySerializer(serializers.ModelSerializer):
         return value.strip()
 
 
-class MapFeatureSerializer(serializers.ModelSerializer):
-    """Serializer for MapFeature model with spatial data."""
+class DisplayGeometryMixin:
+    """
+    Serialize 'display_geometry' in place of 'geometry' when a view has
+    attached a simplified geometry to the instance.
+    """
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        display_geometry = getattr(instance, 'display_geometry', None)
+        if display_geometry is not None and 'geometry' in self.fields:
+            data['geometry'] = self.fields['geometry'].to_representation(display_geometry)
+        return data
+
+
+class MapFeatureSerializer(DisplayGeometryMixin, serializers.ModelSerializer):
+    """
+    Serializer for MapFeature model with spatial data.
+    Nested stories and photos are only included when requested through the
+    'include' serializer context (e.g. ?include=stories,photos).
+    """
+    
+    EXPANDABLE_FIELDS = ('stories', 'photos')
     
     story_count = serializers.IntegerField(read_only=True)
     photo_count = serializers.IntegerField(read_only=True)
     stories = StorySerializer(many=True, read_only=True)
     photos = PhotoSerializer(many=True, read_only=True)
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # Drop nested content that was not asked for
+        include = self.context.get('include', ())
+        for field_name in self.EXPANDABLE_FIELDS:
+            if field_name not in include:
+                self.fields.pop(field_name, None)
+    
     class Meta:
         model = MapFeature
         fields = [
@@ -180,7 +302,7 @@ class MapFeatureSerializer(serializers.ModelSerializer):
             return value
 
 
-class MapFeatureListSerializer(serializers.ModelSerializer):
+class MapFeatureListSerializer(DisplayGeometryMixin, serializers.ModelSerializer):
     """Lightweight serializer for feature listings without nested content."""
     
     story_count = serializers.IntegerField(read_only=True)
@@ -195,3 +317,18 @@ class MapFeatureListSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'story_count', 'photo_count', 'created_at', 'updated_at']
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    """Serializer for ImportJob status and progress."""
+    
+    is_finished = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'map', 'file_format', 'status',
+            'processed_count', 'imported_count', 'errors', 'warnings',
+            'is_finished', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,222 @@
+"""
+Signal handlers for memory_maps app.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .caching import invalidate_map
+from .counters import COUNTERS, adjust_counter
+from .deletions import queue_files, queue_photo_files, queue_photos
+from .models import Map, MapFeature, Story, Photo, ImportJob
+
+# Counted parent of each child model: (foreign key, parent model, counter field)
+PARENT_COUNTERS = {child: (fk, parent, field) for parent, field, child, fk in COUNTERS}
+
+
+def _bump_cached_parent(instance, fk: str, field: str, delta: int):
+    """
+    Apply a counter change to the parent object cached on the instance,
+    so in-memory copies stay in step with the database.
+    """
+    descriptor = getattr(type(instance), fk)
+    if descriptor.is_cached(instance):
+        parent = getattr(instance, fk)
+        if parent is not None:
+            setattr(parent, field, getattr(parent, field) + delta)
+
+
+def _origin_model(origin):
+    """Return the model whose delete() started a deletion, or None if unknown."""
+    if origin is None:
+        return None
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return type(origin)
+
+
+def _deleted_with(origin, *models) -> bool:
+    """Return True if an object is being deleted in a cascade from one of the given models."""
+    return _origin_model(origin) in models
+
+
+@receiver(post_save, sender=MapFeature)
+def feature_created(sender, instance, created, **kwargs):
+    """Increment the map's feature count when a feature is created."""
+    if created and not kwargs.get('raw'):
+        adjust_counter(Map, instance.map_id, 'feature_count', 1)
+        _bump_cached_parent(instance, 'map', 'feature_count', 1)
+
+
+@receiver(post_delete, sender=MapFeature)
+def feature_deleted(sender, instance, **kwargs):
+    """Decrement the map's feature count when a feature is deleted."""
+    # Features are only deleted by a user cascade along with their map
+    if _deleted_with(kwargs.get('origin'), Map, User):
+        return
+    adjust_counter(Map, instance.map_id, 'feature_count', -1)
+    _bump_cached_parent(instance, 'map', 'feature_count', -1)
+
+
+@receiver(post_save, sender=Story)
+def story_created(sender, instance, created, **kwargs):
+    """Increment the feature's story count when a story is created."""
+    if created and not kwargs.get('raw'):
+        adjust_counter(MapFeature, instance.feature_id, 'story_count', 1)
+        _bump_cached_parent(instance, 'feature', 'story_count', 1)
+
+
+@receiver(post_delete, sender=Story)
+def story_deleted(sender, instance, **kwargs):
+    """Decrement the feature's story count when a story is deleted."""
+    if _deleted_with(kwargs.get('origin'), Map, MapFeature):
+        return
+    adjust_counter(MapFeature, instance.feature_id, 'story_count', -1)
+    _bump_cached_parent(instance, 'feature', 'story_count', -1)
+
+
+@receiver(post_save, sender=Photo)
+def photo_created(sender, instance, created, **kwargs):
+    """Increment the feature's photo count when a photo is created."""
+    if created and not kwargs.get('raw'):
+        adjust_counter(MapFeature, instance.feature_id, 'photo_count', 1)
+        _bump_cached_parent(instance, 'feature', 'photo_count', 1)
+
+
+@receiver(post_delete, sender=Photo)
+def photo_deleted(sender, instance, **kwargs):
+    """Decrement the feature's photo count when a photo is deleted."""
+    if _deleted_with(kwargs.get('origin'), Map, MapFeature):
+        return
+    adjust_counter(MapFeature, instance.feature_id, 'photo_count', -1)
+    _bump_cached_parent(instance, 'feature', 'photo_count', -1)
+
+
+# Moving a feature to another map, or a story or photo to another
+# feature, moves one count from the old parent to the new one. The parent
+# loaded from the database is remembered, so unchanged saves run no query.
+
+@receiver(post_init, sender=MapFeature)
+@receiver(post_init, sender=Story)
+@receiver(post_init, sender=Photo)
+def parent_loaded(sender, instance, **kwargs):
+    """Remember the parent an object was loaded with."""
+    fk = PARENT_COUNTERS[sender][0]
+    # Deferred foreign keys are not in __dict__ and are looked up on save
+    instance._loaded_parent_id = instance.__dict__.get(sender._meta.get_field(fk).attname)
+
+
+@receiver(pre_save, sender=MapFeature)
+@receiver(pre_save, sender=Story)
+@receiver(pre_save, sender=Photo)
+def parent_changing(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record the previous parent of an existing object whose parent is being changed."""
+    instance._moved_from_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    fk = PARENT_COUNTERS[sender][0]
+    attname = sender._meta.get_field(fk).attname
+    if update_fields is not None and fk not in update_fields and attname not in update_fields:
+        return
+    old_id = instance._loaded_parent_id
+    if old_id is None:
+        old_id = sender.objects.filter(pk=instance.pk).values_list(attname, flat=True).first()
+    if old_id is not None and old_id != getattr(instance, attname):
+        instance._moved_from_id = old_id
+
+
+@receiver(post_save, sender=MapFeature)
+@receiver(post_save, sender=Story)
+@receiver(post_save, sender=Photo)
+def parent_changed(sender, instance, created, **kwargs):
+    """Move a count from the old parent to the new one when an object changes parent."""
+    fk, parent_model, field = PARENT_COUNTERS[sender]
+    attname = sender._meta.get_field(fk).attname
+    old_id = getattr(instance, '_moved_from_id', None)
+    instance._loaded_parent_id = getattr(instance, attname)
+    instance._moved_from_id = None
+    if created or old_id is None:
+        return
+    adjust_counter(parent_model, old_id, field, -1)
+    adjust_counter(parent_model, getattr(instance, attname), field, 1)
+    _bump_cached_parent(instance, fk, field, 1)
+
+    # The new parent's map is invalidated by the handlers below
+    if parent_model is Map:
+        invalidate_map(old_id)
+    else:
+        old_map_id = MapFeature.objects.filter(pk=old_id).values_list('map_id', flat=True).first()
+        if old_map_id is not None:
+            invalidate_map(old_map_id)
+
+
+@receiver([post_save, post_delete], sender=Map)
+def map_changed(sender, instance, **kwargs):
+    """Invalidate cached responses when a map is saved or deleted."""
+    invalidate_map(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=MapFeature)
+def feature_changed(sender, instance, **kwargs):
+    """Invalidate cached responses of the feature's map."""
+    # The deleted map invalidates the cache itself
+    if _deleted_with(kwargs.get('origin'), Map, User):
+        return
+    invalidate_map(instance.map_id)
+
+
+@receiver([post_save, post_delete], sender=Story)
+@receiver([post_save, post_delete], sender=Photo)
+def feature_content_changed(sender, instance, **kwargs):
+    """Invalidate cached responses of the map a story or photo belongs to."""
+    # The deleted map or feature invalidates the cache itself
+    if _deleted_with(kwargs.get('origin'), Map, MapFeature):
+        return
+    if type(instance).feature.is_cached(instance):
+        map_id = instance.feature.map_id
+    else:
+        map_id = MapFeature.objects.filter(pk=instance.feature_id).values_list('map_id', flat=True).first()
+    if map_id is not None:
+        invalidate_map(map_id)
+
+
+# Stored files of deleted photos are queued in the StorageDeletion outbox.
+# Cascades queue every photo of the deleted map, feature or user with one
+# query, before the rows are gone; the Photo handler covers direct deletes.
+
+@receiver(pre_delete, sender=Map)
+def map_photos_deleted(sender, instance, **kwargs):
+    """Queue the files of a deleted map's photos."""
+    queue_photos(Photo.objects.filter(feature__map=instance))
+
+
+@receiver(pre_delete, sender=MapFeature)
+def feature_photos_deleted(sender, instance, **kwargs):
+    """Queue the files of a deleted feature's photos."""
+    # Features deleted with their map are covered by map_photos_deleted
+    if _origin_model(kwargs.get('origin')) not in (MapFeature, None):
+        return
+    queue_photos(Photo.objects.filter(feature=instance))
+
+
+@receiver(pre_delete, sender=User)
+def user_photos_deleted(sender, instance, **kwargs):
+    """Queue the files of a deleted user's photos."""
+    queue_photos(Photo.objects.filter(uploaded_by=instance))
+
+
+@receiver(post_delete, sender=Photo)
+def photo_files_deleted(sender, instance, **kwargs):
+    """Queue the files of a photo deleted on its own or in a Photo queryset delete."""
+    if _origin_model(kwargs.get('origin')) not in (Photo, None):
+        return
+    queue_photo_files([(instance.image.name, instance.renditions)])
+
+
+@receiver(post_delete, sender=ImportJob)
+def import_file_deleted(sender, instance, **kwargs):
+    """Queue the upload of an import job deleted before it finished, e.g. along with its map."""
+    if instance.file:
+        queue_files([instance.file.name])
@@ -0,0 +1,218 @@
+"""
+Geometry simplification for memory_maps feature listings and exports.
+Simplifies in the database with ST_SimplifyPreserveTopology and
+ST_ReducePrecision on PostGIS, and with a cached Douglas-Peucker pass over
+the stored GeoJSON otherwise. Simplified copies for low zoom bands are
+also stored on MapFeature so common zoom levels need no work per request.
+"""
+
+import json
+from collections import namedtuple
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+
+from .models import POSTGIS_ENABLED
+from .spatial import degrees_per_pixel, simplify_geojson
+
+if POSTGIS_ENABLED:
+    from django.contrib.gis.db.models.functions import GeoFunc
+
+    class SimplifyPreserveTopology(GeoFunc):
+        """ST_SimplifyPreserveTopology(geometry, tolerance)"""
+        function = 'ST_SimplifyPreserveTopology'
+
+    class ReducePrecision(GeoFunc):
+        """ST_ReducePrecision(geometry, grid_size)"""
+        function = 'ST_ReducePrecision'
+
+# Zoom-derived tolerance, in screen pixels: detail smaller than this
+# cannot be seen at the requested zoom
+SIMPLIFY_TOLERANCE_PX = 0.5
+
+# Highest number of decimal places accepted for ?precision=
+MAX_PRECISION = 15
+
+# How long simplified fallback geometries stay cached (they are keyed by
+# updated_at, so edits never read a stale entry)
+SIMPLIFY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Stored simplified columns and the highest zoom level each one serves;
+# from the last band on the full geometry is used
+GEOMETRY_LEVELS = (
+    ('geometry_low', 6),
+    ('geometry_mid', 11),
+)
+
+# tolerance: Douglas-Peucker tolerance in degrees, or None
+# precision: decimal places to keep, or None
+# column: stored geometry column to start from, or None for 'geometry'
+GeometryOptions = namedtuple('GeometryOptions', ['tolerance', 'precision', 'column'])
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Return the simplification tolerance in degrees for a zoom level."""
+    return SIMPLIFY_TOLERANCE_PX * degrees_per_pixel(zoom)
+
+
+def geometry_column(zoom: int) -> str:
+    """Return the MapFeature geometry column to display at a zoom level."""
+    for column, max_zoom in GEOMETRY_LEVELS:
+        if zoom <= max_zoom:
+            return column
+    return 'geometry'
+
+
+def _coordinate_count(coords) -> int:
+    """Count the positions in a GeoJSON coordinates array."""
+    if not coords:
+        return 0
+    if isinstance(coords[0], (int, float)):
+        return 1
+    return sum(_coordinate_count(part) for part in coords)
+
+
+def simplified_levels(feature_type: str, geometry: Any) -> Dict[str, Any]:
+    """
+    Compute the stored simplified geometries of a feature.
+
+    Each band is simplified with the tolerance of its highest zoom level,
+    so it is accurate to SIMPLIFY_TOLERANCE_PX everywhere in the band.
+    Levels that would not drop any vertices (including all points) are
+    None, and readers fall back to the full geometry.
+
+    Args:
+        feature_type: MapFeature.feature_type
+        geometry: GEOS geometry on PostGIS, GeoJSON string otherwise
+
+    Returns:
+        Dictionary of column name to simplified geometry or None
+    """
+    levels = {column: None for column, _ in GEOMETRY_LEVELS}
+    if feature_type == 'point' or not geometry:
+        return levels
+
+    if POSTGIS_ENABLED:
+        from django.contrib.gis.geos import GEOSGeometry
+        if isinstance(geometry, str):
+            geometry = GEOSGeometry(geometry, srid=4326)
+        for column, max_zoom in GEOMETRY_LEVELS:
+            simplified = geometry.simplify(zoom_tolerance(max_zoom), preserve_topology=True)
+            if simplified.num_coords < geometry.num_coords:
+                simplified.srid = geometry.srid or 4326
+                levels[column] = simplified
+        return levels
+
+    original = simplify_geojson(geometry)
+    if original is None or 'coordinates' not in original:
+        return levels
+    count = _coordinate_count(original['coordinates'])
+    for column, max_zoom in GEOMETRY_LEVELS:
+        simplified = simplify_geojson(original, zoom_tolerance(max_zoom))
+        if _coordinate_count(simplified['coordinates']) < count:
+            levels[column] = json.dumps(simplified)
+    return levels
+
+
+def annotate_simplified(queryset, options: Optional[GeometryOptions]):
+    """
+    Add a simplified 'display_geometry' to a MapFeature queryset on PostGIS.
+
+    Stored simplified columns that are not needed are deferred. On other
+    backends no annotation is added and simplify_features() does the work
+    after the page has been fetched.
+
+    Args:
+        queryset: MapFeature queryset
+        options: Requested simplification, or None
+
+    Returns:
+        Queryset
+    """
+    column = options.column if options is not None else None
+    unused = [name for name, _ in GEOMETRY_LEVELS if name != column or POSTGIS_ENABLED]
+    queryset = queryset.defer(*unused)
+    if options is None or not POSTGIS_ENABLED:
+        return queryset
+    return queryset.annotate(display_geometry=geometry_expression(options))
+
+
+def geometry_expression(options: Optional[GeometryOptions], reduce_precision: bool = True):
+    """
+    Build the PostGIS expression of a feature's display geometry.
+
+    Args:
+        options: Requested simplification, or None for the full geometry
+        reduce_precision: Snap coordinates to the requested precision with
+                          ST_ReducePrecision (callers that format the output
+                          themselves, such as ST_AsGeoJSON, can skip it)
+
+    Returns:
+        Query expression
+    """
+    from django.db.models import F
+    from django.db.models.functions import Coalesce
+
+    geometry = F('geometry')
+    if options is None:
+        return geometry
+    if options.column and options.column != 'geometry':
+        geometry = Coalesce(F(options.column), geometry)
+    if options.tolerance:
+        geometry = SimplifyPreserveTopology(geometry, options.tolerance)
+    if reduce_precision and options.precision is not None:
+        geometry = ReducePrecision(geometry, 10.0 ** -options.precision)
+    return geometry
+
+
+def _cache_key(feature, options: GeometryOptions) -> str:
+    return (
+        f'memory_maps:simplified:{feature.pk}:{feature.updated_at.timestamp()}'
+        f':{options.column}:{options.tolerance!r}:{options.precision}'
+    )
+
+
+def simplify_features(features, options: Optional[GeometryOptions]) -> List:
+    """
+    Set 'display_geometry' on fetched features for the non-PostGIS backend.
+
+    Results are cached per feature, updated_at, tolerance and precision, so
+    a zoom level that has been requested before costs one cache read per
+    page.
+
+    Args:
+        features: Iterable of MapFeature instances
+        options: Requested simplification, or None
+
+    Returns:
+        List of the same features
+    """
+    features = list(features)
+    if options is None or POSTGIS_ENABLED:
+        return features
+
+    if options.tolerance is None and options.precision is None:
+        # A stored column is all that was asked for
+        for feature in features:
+            feature.display_geometry = getattr(feature, options.column) or feature.geometry
+        return features
+
+    keys = {feature.pk: _cache_key(feature, options) for feature in features}
+    cached = cache.get_many(keys.values())
+
+    missing = {}
+    for feature in features:
+        key = keys[feature.pk]
+        display = cached.get(key)
+        if display is None:
+            source = feature.geometry
+            if options.column:
+                source = getattr(feature, options.column) or source
+            simplified = simplify_geojson(source, options.tolerance or 0.0, options.precision)
+            display = json.dumps(simplified) if simplified else source
+            missing[key] = display
+        feature.display_geometry = display
+
+    if missing:
+        cache.set_many(missing, SIMPLIFY_CACHE_TIMEOUT)
+    return features
@@ -0,0 +1,256 @@
+"""
+Spatial helper utilities for memory_maps app.
+Pure-Python geometry helpers shared by the PostGIS and GeoJSON-text backends.
+"""
+
+import json
+import math
+from typing import Any, List, Optional, Tuple
+
+# Size of a web map tile in pixels (Leaflet/Web Mercator default)
+TILE_SIZE = 256
+
+Bounds = Tuple[float, float, float, float]
+
+# Latitude at which the Web Mercator world becomes square
+MAX_MERCATOR_LAT = 85.0511287798
+
+
+def _as_geojson_dict(geometry: Any) -> Optional[dict]:
+    """
+    Coerce a geometry value into a GeoJSON dictionary.
+
+    Args:
+        geometry: GeoJSON string, GeoJSON dictionary or GEOS geometry
+
+    Returns:
+        GeoJSON dictionary, or None if the value cannot be read
+    """
+    if not geometry:
+        return None
+    if isinstance(geometry, dict):
+        return geometry
+    if isinstance(geometry, (str, bytes)):
+        try:
+            return json.loads(geometry)
+        except (TypeError, ValueError):
+            return None
+    if hasattr(geometry, 'json'):
+        # GEOS geometry
+        return json.loads(geometry.json)
+    return None
+
+
+def geometry_bounds(geometry: Any) -> Optional[Bounds]:
+    """
+    Compute the bounding box of a geometry.
+
+    Args:
+        geometry: GeoJSON string, GeoJSON dictionary or GEOS geometry
+
+    Returns:
+        Tuple of (min_lng, min_lat, max_lng, max_lat), or None if the
+        geometry is empty or invalid
+    """
+    if hasattr(geometry, 'extent') and not isinstance(geometry, (str, bytes, dict)):
+        # GEOS geometries compute their own extent
+        if geometry.empty:
+            return None
+        return tuple(geometry.extent)
+
+    geojson = _as_geojson_dict(geometry)
+    if not geojson:
+        return None
+
+    min_x = min_y = float('inf')
+    max_x = max_y = float('-inf')
+
+    # Walk nested coordinate arrays without recursion
+    stack = [geojson.get('coordinates')]
+    for child in geojson.get('geometries', []) or []:
+        stack.append(child.get('coordinates') if isinstance(child, dict) else None)
+
+    while stack:
+        coords = stack.pop()
+        if not isinstance(coords, (list, tuple)) or not coords:
+            continue
+        if isinstance(coords[0], (int, float)):
+            if len(coords) < 2:
+                continue
+            x, y = float(coords[0]), float(coords[1])
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+        else:
+            stack.extend(coords)
+
+    if min_x == float('inf'):
+        return None
+    return min_x, min_y, max_x, max_y
+
+
+def degrees_per_pixel(zoom: float) -> float:
+    """
+    Return the longitude span of one screen pixel at a zoom level.
+
+    Args:
+        zoom: Web map zoom level
+
+    Returns:
+        Degrees of longitude covered by a single pixel
+    """
+    return 360.0 / (TILE_SIZE * (2 ** zoom))
+
+
+def mercator_pixel(lng: float, lat: float, zoom: float) -> Tuple[float, float]:
+    """
+    Project a point to Web Mercator pixel coordinates at a zoom level.
+
+    Latitudes beyond MAX_MERCATOR_LAT are clamped to the edge of the map.
+
+    Args:
+        lng: Longitude in degrees
+        lat: Latitude in degrees
+        zoom: Web map zoom level
+
+    Returns:
+        Tuple of (x, y) in pixels from the top-left corner of the world
+    """
+    world = TILE_SIZE * (2 ** zoom)
+    lat = math.radians(max(-MAX_MERCATOR_LAT, min(lat, MAX_MERCATOR_LAT)))
+    x = (lng + 180.0) / 360.0 * world
+    y = (1.0 - math.log(math.tan(lat) + 1.0 / math.cos(lat)) / math.pi) / 2.0 * world
+    return x, y
+
+
+def pad_bounds(bounds: Bounds, pixels: float, zoom: float) -> Bounds:
+    """
+    Grow a bounding box by a number of screen pixels at a zoom level.
+    Latitudes are clamped to the valid range.
+
+    Args:
+        bounds: Tuple of (min_lng, min_lat, max_lng, max_lat)
+        pixels: Padding in pixels on each side
+        zoom: Web map zoom level
+
+    Returns:
+        Padded bounding box
+    """
+    pad = pixels * degrees_per_pixel(zoom)
+    min_x, min_y, max_x, max_y = bounds
+    return (
+        min_x - pad,
+        max(min_y - pad, -90.0),
+        max_x + pad,
+        min(max_y + pad, 90.0),
+    )
+
+
+def douglas_peucker(points: List[List[float]], tolerance: float) -> List[List[float]]:
+    """
+    Simplify a line with the Douglas-Peucker algorithm.
+
+    Args:
+        points: List of [x, y, ...] coordinates
+        tolerance: Maximum distance, in coordinate units, between the
+                   simplified line and the original points
+
+    Returns:
+        Subset of the input points, always keeping the first and last
+    """
+    count = len(points)
+    if count < 3 or tolerance <= 0:
+        return list(points)
+
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    limit = tolerance * tolerance
+
+    # Iterative to avoid recursion limits on very long lines
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = points[first][0], points[first][1]
+        dx, dy = points[last][0] - x1, points[last][1] - y1
+        length = dx * dx + dy * dy
+
+        max_distance, index = 0.0, None
+        for i in range(first + 1, last):
+            px, py = points[i][0] - x1, points[i][1] - y1
+            if length:
+                # Squared distance to the closest point on the segment
+                t = max(0.0, min(1.0, (px * dx + py * dy) / length))
+                px, py = px - t * dx, py - t * dy
+            distance = px * px + py * py
+            if distance > max_distance:
+                max_distance, index = distance, i
+
+        if index is not None and max_distance > limit:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _round_point(point: List[float], precision: Optional[int]) -> List[float]:
+    if precision is None:
+        return list(point)
+    return [round(value, precision) for value in point]
+
+
+def _simplify_line(points, tolerance: float, precision: Optional[int], min_points: int):
+    """Simplify one line or ring, keeping it unchanged if it would collapse."""
+    simplified = douglas_peucker(points, tolerance)
+    if len(simplified) < min_points:
+        simplified = points
+    return [_round_point(point, precision) for point in simplified]
+
+
+def simplify_geojson(geometry: Any, tolerance: float = 0.0,
+                     precision: Optional[int] = None) -> Optional[dict]:
+    """
+    Simplify a GeoJSON geometry and round its coordinates.
+
+    Rings that would have fewer than four points are kept as they are, so
+    polygons never collapse (a cheap stand-in for topology preservation).
+
+    Args:
+        geometry: GeoJSON string, GeoJSON dictionary or GEOS geometry
+        tolerance: Douglas-Peucker tolerance in degrees (0 to skip)
+        precision: Number of decimal places to keep, or None
+
+    Returns:
+        Simplified GeoJSON dictionary, or None if the geometry cannot be read
+    """
+    geojson = _as_geojson_dict(geometry)
+    if not geojson:
+        return None
+
+    geom_type = geojson.get('type')
+    coords = geojson.get('coordinates')
+
+    if geom_type == 'GeometryCollection':
+        return {
+            'type': geom_type,
+            'geometries': [
+                simplify_geojson(child, tolerance, precision)
+                for child in geojson.get('geometries', [])
+            ],
+        }
+    if geom_type == 'Point':
+        coords = _round_point(coords, precision)
+    elif geom_type == 'MultiPoint':
+        coords = [_round_point(point, precision) for point in coords]
+    elif geom_type == 'LineString':
+        coords = _simplify_line(coords, tolerance, precision, 2)
+    elif geom_type == 'MultiLineString':
+        coords = [_simplify_line(line, tolerance, precision, 2) for line in coords]
+    elif geom_type == 'Polygon':
+        coords = [_simplify_line(ring, tolerance, precision, 4) for ring in coords]
+    elif geom_type == 'MultiPolygon':
+        coords = [
+            [_simplify_line(ring, tolerance, precision, 4) for ring in polygon]
+            for polygon in coords
+        ]
+
+    return {'type': geom_type, 'coordinates': coords}
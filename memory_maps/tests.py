@@ -2550,3 +2550,2915 @@ invalid,-74.0060,Invalid Point
         
         self.assertEqual(count, 3)
         self.assertEqual(len(errors), 0)
+
+
+# Viewport Query Tests
+
+class MapFeatureViewportTest(APITestCase):
+    """Test cases for bounding-box viewport queries on features."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Viewport Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        
+        self.new_york = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='New York'
+        )
+        
+        self.london_park = MapFeature.objects.create(
+            map=self.map,
+            feature_type='polygon',
+            geometry=json.dumps({
+                'type': 'Polygon',
+                'coordinates': [[[-0.2, 51.5], [-0.2, 51.6], [-0.1, 51.6], [-0.1, 51.5], [-0.2, 51.5]]]
+            }),
+            title='London Park'
+        )
+    
+    def test_feature_bounds_populated_on_save(self):
+        """Test that the bbox columns are computed from the geometry."""
+        self.assertAlmostEqual(self.london_park.bbox_min_lng, -0.2)
+        self.assertAlmostEqual(self.london_park.bbox_min_lat, 51.5)
+        self.assertAlmostEqual(self.london_park.bbox_max_lng, -0.1)
+        self.assertAlmostEqual(self.london_park.bbox_max_lat, 51.6)
+    
+    def test_bbox_returns_only_visible_features(self):
+        """Test that only features inside the viewport are returned."""
+        url = reverse('memory_maps:feature-list')
+        response = self.client.get(url, {'map_id': self.map.id, 'bbox': '-75,40,-73,41'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [f['title'] for f in response.data['results']]
+        self.assertEqual(titles, ['New York'])
+    
+    def test_bbox_matches_partially_visible_polygon(self):
+        """Test that polygons overlapping the viewport edge are returned."""
+        url = reverse('memory_maps:feature-list')
+        response = self.client.get(url, {'map_id': self.map.id, 'bbox': '-0.15,51.55,0.5,52'})
+        
+        titles = [f['title'] for f in response.data['results']]
+        self.assertEqual(titles, ['London Park'])
+    
+    def test_bbox_zoom_pads_viewport(self):
+        """Test that a zoom level pads the viewport by a few pixels."""
+        url = reverse('memory_maps:feature-list')
+        bbox = '-74.0050,40.7100,-73.9,40.8'
+        
+        response = self.client.get(url, {'map_id': self.map.id, 'bbox': bbox})
+        self.assertEqual(len(response.data['results']), 0)
+        
+        response = self.client.get(url, {'map_id': self.map.id, 'bbox': bbox, 'zoom': 12})
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_invalid_bbox(self):
+        """Test that malformed bbox and zoom values are rejected."""
+        url = reverse('memory_maps:feature-list')
+        
+        response = self.client.get(url, {'bbox': '1,2,3'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get(url, {'bbox': '10,0,-10,5'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        for bbox in ('nan,0,10,5', '-10,0,inf,5', '-inf,-inf,inf,inf', '-200,0,10,5', '-10,0,200,5'):
+            response = self.client.get(url, {'bbox': bbox})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, bbox)
+        
+        response = self.client.get(url, {'bbox': '-10,0,10,5', 'zoom': 'far'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# Vector Tile Tests
+
+class MapTileAPITest(APITestCase):
+    """Test cases for the vector tile endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.public_map = Map.objects.create(
+            title='Public Map',
+            owner=self.user,
+            center_lat=0.0,
+            center_lng=0.0,
+            is_public=True
+        )
+        
+        self.private_map = Map.objects.create(
+            title='Private Map',
+            owner=self.user,
+            center_lat=0.0,
+            center_lng=0.0
+        )
+    
+    def tile_url(self, map_obj, z, x, y):
+        """Helper method to build a tile URL."""
+        return reverse('memory_maps:map-tiles', kwargs={'pk': map_obj.id, 'z': z, 'x': x, 'y': y})
+    
+    def test_tile_url_format(self):
+        """Test that tiles are addressed as {z}/{x}/{y}.mvt."""
+        url = self.tile_url(self.public_map, 3, 2, 1)
+        self.assertTrue(url.endswith(f'/maps/{self.public_map.id}/tiles/3/2/1.mvt'))
+        
+        response = self.client.get(url + '/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_tile_out_of_range(self):
+        """Test that tile coordinates outside the zoom grid are rejected."""
+        response = self.client.get(self.tile_url(self.public_map, 2, 4, 0))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_private_map_tiles_hidden(self):
+        """Test that anonymous users cannot fetch tiles of private maps."""
+        response = self.client.get(self.tile_url(self.private_map, 0, 0, 0))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_tiles_require_postgis(self):
+        """Test that tile rendering reports the backend limitation without PostGIS."""
+        from memory_maps.tiles import tiles_supported
+        
+        response = self.client.get(self.tile_url(self.public_map, 0, 0, 0))
+        if tiles_supported():
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/vnd.mapbox-vector-tile')
+        else:
+            self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+
+# Query Count Tests
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class ListQueryCountTest(APITestCase):
+    """Test that list endpoints run a constant number of queries per page."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def create_maps(self, count):
+        """Helper method to create public maps, each with one feature and one story."""
+        maps = []
+        for i in range(count):
+            map_obj = Map.objects.create(
+                title=f'Map {i}',
+                owner=self.user,
+                center_lat=0.0,
+                center_lng=0.0,
+                is_public=True
+            )
+            feature = MapFeature.objects.create(
+                map=map_obj,
+                feature_type='point',
+                geometry=json.dumps({'type': 'Point', 'coordinates': [i, i]}),
+                title=f'Feature {i}'
+            )
+            Story.objects.create(
+                feature=feature,
+                title=f'Story {i}',
+                content='Story content',
+                author=self.user
+            )
+            maps.append(map_obj)
+        return maps
+    
+    def count_queries(self, url, params=None):
+        """Helper method to count the queries run by a GET request."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+    
+    def assert_constant_queries(self, url_for_map, extra_maps=5):
+        """Helper method to compare query counts for small and large pages."""
+        first = self.create_maps(1)[0]
+        small = self.count_queries(url_for_map(first))
+        self.create_maps(extra_maps)
+        
+        # Add more features to the first map so its feature page grows too
+        for i in range(extra_maps):
+            MapFeature.objects.create(
+                map=first,
+                feature_type='point',
+                geometry=json.dumps({'type': 'Point', 'coordinates': [0, i]}),
+                title=f'Extra {i}'
+            )
+        large = self.count_queries(url_for_map(first))
+        
+        self.assertEqual(small, large)
+    
+    def test_map_list_query_count(self):
+        """Test map list query count does not grow with page size."""
+        self.assert_constant_queries(lambda m: reverse('memory_maps:map-list'))
+    
+    def test_my_maps_query_count(self):
+        """Test my_maps query count does not grow with page size."""
+        self.assert_constant_queries(lambda m: reverse('memory_maps:map-my-maps'))
+    
+    def test_public_maps_query_count(self):
+        """Test public_maps query count does not grow with page size."""
+        self.assert_constant_queries(lambda m: reverse('memory_maps:map-public-maps'))
+    
+    def test_map_features_query_count(self):
+        """Test map features query count does not grow with page size."""
+        self.assert_constant_queries(
+            lambda m: reverse('memory_maps:map-features', kwargs={'pk': m.id})
+        )
+    
+    def test_feature_list_query_count(self):
+        """Test feature list query count does not grow with page size."""
+        self.assert_constant_queries(lambda m: reverse('memory_maps:feature-list'))
+    
+    def test_annotated_counts_match(self):
+        """Test that annotated counts match the stored content."""
+        map_obj = self.create_maps(1)[0]
+        
+        url = reverse('memory_maps:map-features', kwargs={'pk': map_obj.id})
+        response = self.client.get(url)
+        
+        self.assertEqual(response.data['results'][0]['story_count'], 1)
+        self.assertEqual(response.data['results'][0]['photo_count'], 0)
+        
+        response = self.client.get(reverse('memory_maps:map-public-maps'))
+        self.assertEqual(response.data['results'][0]['feature_count'], 1)
+
+
+# Counter Column Tests
+
+from django.core.management import call_command
+from io import StringIO
+from memory_maps.counters import find_drift
+
+
+class CounterColumnTest(APITestCase):
+    """Test cases for denormalized feature, story and photo counters."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Counter Map',
+            owner=self.user,
+            center_lat=0.0,
+            center_lng=0.0,
+            is_public=True
+        )
+    
+    def create_feature(self, map_obj=None, title='Feature'):
+        """Helper method to create a point feature."""
+        return MapFeature.objects.create(
+            map=map_obj or self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [0.0, 0.0]}),
+            title=title
+        )
+    
+    def test_counters_follow_create_and_delete(self):
+        """Test that counters are updated when content is created and deleted."""
+        feature = self.create_feature()
+        story = Story.objects.create(
+            feature=feature,
+            title='Story',
+            content='Content',
+            author=self.user
+        )
+        
+        self.map.refresh_from_db()
+        feature.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 1)
+        self.assertEqual(feature.story_count, 1)
+        
+        story.delete()
+        feature.refresh_from_db()
+        self.assertEqual(feature.story_count, 0)
+        
+        feature.delete()
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 0)
+    
+    def test_queryset_delete_updates_counters(self):
+        """Test that bulk queryset deletes keep counters in step."""
+        self.create_feature(title='One')
+        self.create_feature(title='Two')
+        
+        MapFeature.objects.filter(map=self.map).delete()
+        
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 0)
+    
+    def test_stale_instance_does_not_overwrite_counter(self):
+        """Test that saving an out-of-date map keeps the stored counter."""
+        stale_map = Map.objects.get(pk=self.map.pk)
+        self.create_feature()
+        
+        stale_map.title = 'Renamed'
+        stale_map.save()
+        
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.title, 'Renamed')
+        self.assertEqual(self.map.feature_count, 1)
+    
+    def test_moving_content_updates_both_parents(self):
+        """Test that changing a story's feature or a feature's map moves the count."""
+        other_map = Map.objects.create(
+            title='Other Map',
+            owner=self.user,
+            center_lat=0.0,
+            center_lng=0.0
+        )
+        feature = self.create_feature(title='One')
+        other_feature = self.create_feature(title='Two')
+        story = Story.objects.create(
+            feature=feature,
+            title='Story',
+            content='Content',
+            author=self.user
+        )
+        
+        story = Story.objects.get(pk=story.pk)
+        story.feature = other_feature
+        story.save()
+        
+        feature.refresh_from_db()
+        other_feature.refresh_from_db()
+        self.assertEqual(feature.story_count, 0)
+        self.assertEqual(other_feature.story_count, 1)
+        
+        # Saving again without a change leaves the counters alone
+        story.save()
+        other_feature.refresh_from_db()
+        self.assertEqual(other_feature.story_count, 1)
+        
+        feature = MapFeature.objects.get(pk=feature.pk)
+        feature.map = other_map
+        feature.save()
+        
+        self.map.refresh_from_db()
+        other_map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 1)
+        self.assertEqual(other_map.feature_count, 1)
+    
+    def test_moving_content_through_api(self):
+        """Test that a PATCH moving a story to another feature updates both counters."""
+        feature = self.create_feature(title='One')
+        other_feature = self.create_feature(title='Two')
+        story = Story.objects.create(
+            feature=feature,
+            title='Story',
+            content='Content',
+            author=self.user
+        )
+        
+        self.client.force_authenticate(user=self.user)
+        url = reverse('memory_maps:story-detail', kwargs={'pk': story.pk})
+        response = self.client.patch(url, {'feature': other_feature.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        feature.refresh_from_db()
+        other_feature.refresh_from_db()
+        self.assertEqual(feature.story_count, 0)
+        self.assertEqual(other_feature.story_count, 1)
+        self.assertEqual(find_drift(), [])
+    
+    def test_order_public_maps_by_size(self):
+        """Test sorting and filtering public maps by feature count."""
+        big_map = Map.objects.create(
+            title='Big Map',
+            owner=self.user,
+            center_lat=0.0,
+            center_lng=0.0,
+            is_public=True
+        )
+        for i in range(3):
+            self.create_feature(big_map, title=f'Feature {i}')
+        self.create_feature()
+        
+        url = reverse('memory_maps:map-public-maps')
+        response = self.client.get(url, {'ordering': '-feature_count'})
+        titles = [m['title'] for m in response.data['results']]
+        self.assertEqual(titles, ['Big Map', 'Counter Map'])
+        
+        response = self.client.get(url, {'min_features': 2})
+        titles = [m['title'] for m in response.data['results']]
+        self.assertEqual(titles, ['Big Map'])
+    
+    def test_repair_counters_command(self):
+        """Test that the repair command fixes drifted counters."""
+        self.create_feature()
+        Map.objects.filter(pk=self.map.pk).update(feature_count=7)
+        
+        out = StringIO()
+        call_command('repair_counters', '--dry-run', stdout=out)
+        self.assertIn('feature_count is 7, should be 1', out.getvalue())
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 7)
+        
+        call_command('repair_counters', stdout=StringIO())
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 1)
+
+
+# Nested Content Expansion Tests
+
+class MapFeatureIncludeTest(APITestCase):
+    """Test cases for ?include= expansion of nested feature content."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Include Map',
+            owner=self.user,
+            center_lat=0.0,
+            center_lng=0.0,
+            is_public=True
+        )
+        
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [0.0, 0.0]}),
+            title='Feature'
+        )
+    
+    def add_stories(self, count):
+        """Helper method to add stories written by different authors."""
+        for i in range(count):
+            author = User.objects.create_user(
+                username=f'author{Story.objects.count()}',
+                password='testpass123'
+            )
+            Story.objects.create(
+                feature=self.feature,
+                title=f'Story {i}',
+                content='Content',
+                author=author
+            )
+    
+    def test_nested_content_off_by_default(self):
+        """Test that feature detail omits stories and photos by default."""
+        url = reverse('memory_maps:feature-detail', kwargs={'pk': self.feature.id})
+        response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('stories', response.data)
+        self.assertNotIn('photos', response.data)
+        self.assertIn('story_count', response.data)
+    
+    def test_include_stories_and_photos(self):
+        """Test that requested nested content is returned."""
+        self.add_stories(2)
+        
+        url = reverse('memory_maps:feature-detail', kwargs={'pk': self.feature.id})
+        response = self.client.get(url, {'include': 'stories,photos'})
+        
+        self.assertEqual(len(response.data['stories']), 2)
+        self.assertEqual(response.data['photos'], [])
+        self.assertIn('username', response.data['stories'][0]['author'])
+    
+    def test_include_uses_fixed_number_of_queries(self):
+        """Test that nested content loads in a fixed number of queries."""
+        url = reverse('memory_maps:feature-detail', kwargs={'pk': self.feature.id})
+        params = {'include': 'stories,photos'}
+        
+        self.add_stories(1)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url, params)
+        
+        self.add_stories(5)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(url, params)
+        
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+    
+    def test_include_on_list(self):
+        """Test that the feature list can expand nested content."""
+        self.add_stories(1)
+        
+        url = reverse('memory_maps:feature-list')
+        response = self.client.get(url, {'map_id': self.map.id, 'include': 'stories'})
+        
+        self.assertEqual(len(response.data['results'][0]['stories']), 1)
+        self.assertNotIn('photos', response.data['results'][0])
+    
+    def test_unknown_include_rejected(self):
+        """Test that unknown include values are rejected."""
+        url = reverse('memory_maps:feature-detail', kwargs={'pk': self.feature.id})
+        response = self.client.get(url, {'include': 'comments'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# Batched Import Tests
+
+class BatchedGeoJSONImporterTest(TestCase):
+    """Test cases for the bulk_create mode of GeoJSONImporter."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+    
+    def point_feature(self, i):
+        """Helper method to build a GeoJSON point feature."""
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [i * 0.01, i * 0.01]},
+            "properties": {"name": f"Point {i}"}
+        }
+    
+    def test_batched_import_returns_primary_keys(self):
+        """Test that batched imports return the IDs and titles of saved features."""
+        geojson_data = {
+            "type": "FeatureCollection",
+            "features": [self.point_feature(i) for i in range(7)]
+        }
+        
+        importer = GeoJSONImporter(self.map, batch_size=3)
+        count, errors, warnings = importer.import_from_dict(geojson_data)
+        
+        self.assertEqual(count, 7)
+        self.assertEqual(len(errors), 0)
+        self.assertTrue(all(pk for pk, _ in importer.imported_features))
+        # Only (id, title) pairs are kept, not the features and their geometries
+        first = MapFeature.objects.get(pk=importer.imported_features[0][0])
+        self.assertEqual(importer.imported_features[0], (first.pk, first.title))
+        self.assertEqual(MapFeature.objects.filter(map=self.map).count(), 7)
+        
+        # Bounds and counters are maintained without per-row saves
+        feature = MapFeature.objects.get(title='Point 2')
+        self.assertAlmostEqual(feature.bbox_min_lng, 0.02)
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 7)
+    
+    def test_batched_import_reports_errors_by_index(self):
+        """Test that invalid features are reported with their index."""
+        geojson_data = {
+            "type": "FeatureCollection",
+            "features": [
+                self.point_feature(0),
+                {"type": "Feature", "properties": {"name": "No geometry"}},
+                self.point_feature(2),
+            ]
+        }
+        
+        importer = GeoJSONImporter(self.map, batch_size=2)
+        count, errors, warnings = importer.import_from_dict(geojson_data)
+        
+        self.assertEqual(count, 2)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith('Feature 1:'))
+    
+    def test_batched_import_uses_few_queries(self):
+        """Test that batched imports do not run one INSERT per feature."""
+        geojson_data = {
+            "type": "FeatureCollection",
+            "features": [self.point_feature(i) for i in range(50)]
+        }
+        
+        importer = GeoJSONImporter(self.map, batch_size=25)
+        with CaptureQueriesContext(connection) as context:
+            importer.import_from_dict(geojson_data)
+        
+        self.assertLess(len(context.captured_queries), 20)
+
+
+# Streaming GeoJSON Import Tests
+
+class StreamingGeoJSONImportTest(APITestCase):
+    """Test cases for importing GeoJSON files feature by feature."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        
+        self.collection = {
+            "type": "FeatureCollection",
+            "name": "Sample",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [-74.0060, 40.7128]},
+                    "properties": {"name": "Café ☕", "description": "A test point"}
+                },
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [[[-74.0, 40.7], [-74.0, 40.8], [-73.9, 40.8], [-73.9, 40.7], [-74.0, 40.7]]]
+                    },
+                    "properties": {"name": "Test Polygon", "category": "garden"}
+                }
+            ]
+        }
+    
+    def as_file(self, data):
+        """Helper method to encode GeoJSON as a binary file."""
+        return BytesIO(json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+    
+    def test_stream_feature_collection_in_small_chunks(self):
+        """Test that features split across read chunks are parsed correctly."""
+        for batch_size in (None, 1):
+            MapFeature.objects.filter(map=self.map).delete()
+            importer = GeoJSONImporter(self.map, batch_size=batch_size)
+            count, errors, warnings = importer.import_from_file(self.as_file(self.collection), chunk_size=7)
+            
+            self.assertEqual(count, 2)
+            self.assertEqual(errors, [])
+            self.assertTrue(MapFeature.objects.filter(map=self.map, title='Café ☕').exists())
+    
+    def test_stream_features_before_type(self):
+        """Test documents whose 'type' member follows the features array."""
+        content = b'{"features": [{"type": "Feature", "geometry": {"type": "Point", "coordinates": [1, 2]}, "properties": {}}], "type": "FeatureCollection"}'
+        
+        importer = GeoJSONImporter(self.map, batch_size=10)
+        count, errors, warnings = importer.import_from_file(BytesIO(content))
+        
+        self.assertEqual(count, 1)
+        self.assertEqual(errors, [])
+    
+    def test_stream_single_feature(self):
+        """Test streaming a document that is a single Feature."""
+        importer = GeoJSONImporter(self.map, batch_size=10)
+        count, errors, warnings = importer.import_from_file(self.as_file(self.collection['features'][1]))
+        
+        self.assertEqual(count, 1)
+        self.assertEqual(MapFeature.objects.get(map=self.map).category, 'garden')
+    
+    def test_truncated_stream_rolls_back(self):
+        """Test that a document malformed part way through imports nothing."""
+        content = json.dumps(self.collection).encode('utf-8')[:-40]
+        
+        importer = GeoJSONImporter(self.map, batch_size=1)
+        count, errors, warnings = importer.import_from_file(BytesIO(content), chunk_size=16)
+        
+        self.assertEqual(count, 0)
+        self.assertTrue(errors[0].startswith('Invalid JSON'))
+        self.assertEqual(MapFeature.objects.filter(map=self.map).count(), 0)
+        self.assertEqual(self.map.feature_count, 0)
+    
+    def test_stream_rejects_unsupported_type_and_bad_encoding(self):
+        """Test stream validation of the document type and encoding."""
+        importer = GeoJSONImporter(self.map, batch_size=10)
+        count, errors, warnings = importer.import_from_file(BytesIO(b'{"type": "Topology", "objects": {}}'))
+        self.assertEqual(errors, ['Unsupported GeoJSON type: Topology'])
+        
+        count, errors, warnings = importer.import_from_file(BytesIO(b'{"type": "Feature", "name": "\xff"}'))
+        self.assertEqual(errors, ['File must be UTF-8 encoded'])
+    
+    def test_import_geojson_file_upload(self):
+        """Test that uploaded GeoJSON files are imported through the stream."""
+        self.client.force_authenticate(user=self.user)
+        
+        upload = SimpleUploadedFile(
+            'sample.geojson',
+            json.dumps(self.collection).encode('utf-8'),
+            content_type='application/geo+json'
+        )
+        url = reverse('memory_maps:map-import-geojson', kwargs={'pk': self.map.id})
+        response = self.client.post(url, {'file': upload}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(len(response.data['features']), 2)
+
+
+# Import Job Tests
+
+from memory_maps.models import ImportJob
+from memory_maps.import_jobs import claim_next_job, reclaim_stale_jobs, run_import_job
+from unittest import mock
+
+
+class ImportJobTest(APITestCase):
+    """Test cases for queued background imports."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        
+        self.geojson = json.dumps({
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "Point", "coordinates": [-74.0060 + i / 100, 40.7128]},
+                    "properties": {"name": f"Point {i}"}
+                }
+                for i in range(3)
+            ]
+        }).encode('utf-8')
+    
+    def queue(self, name, content, **data):
+        """Helper method to queue an upload through the API."""
+        upload = SimpleUploadedFile(name, content)
+        url = reverse('memory_maps:map-queue-import', kwargs={'pk': self.map.id})
+        return self.client.post(url, {'file': upload, **data}, format='multipart')
+    
+    def test_queue_import_returns_job(self):
+        """Test that queuing an import returns a pending job without importing."""
+        self.client.force_authenticate(user=self.user)
+        
+        response = self.queue('points.geojson', self.geojson)
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], ImportJob.STATUS_PENDING)
+        self.assertEqual(response.data['file_format'], 'geojson')
+        self.assertEqual(MapFeature.objects.filter(map=self.map).count(), 0)
+    
+    def test_queue_import_validation(self):
+        """Test queue_import rejects unknown formats and other users' maps."""
+        self.client.force_authenticate(user=self.user)
+        response = self.queue('points.shp', b'data')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.client.force_authenticate(user=self.other_user)
+        response = self.queue('points.geojson', self.geojson)
+        self.assertIn(response.status_code, [status.HTTP_403_FORBIDDEN, status.HTTP_404_NOT_FOUND])
+    
+    def test_worker_runs_geojson_job(self):
+        """Test that the worker imports a queued file and records the result."""
+        self.client.force_authenticate(user=self.user)
+        job_id = self.queue('points.geojson', self.geojson).data['job_id']
+        
+        out = StringIO()
+        call_command('process_import_jobs', '--once', stdout=out)
+        
+        job = ImportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, ImportJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.processed_count, 3)
+        self.assertEqual(job.imported_count, 3)
+        self.assertFalse(job.file)
+        self.assertEqual(MapFeature.objects.filter(map=self.map).count(), 3)
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 3)
+        
+        url = reverse('memory_maps:import-job-detail', kwargs={'pk': job_id})
+        response = self.client.get(url)
+        self.assertEqual(response.data['imported_count'], 3)
+        self.assertTrue(response.data['is_finished'])
+    
+    def test_worker_runs_csv_job_with_errors(self):
+        """Test a CSV job with bad rows finishes as partially succeeded."""
+        self.client.force_authenticate(user=self.user)
+        content = b'y,x,title\n40.7,-74.0,Good\nbad,-74.0,Bad\n'
+        job_id = self.queue('points.csv', content, lat_col='y', lng_col='x', name_col='title').data['job_id']
+        
+        job = run_import_job(claim_next_job())
+        
+        self.assertEqual(job.pk, job_id)
+        self.assertEqual(job.status, ImportJob.STATUS_PARTIAL)
+        self.assertEqual(job.imported_count, 1)
+        self.assertEqual(len(job.errors), 1)
+        self.assertTrue(MapFeature.objects.filter(map=self.map, title='Good').exists())
+    
+    def test_progress_is_reported(self):
+        """Test that importers report progress through the callback."""
+        reports = []
+        importer = GeoJSONImporter(self.map, batch_size=2, progress_callback=lambda i: reports.append(i.processed))
+        
+        with mock.patch('memory_maps.gis_import.PROGRESS_INTERVAL', 1):
+            importer.import_from_string(self.geojson.decode('utf-8'))
+        
+        self.assertEqual(reports, [1, 2, 3])
+    
+    def test_claim_skips_running_jobs(self):
+        """Test that claimed jobs are not handed out twice."""
+        job = ImportJob.objects.create(
+            map=self.map,
+            created_by=self.user,
+            file_format='geojson',
+            file=SimpleUploadedFile('points.geojson', self.geojson),
+        )
+        
+        self.assertEqual(claim_next_job().pk, job.pk)
+        self.assertIsNone(claim_next_job())
+    
+    def test_stale_running_job_is_reclaimed(self):
+        """Test that a job left running by a dead worker is finished and its file deleted."""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        job = ImportJob.objects.create(
+            map=self.map,
+            created_by=self.user,
+            file_format='geojson',
+            file=SimpleUploadedFile('points.geojson', self.geojson),
+        )
+        claim_next_job()
+        storage, name = job.file.storage, job.file.name
+        
+        self.assertEqual(reclaim_stale_jobs(), 0)
+        
+        ImportJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(hours=3), imported_count=2
+        )
+        call_command('process_import_jobs', '--once', stdout=StringIO())
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_PARTIAL)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(len(job.errors), 1)
+        self.assertFalse(job.file)
+        self.assertFalse(storage.exists(name))
+    
+    def test_deleting_map_queues_job_file(self):
+        """Test that the upload of a queued job is deleted along with its map."""
+        from memory_maps.deletions import drain_storage_deletions
+        
+        job = ImportJob.objects.create(
+            map=self.map,
+            created_by=self.user,
+            file_format='geojson',
+            file=SimpleUploadedFile('points.geojson', self.geojson),
+        )
+        storage, name = job.file.storage, job.file.name
+        
+        self.map.delete()
+        self.assertTrue(storage.exists(name))
+        
+        drain_storage_deletions()
+        self.assertFalse(storage.exists(name))
+    
+    def test_jobs_are_private(self):
+        """Test that users can only see their own import jobs."""
+        ImportJob.objects.create(
+            map=self.map,
+            created_by=self.user,
+            file_format='geojson',
+            file=SimpleUploadedFile('points.geojson', self.geojson),
+        )
+        
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(reverse('memory_maps:import-job-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+
+
+# Streaming KML Import Tests
+
+import zipfile
+
+
+class StreamingKMLImportTest(TestCase):
+    """Test cases for importing KML/KMZ placemark by placemark."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+    
+    def build_kml(self, count):
+        """Helper method to build a KML document with nested folders."""
+        placemarks = ''.join(
+            f'<Placemark><name>Point {i}</name>'
+            f'<Point><coordinates>{-74 + i / 1000},40.7,0</coordinates></Point></Placemark>'
+            for i in range(count)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+            f'<Folder><name>Outer</name><Folder><name>Inner</name>{placemarks}</Folder></Folder>'
+            '</Document></kml>'
+        ).encode('utf-8')
+    
+    def test_import_many_placemarks(self):
+        """Test that every placemark in nested folders is imported."""
+        importer = KMLImporter(self.map)
+        count, errors, warnings = importer.import_from_file(BytesIO(self.build_kml(250)))
+        
+        self.assertEqual(count, 250)
+        self.assertEqual(errors, [])
+        self.assertEqual(importer.processed, 250)
+        self.assertTrue(MapFeature.objects.filter(map=self.map, title='Point 249').exists())
+    
+    def test_kmz_entry_is_streamed(self):
+        """Test that KMZ entries are opened as streams, not read whole."""
+        buffer = BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as kmz:
+            kmz.writestr('doc.kml', self.build_kml(3))
+        buffer.seek(0)
+        
+        importer = KMLImporter(self.map)
+        with mock.patch.object(zipfile.ZipFile, 'read', side_effect=AssertionError('read whole entry')):
+            count, errors, warnings = importer.import_from_file(buffer)
+        
+        self.assertEqual(count, 3)
+        self.assertEqual(errors, [])
+    
+    def test_truncated_kml_keeps_parsed_placemarks(self):
+        """Test that a document cut off part way reports the parse error."""
+        content = self.build_kml(5)
+        content = content[:content.index(b'<Placemark><name>Point 3')]
+        
+        importer = KMLImporter(self.map)
+        count, errors, warnings = importer.import_from_file(BytesIO(content))
+        
+        self.assertEqual(count, 3)
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith('Failed to parse KML'))
+    
+    def test_batched_kml_import(self):
+        """Test that KML placemarks can be written in batches."""
+        kml_content = b'''<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+  <Document>
+    <Placemark><name>One</name><Point><coordinates>-74.0,40.7,0</coordinates></Point></Placemark>
+    <Placemark><name>Empty</name></Placemark>
+    <Placemark><name>Two</name><LineString><coordinates>-74.0,40.7 -73.9,40.8</coordinates></LineString></Placemark>
+  </Document>
+</kml>'''
+        
+        importer = KMLImporter(self.map, batch_size=1)
+        count, errors, warnings = importer.import_from_file(BytesIO(kml_content))
+        
+        self.assertEqual(count, 2)
+        self.assertEqual(errors, [])
+        self.assertEqual(warnings, ["Placemark 'Empty' has no valid geometry"])
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 2)
+    
+    def test_batched_kml_validates_placemarks(self):
+        """Test that batched placemarks get the same validation as single saves."""
+        kml_content = b'''<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+  <Document>
+    <Placemark><name></name><Point><coordinates>-74.0,40.7,0</coordinates></Point></Placemark>
+    <Placemark><name>Good</name><Point><coordinates>-73.9,40.8,0</coordinates></Point></Placemark>
+  </Document>
+</kml>'''
+        
+        for batch_size in (None, 10):
+            importer = KMLImporter(self.map, batch_size=batch_size)
+            count, errors, warnings = importer.import_from_file(BytesIO(kml_content))
+            
+            self.assertEqual(count, 1)
+            self.assertEqual(len(errors), 1)
+            self.assertTrue(errors[0].startswith("Failed to import placemark ''"))
+            self.assertIn('title', errors[0])
+        
+        self.assertFalse(MapFeature.objects.filter(map=self.map, title='').exists())
+
+
+# Batched CSV Import Tests
+
+class BatchedCoordinateImporterTest(TestCase):
+    """Test cases for bulk CSV coordinate imports."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+    
+    def test_batched_import_matches_row_import(self):
+        """Test that batched rows produce the same features as row by row."""
+        csv_content = 'lat,lng,name\n40.7,-74.0,First\n40.8,-73.9,Second\n'
+        
+        count, errors, warnings = CoordinateImporter(self.map, batch_size=1).import_from_csv(csv_content)
+        
+        self.assertEqual(count, 2)
+        self.assertEqual(errors, [])
+        feature = MapFeature.objects.get(map=self.map, title='Second')
+        self.assertEqual(feature.feature_type, 'point')
+        self.assertEqual(feature.description, 'Imported from CSV: lat=40.8, lng=-73.9')
+        self.assertEqual((feature.bbox_min_lng, feature.bbox_max_lat), (-73.9, 40.8))
+        self.map.refresh_from_db()
+        self.assertEqual(self.map.feature_count, 2)
+    
+    def test_batched_import_reports_row_errors(self):
+        """Test that invalid rows are reported by row number and skipped."""
+        csv_content = (
+            'lat,lng,name\n'
+            '40.7,-74.0,Good\n'
+            'abc,-74.0,Bad number\n'
+            '91,-74.0,Bad latitude\n'
+            '40.7,-181,Bad longitude\n'
+            'nan,-74.0,Not a number\n'
+            '40.7,-74.0,\n'
+            '40.7\n'
+        )
+        
+        count, errors, warnings = CoordinateImporter(self.map, batch_size=2).import_from_csv(csv_content)
+        
+        self.assertEqual(count, 1)
+        self.assertEqual([error.split(':')[0] for error in errors],
+                         ['Row 2', 'Row 3', 'Row 4', 'Row 5', 'Row 6', 'Row 7'])
+        self.assertIn('Latitude 91.0 out of range', errors[1])
+        self.assertEqual(errors[4], 'Row 6: Name is empty')
+    
+    def test_batched_import_default_names(self):
+        """Test that rows get a default name without a name column."""
+        count, errors, warnings = CoordinateImporter(self.map, batch_size=10).import_from_csv('lat,lng\n1,2\n3,4\n')
+        
+        self.assertEqual(count, 2)
+        self.assertTrue(MapFeature.objects.filter(map=self.map, title='Point 2').exists())
+    
+    def test_import_from_file_streams_rows(self):
+        """Test importing from a binary file with a byte order mark."""
+        rows = ''.join(f'{i % 90},{i % 180},Point {i}\n' for i in range(2500))
+        csv_file = BytesIO(('\ufefflat,lng,name\n' + rows).encode('utf-8'))
+        
+        importer = CoordinateImporter(self.map, batch_size=1000)
+        count, errors, warnings = importer.import_from_file(csv_file)
+        
+        self.assertEqual(count, 2500)
+        self.assertEqual(errors, [])
+        self.assertFalse(csv_file.closed)
+        self.assertEqual(MapFeature.objects.filter(map=self.map).count(), 2500)
+    
+    def test_import_from_file_rejects_bad_encoding(self):
+        """Test that non UTF-8 files are rolled back and reported."""
+        csv_file = BytesIO(b'lat,lng,name\n1,2,ok\n3,4,caf\xe9\n')
+        
+        importer = CoordinateImporter(self.map, batch_size=1)
+        count, errors, warnings = importer.import_from_file(csv_file)
+        
+        self.assertEqual(count, 0)
+        self.assertEqual(errors, ['File must be UTF-8 encoded'])
+        self.assertEqual(MapFeature.objects.filter(map=self.map).count(), 0)
+    
+    def test_parse_failure_mid_file_rolls_back(self):
+        """Test that a CSV error after some batches reports nothing imported."""
+        rows = ''.join(f'{i},{i},Point {i}\n' for i in range(4))
+        # The name is longer than the csv module's default field size limit
+        csv_content = 'lat,lng,name\n' + rows + '5,5,' + 'x' * 200000 + '\n'
+        
+        importer = CoordinateImporter(self.map, batch_size=1)
+        count, errors, warnings = importer.import_from_csv(csv_content)
+        
+        self.assertEqual(count, 0)
+        self.assertEqual(importer.imported_features, [])
+        self.assertTrue(errors[0].startswith('Failed to parse CSV'))
+        self.assertEqual(self.map.feature_count, 0)
+        self.assertEqual(MapFeature.objects.filter(map=self.map).count(), 0)
+
+
+# Response Cache Tests
+
+from django.core.cache import cache
+
+
+class MapResponseCacheTest(APITestCase):
+    """Test cases for cached public map responses."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Public Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='Feature'
+        )
+    
+    def test_anonymous_reads_are_served_from_cache(self):
+        """Test that repeated public reads do not query the database."""
+        urls = [
+            reverse('memory_maps:map-detail', kwargs={'pk': self.map.id}),
+            reverse('memory_maps:map-features', kwargs={'pk': self.map.id}),
+            reverse('memory_maps:map-public-maps'),
+        ]
+        
+        for url in urls:
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(first.status_code, status.HTTP_200_OK)
+            self.assertEqual(first.data, second.data)
+    
+    def test_writes_invalidate_cached_responses(self):
+        """Test that saving features, stories and maps bumps the version."""
+        detail_url = reverse('memory_maps:map-detail', kwargs={'pk': self.map.id})
+        features_url = reverse('memory_maps:map-features', kwargs={'pk': self.map.id})
+        
+        self.client.get(features_url)
+        MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [0, 0]}),
+            title='Second'
+        )
+        self.assertEqual(self.client.get(features_url).data['count'], 2)
+        
+        self.client.get(features_url)
+        Story.objects.create(feature=self.feature, title='Story', content='Text', author=self.user)
+        response = self.client.get(features_url)
+        story_counts = {f['title']: f['story_count'] for f in response.data['results']}
+        self.assertEqual(story_counts['Feature'], 1)
+        
+        self.client.get(detail_url)
+        self.map.title = 'Renamed'
+        self.map.save()
+        self.assertEqual(self.client.get(detail_url).data['title'], 'Renamed')
+    
+    def test_private_maps_are_not_cached(self):
+        """Test that a map made private is no longer served from the cache."""
+        url = reverse('memory_maps:map-detail', kwargs={'pk': self.map.id})
+        self.client.get(url)
+        
+        self.map.is_public = False
+        self.map.save()
+        
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        
+        self.client.force_authenticate(user=self.user)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertGreater(len(queries), 0)
+    
+    def test_bulk_import_invalidates_cached_responses(self):
+        """Test that batched imports bump the version without post_save."""
+        url = reverse('memory_maps:map-features', kwargs={'pk': self.map.id})
+        self.client.get(url)
+        
+        CoordinateImporter(self.map, batch_size=10).import_from_csv('lat,lng,name\n1,2,a\n3,4,b\n')
+        
+        self.assertEqual(self.client.get(url).data['count'], 3)
+    
+    def test_map_delete_invalidates_once(self):
+        """Test that features deleted with their map do not each bump the version."""
+        for i in range(3):
+            MapFeature.objects.create(
+                map=self.map,
+                feature_type='point',
+                geometry=json.dumps({'type': 'Point', 'coordinates': [0.0, 0.0]}),
+                title=f'Extra {i}'
+            )
+        
+        map_id = self.map.pk
+        with mock.patch('memory_maps.signals.invalidate_map') as invalidate:
+            self.map.delete()
+        
+        invalidate.assert_called_once_with(map_id)
+
+
+# Conditional GET Tests
+
+class ConditionalGetTest(APITestCase):
+    """Test cases for ETag and Last-Modified support."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='Feature'
+        )
+        
+        self.client.force_authenticate(user=self.user)
+        self.urls = [
+            reverse('memory_maps:map-detail', kwargs={'pk': self.map.id}),
+            reverse('memory_maps:map-features', kwargs={'pk': self.map.id}),
+            reverse('memory_maps:feature-list') + f'?map_id={self.map.id}',
+        ]
+    
+    def test_unchanged_map_returns_not_modified(self):
+        """Test that a matching If-None-Match returns 304."""
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('ETag', response)
+            self.assertIn('Last-Modified', response)
+            self.assertIn('no-cache', response['Cache-Control'])
+            
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_if_modified_since(self):
+        """Test that If-Modified-Since is honoured without an ETag."""
+        response = self.client.get(self.urls[0])
+        
+        response = self.client.get(self.urls[0], HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_content_changes_update_etag(self):
+        """Test that new, edited and deleted content changes the ETag."""
+        etag = self.client.get(self.urls[2])['ETag']
+        
+        story = Story.objects.create(feature=self.feature, title='Story', content='Text', author=self.user)
+        response = self.client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        story.delete()
+        response = self.client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        self.feature.title = 'Renamed'
+        self.feature.save()
+        response = self.client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_photo_edits_update_etag(self):
+        """Test that editing a photo's caption changes the ETag of expanded listings."""
+        image = BytesIO()
+        Image.new('RGB', (10, 10)).save(image, 'JPEG')
+        photo = Photo.objects.create(
+            feature=self.feature,
+            image=SimpleUploadedFile('photo.jpg', image.getvalue(), content_type='image/jpeg'),
+            caption='Before',
+            uploaded_by=self.user
+        )
+        url = self.urls[2] + '&include=photos'
+        etag = self.client.get(url)['ETag']
+        
+        response = self.client.patch(
+            reverse('memory_maps:photo-detail', kwargs={'pk': photo.pk}), {'caption': 'After'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['photos'][0]['caption'], 'After')
+    
+    def test_private_maps_do_not_leak_validators(self):
+        """Test that other users cannot probe a private map's ETag."""
+        etag = self.client.get(self.urls[0])['ETag']
+        
+        other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.force_authenticate(user=other_user)
+        
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(self.urls[2], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+
+
+# Clustering Tests
+
+from memory_maps.clustering import CLUSTER_CELL_PX, CLUSTER_MAX_ZOOM, cluster_cell
+
+
+class MapClusterAPITest(APITestCase):
+    """Test cases for the point clustering endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        self.client = APIClient()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        
+        # A dense group near New York, a single point in London and a polygon
+        csv_content = 'lat,lng,name\n' + ''.join(
+            f'{40.71 + i * 0.001},{-74.00 + i * 0.001},NY {i}\n' for i in range(12)
+        ) + '51.5,-0.12,London\n'
+        CoordinateImporter(self.map, batch_size=100).import_from_csv(csv_content)
+        MapFeature.objects.create(
+            map=self.map,
+            feature_type='polygon',
+            geometry=json.dumps({
+                'type': 'Polygon',
+                'coordinates': [[[-74.0, 40.7], [-74.0, 40.8], [-73.9, 40.8], [-74.0, 40.7]]]
+            }),
+            title='Area'
+        )
+        self.url = reverse('memory_maps:map-clusters', kwargs={'pk': self.map.id})
+    
+    def test_low_zoom_returns_clusters(self):
+        """Test that nearby points are grouped at low zoom levels."""
+        response = self.client.get(self.url, {'zoom': 4})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['clustered'])
+        clusters = response.data['clusters']
+        self.assertEqual([c['count'] for c in clusters], [12, 1])
+        self.assertEqual(len(clusters[0]['ids']), 5)
+        self.assertAlmostEqual(clusters[0]['lat'], 40.7155, places=4)
+        self.assertAlmostEqual(clusters[1]['lng'], -0.12)
+    
+    def test_bbox_limits_clusters(self):
+        """Test that only points in the padded viewport are clustered."""
+        response = self.client.get(self.url, {'zoom': 4, 'bbox': '-80,35,-70,45'})
+        
+        self.assertEqual([c['count'] for c in response.data['clusters']], [12])
+    
+    def test_high_zoom_returns_points(self):
+        """Test that raw points are returned from CLUSTER_MAX_ZOOM."""
+        response = self.client.get(self.url, {'zoom': CLUSTER_MAX_ZOOM, 'bbox': '-74.01,40.70,-73.98,40.73'})
+        
+        self.assertFalse(response.data['clustered'])
+        titles = [feature['title'] for feature in response.data['features']]
+        self.assertEqual(len(titles), 12)
+        self.assertNotIn('Area', titles)
+    
+    def test_cluster_parameters_are_validated(self):
+        """Test that zoom is required and validated."""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'zoom': 99}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_cells_follow_web_mercator_pixels(self):
+        """Test that grid cells are square on screen and shrink with each zoom level."""
+        cells_across = 256 * 2 ** 6 // CLUSTER_CELL_PX
+        self.assertEqual(cluster_cell(-180, 85.06, 6), (0, 0))
+        self.assertEqual(cluster_cell(0, 0, 6), (cells_across // 2, cells_across // 2))
+        self.assertEqual(cluster_cell(0, 0, 7), (cells_across, cells_across))
+        
+        # Cells span fewer degrees of latitude away from the equator
+        self.assertEqual(cluster_cell(10, 0.05, 6), cluster_cell(10, 0.45, 6))
+        self.assertNotEqual(cluster_cell(10, 70.0, 6), cluster_cell(10, 70.4, 6))
+        
+        MapFeature.objects.filter(map=self.map).delete()
+        CoordinateImporter(self.map, batch_size=100).import_from_csv(
+            'lat,lng,name\n0.05,10,Equator A\n0.45,10,Equator B\n70.0,10,North A\n70.4,10,North B\n'
+        )
+        response = self.client.get(self.url, {'zoom': 6})
+        self.assertEqual([c['count'] for c in response.data['clusters']], [2, 1, 1])
+
+
+# Geometry Simplification Tests
+
+from memory_maps.spatial import douglas_peucker, simplify_geojson
+
+
+class GeometrySimplificationTest(APITestCase):
+    """Test cases for the simplify and precision query parameters."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        
+        # A line with many nearly collinear vertices
+        self.line = MapFeature.objects.create(
+            map=self.map,
+            feature_type='line',
+            geometry=json.dumps({
+                'type': 'LineString',
+                'coordinates': [[-74.0 + i * 0.001, 40.7 + (i % 2) * 0.00001] for i in range(101)]
+            }),
+            title='Wiggly Line'
+        )
+    
+    def test_douglas_peucker_drops_close_points(self):
+        """Test that points within the tolerance are removed."""
+        points = [[0, 0], [1, 0.01], [2, -0.01], [3, 5], [4, 6], [5, 7]]
+        
+        self.assertEqual(douglas_peucker(points, 0.1), [[0, 0], [2, -0.01], [3, 5], [5, 7]])
+        self.assertEqual(douglas_peucker(points, 0), points)
+    
+    def test_simplify_geojson_keeps_rings_closed(self):
+        """Test that polygon rings never collapse below four points."""
+        polygon = {
+            'type': 'Polygon',
+            'coordinates': [[[0, 0], [0.0001, 0], [0.0001, 0.0001], [0, 0]]]
+        }
+        
+        simplified = simplify_geojson(polygon, tolerance=1.0, precision=2)
+        
+        self.assertEqual(len(simplified['coordinates'][0]), 4)
+        self.assertEqual(simplified['coordinates'][0][1], [0.0, 0])
+    
+    def test_list_simplifies_geometry(self):
+        """Test that ?simplify= reduces the vertices in feature listings."""
+        url = reverse('memory_maps:feature-list')
+        response = self.client.get(url, {'map_id': self.map.id, 'simplify': '0.001'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        geometry = json.loads(response.data['results'][0]['geometry'])
+        self.assertEqual(len(geometry['coordinates']), 2)
+        
+        # The stored geometry is unchanged
+        self.line.refresh_from_db()
+        self.assertEqual(len(json.loads(self.line.geometry)['coordinates']), 101)
+    
+    def test_map_features_precision_and_auto_tolerance(self):
+        """Test zoom-derived tolerance and coordinate rounding on map features."""
+        url = reverse('memory_maps:map-features', kwargs={'pk': self.map.id})
+        
+        response = self.client.get(url, {'simplify': 'auto', 'zoom': 20, 'precision': 3})
+        geometry = json.loads(response.data['results'][0]['geometry'])
+        self.assertEqual(len(geometry['coordinates']), 101)
+        self.assertEqual(geometry['coordinates'][1], [-73.999, 40.7])
+        
+        response = self.client.get(url, {'simplify': 'auto', 'zoom': 5})
+        geometry = json.loads(response.data['results'][0]['geometry'])
+        self.assertEqual(len(geometry['coordinates']), 2)
+    
+    def test_geometry_parameters_are_validated(self):
+        """Test that invalid simplify and precision values are rejected."""
+        url = reverse('memory_maps:feature-list')
+        
+        for params in ({'simplify': 'auto'}, {'simplify': '-1'}, {'simplify': 'abc'},
+                       {'precision': '16'}, {'precision': 'x'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+# Stored Geometry Level Tests
+
+from memory_maps.simplify import geometry_column
+
+
+class GeometryLevelTest(TestCase):
+    """Test cases for the stored simplified geometry columns."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        
+        # Vertices 0.001 degrees apart wiggling by 0.00001 degrees
+        self.wiggly = {
+            'type': 'LineString',
+            'coordinates': [[-74.0 + i * 0.001, 40.7 + (i % 2) * 0.00001] for i in range(101)]
+        }
+    
+    def test_levels_filled_on_save(self):
+        """Test that saving a feature stores its simplified geometries."""
+        feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='line',
+            geometry=json.dumps(self.wiggly),
+            title='Wiggly Line'
+        )
+        feature.refresh_from_db()
+        
+        self.assertEqual(len(json.loads(feature.geometry_low)['coordinates']), 2)
+        self.assertEqual(len(json.loads(feature.geometry_mid)['coordinates']), 2)
+    
+    def test_levels_empty_when_nothing_to_simplify(self):
+        """Test that points and already simple lines store no copies."""
+        point = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0, 40.7]}),
+            title='Point'
+        )
+        line = MapFeature.objects.create(
+            map=self.map,
+            feature_type='line',
+            geometry=json.dumps({'type': 'LineString', 'coordinates': [[-74.0, 40.7], [-73.0, 41.7]]}),
+            title='Straight Line'
+        )
+        
+        for feature in (point, line):
+            feature.refresh_from_db()
+            self.assertIsNone(feature.geometry_low)
+            self.assertIsNone(feature.geometry_mid)
+    
+    def test_importer_fills_levels(self):
+        """Test that batched imports store simplified geometries."""
+        geojson = json.dumps({
+            'type': 'FeatureCollection',
+            'features': [{'type': 'Feature', 'geometry': self.wiggly, 'properties': {'name': 'Imported'}}]
+        })
+        GeoJSONImporter(self.map, batch_size=10).import_from_string(geojson)
+        
+        feature = MapFeature.objects.get(title='Imported')
+        self.assertEqual(len(json.loads(feature.geometry_low)['coordinates']), 2)
+    
+    def test_backfill_command(self):
+        """Test that simplify_geometries fills missing columns."""
+        feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='line',
+            geometry=json.dumps(self.wiggly),
+            title='Wiggly Line'
+        )
+        MapFeature.objects.update(geometry_low=None, geometry_mid=None)
+        
+        out = StringIO()
+        call_command('simplify_geometries', map_id=self.map.id, stdout=out)
+        
+        feature.refresh_from_db()
+        self.assertIsNotNone(feature.geometry_low)
+        self.assertIn('Simplified 1 feature(s)', out.getvalue())
+    
+    def test_geometry_column_by_zoom(self):
+        """Test that zoom bands map to the stored columns."""
+        self.assertEqual(geometry_column(0), 'geometry_low')
+        self.assertEqual(geometry_column(6), 'geometry_low')
+        self.assertEqual(geometry_column(7), 'geometry_mid')
+        self.assertEqual(geometry_column(11), 'geometry_mid')
+        self.assertEqual(geometry_column(12), 'geometry')
+
+
+# GeoJSON Export Tests
+
+from memory_maps import gis_export
+
+
+class GeoJSONExportTest(APITestCase):
+    """Test cases for the streaming GeoJSON export endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        
+        csv_content = 'lat,lng,name\n' + ''.join(
+            f'{40.0 + i * 0.01},{-74.0 + i * 0.01},Point {i}\n' for i in range(7)
+        )
+        CoordinateImporter(self.map, batch_size=100).import_from_csv(csv_content)
+        MapFeature.objects.create(
+            map=self.map,
+            feature_type='line',
+            geometry=json.dumps({
+                'type': 'LineString',
+                'coordinates': [[-74.0 + i * 0.001, 40.7 + (i % 2) * 0.00001] for i in range(101)]
+            }),
+            title='Wiggly Line',
+            category='walk'
+        )
+        self.url = reverse('memory_maps:map-export-geojson', kwargs={'pk': self.map.id})
+    
+    def get_collection(self, response):
+        """Join a streamed response and parse it."""
+        return json.loads(b''.join(response.streaming_content))
+    
+    def test_export_streams_feature_collection(self):
+        """Test that every feature is exported in id order."""
+        with mock.patch.object(gis_export, 'WRITE_BATCH_SIZE', 3):
+            response = self.client.get(self.url)
+            
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/geo+json')
+            self.assertIn('filename="test-map.geojson"', response['Content-Disposition'])
+            collection = self.get_collection(response)
+        
+        self.assertEqual(collection['type'], 'FeatureCollection')
+        self.assertEqual(collection['name'], 'Test Map')
+        features = collection['features']
+        self.assertEqual(len(features), 8)
+        self.assertEqual([f['id'] for f in features], sorted(f['id'] for f in features))
+        self.assertEqual(features[0]['geometry']['type'], 'Point')
+        self.assertEqual(features[-1]['properties']['title'], 'Wiggly Line')
+        self.assertEqual(features[-1]['properties']['category'], 'walk')
+    
+    def test_export_urls_end_in_extension(self):
+        """Test that exports are addressed like files, without a trailing slash."""
+        for extension in ('geojson', 'kml', 'kmz', 'csv', 'fgb'):
+            url = reverse(f'memory_maps:map-export-{extension}', kwargs={'pk': self.map.id})
+            self.assertTrue(url.endswith(f'/maps/{self.map.id}/export.{extension}'))
+        
+        response = self.client.get(self.url + '/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_export_round_trips_through_importer(self):
+        """Test that an export can be imported into another map."""
+        other = Map.objects.create(title='Copy', owner=self.user, center_lat=0, center_lng=0)
+        body = b''.join(self.client.get(self.url).streaming_content).decode('utf-8')
+        
+        count, errors, warnings = GeoJSONImporter(other).import_from_string(body)
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(count, 8)
+    
+    def test_export_applies_simplification(self):
+        """Test the simplify and precision parameters."""
+        response = self.client.get(self.url, {'simplify': 'auto', 'zoom': 5, 'precision': 2})
+        line = self.get_collection(response)['features'][-1]['geometry']
+        
+        self.assertEqual(line['coordinates'], [[-74.0, 40.7], [-73.9, 40.7]])
+    
+    def test_export_conditional_get(self):
+        """Test that an unchanged map answers 304 Not Modified."""
+        response = self.client.get(self.url)
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_private_map_export_hidden(self):
+        """Test that private maps cannot be exported by other users."""
+        self.map.is_public = False
+        self.map.save()
+        
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+# KML and CSV Export Tests
+
+import csv
+from memory_maps.gis_export import geojson_to_kml
+
+
+class KMLCSVExportTest(APITestCase):
+    """Test cases for the KML, KMZ and CSV export endpoints."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        
+        MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0, 40.7]}),
+            title='Cafe & Bar',
+            description='<b>Open late</b>',
+            category='food'
+        )
+        MapFeature.objects.create(
+            map=self.map,
+            feature_type='polygon',
+            geometry=json.dumps({
+                'type': 'Polygon',
+                'coordinates': [[[-74.0, 40.0], [-72.0, 40.0], [-72.0, 42.0], [-74.0, 40.0]]]
+            }),
+            title='Park'
+        )
+    
+    def download(self, name):
+        """Fetch an export and join the streamed body."""
+        url = reverse(f'memory_maps:map-export-{name}', kwargs={'pk': self.map.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content)
+    
+    def test_kml_export_round_trips(self):
+        """Test that exported KML is read back by KMLImporter."""
+        response, body = self.download('kml')
+        
+        self.assertEqual(response['Content-Type'], 'application/vnd.google-earth.kml+xml')
+        self.assertIn(b'<name>Cafe &amp; Bar</name>', body)
+        self.assertIn(b'<Data name="category"><value>food</value></Data>', body)
+        
+        other = Map.objects.create(title='Copy', owner=self.user, center_lat=0, center_lng=0)
+        count, errors, warnings = KMLImporter(other).import_from_file(BytesIO(body))
+        self.assertEqual((count, errors, warnings), (2, [], []))
+        self.assertEqual(
+            sorted(other.features.values_list('feature_type', flat=True)),
+            ['point', 'polygon']
+        )
+    
+    def test_kmz_export_is_zipped_kml(self):
+        """Test that the KMZ archive contains doc.kml."""
+        response, body = self.download('kmz')
+        
+        with zipfile.ZipFile(BytesIO(body)) as archive:
+            self.assertEqual(archive.namelist(), ['doc.kml'])
+            self.assertIn(b'<Placemark', archive.read('doc.kml'))
+        
+        other = Map.objects.create(title='Copy', owner=self.user, center_lat=0, center_lng=0)
+        count, errors, warnings = KMLImporter(other).import_from_file(BytesIO(body))
+        self.assertEqual(count, 2)
+    
+    def test_csv_export_round_trips(self):
+        """Test that exported CSV is read back by CoordinateImporter."""
+        response, body = self.download('csv')
+        
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(body.decode('utf-8'))))
+        self.assertEqual([row['name'] for row in rows], ['Cafe & Bar', 'Park'])
+        self.assertEqual((rows[0]['lat'], rows[0]['lng']), ('40.7', '-74.0'))
+        self.assertEqual((rows[1]['lat'], rows[1]['lng']), ('41.0', '-73.0'))
+        self.assertEqual(rows[0]['category'], 'food')
+        
+        other = Map.objects.create(title='Copy', owner=self.user, center_lat=0, center_lng=0)
+        count, errors, warnings = CoordinateImporter(other).import_from_csv(body.decode('utf-8'))
+        self.assertEqual((count, errors), (2, []))
+    
+    def test_geojson_to_kml_multi_geometry(self):
+        """Test conversion of multi-part geometries."""
+        kml = geojson_to_kml({'type': 'MultiPoint', 'coordinates': [[1.0, 2.0], [3.0, 4.0]]})
+        
+        self.assertEqual(
+            kml,
+            '<MultiGeometry><Point><coordinates>1.0,2.0</coordinates></Point>'
+            '<Point><coordinates>3.0,4.0</coordinates></Point></MultiGeometry>'
+        )
+
+
+# FlatGeobuf Tests
+
+from unittest import skipUnless
+from memory_maps.gis_export import FlatGeobufExporter
+from memory_maps.gis_import import FlatGeobufImporter
+
+
+@skipUnless(FlatGeobufExporter.available(), "Fiona is not installed")
+class FlatGeobufTest(APITestCase):
+    """Test cases for FlatGeobuf export and import."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        
+        MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0, 40.7]}),
+            title='Cafe',
+            category='food'
+        )
+        MapFeature.objects.create(
+            map=self.map,
+            feature_type='polygon',
+            geometry=json.dumps({
+                'type': 'Polygon',
+                'coordinates': [[[-74.0, 40.0], [-72.0, 40.0], [-72.0, 42.0], [-74.0, 40.0]]]
+            }),
+            title='Park'
+        )
+    
+    def export(self):
+        """Download the map as FlatGeobuf."""
+        url = reverse('memory_maps:map-export-fgb', kwargs={'pk': self.map.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('filename="test-map.fgb"', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+    
+    def test_export_is_indexed_flatgeobuf(self):
+        """Test that the export is a FlatGeobuf file readable by bbox."""
+        import fiona
+        
+        body = self.export()
+        self.assertEqual(body[:3], b'fgb')
+        
+        with fiona.io.MemoryFile(body) as memfile:
+            with memfile.open(driver='FlatGeobuf') as collection:
+                self.assertEqual(len(collection), 2)
+                titles = [f['properties']['title'] for f in collection.filter(bbox=(-74.1, 40.6, -73.9, 40.8))]
+        self.assertIn('Cafe', titles)
+    
+    def test_import_round_trip(self):
+        """Test that an exported file imports into another map."""
+        other = Map.objects.create(title='Copy', owner=self.user, center_lat=0, center_lng=0)
+        upload = SimpleUploadedFile('copy.fgb', self.export())
+        
+        url = reverse('memory_maps:map-import-flatgeobuf', kwargs={'pk': other.id})
+        response = self.client.post(url, {'file': upload}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(
+            sorted(other.features.values_list('title', 'category')),
+            [('Cafe', 'food'), ('Park', '')]
+        )
+    
+    def test_import_invalid_file(self):
+        """Test that a file that is not FlatGeobuf is rejected."""
+        importer = FlatGeobufImporter(self.map, batch_size=10)
+        count, errors, warnings = importer.import_from_file(BytesIO(b'not a flatgeobuf file'))
+        
+        self.assertEqual(count, 0)
+        self.assertTrue(errors[0].startswith('Failed to read FlatGeobuf'))
+
+
+# Cursor Pagination Tests
+
+from datetime import timedelta
+from django.utils import timezone
+
+
+class CursorPaginationTest(APITestCase):
+    """Test cases for keyset pagination of feature listings."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060,
+            is_public=True
+        )
+        
+        csv_content = 'lat,lng,name\n' + ''.join(f'40.7,-74.0,Point {i}\n' for i in range(45))
+        CoordinateImporter(self.map, batch_size=100).import_from_csv(csv_content)
+        self.url = reverse('memory_maps:feature-list')
+    
+    def test_cursor_pages_cover_every_feature_once(self):
+        """Test that following 'next' links returns each feature exactly once."""
+        # Identical timestamps, so pages depend on the id tie-breaker
+        self.map.features.update(created_at=timezone.now())
+        
+        response = self.client.get(self.url, {'map_id': self.map.id, 'pagination': 'cursor'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+        
+        ids = []
+        pages = 0
+        while True:
+            pages += 1
+            ids.extend(feature['id'] for feature in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(ids), sorted(self.map.features.values_list('id', flat=True)))
+        self.assertEqual(ids, sorted(ids))
+    
+    def test_cursor_pages_do_not_offset(self):
+        """Test that a deep page is fetched without OFFSET or COUNT."""
+        now = timezone.now()
+        for i, pk in enumerate(self.map.features.values_list('id', flat=True)):
+            MapFeature.objects.filter(pk=pk).update(created_at=now - timedelta(seconds=i))
+        
+        first = self.client.get(self.url, {'map_id': self.map.id, 'pagination': 'cursor'})
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        
+        sql = ' '.join(query['sql'] for query in queries.captured_queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+    
+    def test_page_numbers_still_default(self):
+        """Test that page-number pagination is unchanged without the opt-in."""
+        response = self.client.get(self.url, {'map_id': self.map.id, 'page': 2})
+        
+        self.assertEqual(response.data['count'], 45)
+        self.assertEqual(len(response.data['results']), 20)
+
+
+# Photo Rendition Tests
+
+import shutil
+import tempfile
+from django.test import override_settings
+from memory_maps.renditions import claim_pending_photo, process_photo, supported_renditions
+
+
+class PhotoRenditionTest(APITestCase):
+    """Test cases for the photo thumbnail and rendition pipeline."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='Feature'
+        )
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def upload(self, size=(2000, 1000)):
+        """Upload a photo through the API."""
+        file = BytesIO()
+        Image.new('RGB', size, 'blue').save(file, 'JPEG')
+        image = SimpleUploadedFile('beach.jpg', file.getvalue(), content_type='image/jpeg')
+        
+        response = self.client.post(
+            reverse('memory_maps:photo-list'),
+            {'feature': self.feature.id, 'image': image},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+    
+    def test_renditions_generated_off_request(self):
+        """Test that renditions are pending after upload and ready after processing."""
+        response = self.upload()
+        self.assertEqual(response.data['rendition_status'], 'pending')
+        self.assertEqual(response.data['renditions'], {})
+        
+        photo = claim_pending_photo()
+        self.assertEqual(photo.pk, response.data['id'])
+        self.assertIsNone(claim_pending_photo())
+        process_photo(photo)
+        
+        photo.refresh_from_db()
+        self.assertEqual(photo.rendition_status, Photo.RENDITIONS_READY)
+        self.assertEqual(set(photo.renditions), {name for name, _, _ in supported_renditions()})
+        
+        thumbnail = photo.renditions['thumbnail']
+        self.assertTrue(thumbnail.startswith(os.path.dirname(photo.image.name) + '/renditions/'))
+        with photo.image.storage.open(thumbnail) as file:
+            self.assertEqual(Image.open(file).size, (320, 160))
+        
+        response = self.client.get(reverse('memory_maps:photo-detail', kwargs={'pk': photo.pk}))
+        self.assertTrue(response.data['renditions']['thumbnail'].endswith('beach_thumbnail.jpg'))
+    
+    def test_delete_removes_renditions(self):
+        """Test that deleting a photo removes its renditions from storage."""
+        from memory_maps.deletions import drain_storage_deletions
+        
+        self.upload()
+        photo = process_photo(claim_pending_photo())
+        storage = photo.image.storage
+        paths = list(photo.renditions.values())
+        
+        photo.delete()
+        drain_storage_deletions()
+        
+        self.assertFalse(any(storage.exists(path) for path in paths))
+    
+    def test_unreadable_image_marks_failure(self):
+        """Test that a failed rendition is recorded instead of retried forever."""
+        self.upload()
+        photo = claim_pending_photo()
+        
+        with mock.patch('memory_maps.renditions.render', side_effect=OSError('broken')):
+            with self.assertLogs('memory_maps.renditions', 'ERROR'):
+                process_photo(photo)
+        
+        photo.refresh_from_db()
+        self.assertEqual(photo.rendition_status, Photo.RENDITIONS_FAILED)
+        self.assertIsNone(claim_pending_photo())
+    
+    def test_stale_claim_is_queued_again(self):
+        """Test that a photo left processing by a dead worker is picked up again."""
+        self.upload()
+        photo = claim_pending_photo()
+        
+        call_command('process_photo_renditions', '--once', stdout=StringIO())
+        photo.refresh_from_db()
+        self.assertEqual(photo.rendition_status, Photo.RENDITIONS_PROCESSING)
+        
+        Photo.objects.filter(pk=photo.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        out = StringIO()
+        call_command('process_photo_renditions', '--once', stdout=out)
+        
+        photo.refresh_from_db()
+        self.assertEqual(photo.rendition_status, Photo.RENDITIONS_READY)
+        self.assertIn('Queued 1 photo(s)', out.getvalue())
+
+
+# =============================================================================
+# Direct Upload Tests
+# =============================================================================
+
+try:
+    import boto3
+    from moto import mock_aws
+except ImportError:
+    mock_aws = None
+
+S3_TEST_STORAGES = {
+    'default': {
+        'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+
+@skipUnless(mock_aws, "moto is not installed")
+class DirectPhotoUploadTest(APITestCase):
+    """Test cases for presigned direct-to-storage photo uploads, against moto's S3."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.mock = mock_aws()
+        self.mock.start()
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='memory-maps-test')
+        # Configured like production settings, through the AWS_* settings
+        self.settings_override = override_settings(
+            STORAGES=S3_TEST_STORAGES,
+            AWS_STORAGE_BUCKET_NAME='memory-maps-test',
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+            AWS_S3_REGION_NAME='us-east-1',
+        )
+        self.settings_override.enable()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='Feature'
+        )
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        self.mock.stop()
+    
+    def request_upload(self, filename='beach.jpg'):
+        """Ask for a presigned upload."""
+        return self.client.post(
+            reverse('memory_maps:photo-list') + 'upload_url/',
+            {'feature': self.feature.id, 'filename': filename},
+            format='json'
+        )
+    
+    def send_to_storage(self, upload):
+        """Upload an image to the bucket as the browser would, with the presigned POST."""
+        import requests
+        
+        file = BytesIO()
+        Image.new('RGB', (50, 50), 'blue').save(file, 'JPEG')
+        return requests.post(upload['url'], data=upload['fields'], files={'file': ('beach.jpg', file.getvalue())})
+    
+    def finalize(self, key, **extra):
+        return self.client.post(
+            reverse('memory_maps:photo-list') + 'finalize/',
+            {'feature': self.feature.id, 'key': key, **extra},
+            format='json'
+        )
+    
+    def test_upload_and_finalize(self):
+        """A presigned upload followed by finalize creates the photo."""
+        response = self.request_upload()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        upload = response.data
+        self.assertTrue(upload['key'].startswith(f'photos/{self.user.id}/{self.map.id}/beach_'))
+        self.assertEqual(upload['fields']['Content-Type'], 'image/jpeg')
+        
+        self.assertLess(self.send_to_storage(upload).status_code, 300)
+        
+        response = self.finalize(upload['key'], caption='Sunset')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        photo = Photo.objects.get(id=response.data['id'])
+        self.assertEqual(photo.image.name, upload['key'])
+        self.assertEqual(photo.caption, 'Sunset')
+        self.assertEqual(photo.uploaded_by, self.user)
+        self.assertEqual(photo.rendition_status, Photo.RENDITIONS_PENDING)
+        
+        # Finalizing the same object twice is rejected
+        self.assertEqual(self.finalize(upload['key']).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_policy_conditions(self):
+        """The presigned POST policy pins the key and content type and caps the size."""
+        import base64
+        from memory_maps.uploads import MAX_PHOTO_SIZE
+        
+        upload = self.request_upload().data
+        policy = json.loads(base64.b64decode(upload['fields']['policy']))
+        self.assertIn({'Content-Type': 'image/jpeg'}, policy['conditions'])
+        self.assertIn({'key': upload['key']}, policy['conditions'])
+        self.assertIn(['content-length-range', 1, MAX_PHOTO_SIZE], policy['conditions'])
+    
+    def test_finalize_requires_uploaded_object(self):
+        """Finalize fails until the object exists in the bucket."""
+        upload = self.request_upload().data
+        response = self.finalize(upload['key'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Photo.objects.exists())
+    
+    def test_finalize_rejects_foreign_keys(self):
+        """Keys outside the user's upload directory cannot be claimed."""
+        response = self.finalize('photos/999/1/other.jpg')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('key', response.data)
+    
+    def test_upload_url_validation(self):
+        """Unsupported extensions and other users' features are refused."""
+        self.assertEqual(self.request_upload('notes.txt').status_code, status.HTTP_400_BAD_REQUEST)
+        
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.request_upload().status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_read_photo_gps_from_s3(self):
+        """Photo locations are read from the start of the object with a ranged GET."""
+        from memory_maps.geotag import read_photo_gps
+        
+        upload = self.request_upload().data
+        boto3.client('s3', region_name='us-east-1').put_object(
+            Bucket='memory-maps-test', Key=upload['key'],
+            Body=geotagged_jpeg(48.8584, 2.2945), ContentType='image/jpeg'
+        )
+        photo = Photo(feature=self.feature, uploaded_by=self.user)
+        photo.image.name = upload['key']
+        
+        lat, lng = read_photo_gps(photo)
+        self.assertAlmostEqual(lat, 48.8584, places=4)
+        self.assertAlmostEqual(lng, 2.2945, places=4)
+    
+    def test_drain_uses_delete_objects(self):
+        """Queued files are removed from the bucket with one DeleteObjects request per batch."""
+        from memory_maps.deletions import drain_storage_deletions, queue_photo_files
+        from memory_maps.models import StorageDeletion
+        
+        s3 = boto3.client('s3', region_name='us-east-1')
+        names = [f'photos/{self.user.id}/{self.map.id}/old{i}.jpg' for i in range(5)]
+        for name in names:
+            s3.put_object(Bucket='memory-maps-test', Key=name, Body=b'x')
+        queue_photo_files([(name, {}) for name in names])
+        
+        storage = Photo._meta.get_field('image').storage
+        client = storage.bucket.meta.client
+        with mock.patch.object(client, 'delete_objects', wraps=client.delete_objects) as delete_objects:
+            self.assertEqual(drain_storage_deletions(), (5, 0, 0))
+        delete_objects.assert_called_once()
+        
+        self.assertEqual(s3.list_objects_v2(Bucket='memory-maps-test').get('KeyCount'), 0)
+        self.assertFalse(StorageDeletion.objects.exists())
+    
+    def test_local_storage_not_supported(self):
+        """Servers storing photos on the filesystem answer 501."""
+        self.settings_override.disable()
+        try:
+            self.assertEqual(self.request_upload().status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        finally:
+            self.settings_override.enable()
+
+
+# =============================================================================
+# Batch Photo Upload Tests
+# =============================================================================
+
+class BatchPhotoUploadTest(APITestCase):
+    """Test cases for the batch photo upload endpoint."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='Feature'
+        )
+        self.url = reverse('memory_maps:photo-list') + 'batch/'
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def image(self, name='beach.jpg'):
+        file = BytesIO()
+        Image.new('RGB', (40, 30), 'blue').save(file, 'JPEG')
+        return SimpleUploadedFile(name, file.getvalue(), content_type='image/jpeg')
+    
+    def test_batch_upload(self):
+        """All photos are stored and inserted, with captions in order."""
+        images = [self.image(f'photo{i}.jpg') for i in range(5)]
+        response = self.client.post(self.url, {
+            'feature': self.feature.id,
+            'images': images,
+            'captions': [f'Caption {i}' for i in range(5)],
+        }, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['imported'], 5)
+        self.assertEqual([r['filename'] for r in response.data['results']], [f'photo{i}.jpg' for i in range(5)])
+        
+        for i, result in enumerate(response.data['results']):
+            photo = Photo.objects.get(id=result['id'])
+            self.assertEqual(photo.caption, f'Caption {i}')
+            self.assertEqual(photo.uploaded_by, self.user)
+            self.assertTrue(photo.image.storage.exists(photo.image.name))
+        
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.photo_count, 5)
+    
+    def test_partial_failure(self):
+        """Invalid files are reported per file while the rest are saved."""
+        bad = SimpleUploadedFile('notes.jpg', b'not an image', content_type='image/jpeg')
+        response = self.client.post(self.url, {
+            'feature': self.feature.id,
+            'images': [self.image(), bad],
+        }, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        first, second = response.data['results']
+        self.assertTrue(first['success'])
+        self.assertFalse(second['success'])
+        self.assertIn('image', second['errors'])
+        self.assertEqual(Photo.objects.count(), 1)
+    
+    def test_requires_map_owner(self):
+        """Other users cannot upload photos to the feature."""
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        response = self.client.post(self.url, {
+            'feature': self.feature.id,
+            'images': [self.image(), self.image()],
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Photo.objects.exists())
+    
+    def test_single_insert(self):
+        """Photo rows are written with one INSERT however many files are sent."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                'feature': self.feature.id,
+                'images': [self.image(f'photo{i}.jpg') for i in range(4)],
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "memory_maps_photo"')]
+        self.assertEqual(len(inserts), 1)
+
+
+# =============================================================================
+# Photo Geotagging Tests
+# =============================================================================
+
+from django.core.management import call_command
+from PIL import ExifTags
+from memory_maps.geotag import read_gps, distance_m
+
+
+def geotagged_jpeg(lat, lng, size=(40, 30)):
+    """Build JPEG bytes carrying a GPS location in their EXIF data."""
+    def dms(value):
+        value = abs(value)
+        degrees = int(value)
+        minutes = int((value - degrees) * 60)
+        return (float(degrees), float(minutes), round((value - degrees - minutes / 60) * 3600, 4))
+    
+    exif = Image.Exif()
+    exif[ExifTags.Base.GPSInfo] = {
+        ExifTags.GPS.GPSLatitudeRef: 'N' if lat >= 0 else 'S',
+        ExifTags.GPS.GPSLatitude: dms(lat),
+        ExifTags.GPS.GPSLongitudeRef: 'E' if lng >= 0 else 'W',
+        ExifTags.GPS.GPSLongitude: dms(lng),
+    }
+    file = BytesIO()
+    Image.new('RGB', size, 'green').save(file, 'JPEG', exif=exif)
+    return file.getvalue()
+
+
+class PhotoGeotagTest(APITestCase):
+    """Test cases for reading photo locations and placing photos on point features."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='New York'
+        )
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def upload_batch(self, locations, **extra):
+        images = [
+            SimpleUploadedFile(f'photo{i}.jpg', geotagged_jpeg(*location), content_type='image/jpeg')
+            for i, location in enumerate(locations)
+        ]
+        return self.client.post(
+            reverse('memory_maps:photo-list') + 'batch/',
+            {'feature': self.feature.id, 'images': images, **extra},
+            format='multipart'
+        )
+    
+    def test_read_gps(self):
+        """Locations are read from EXIF headers, including southern and western hemispheres."""
+        lat, lng = read_gps(BytesIO(geotagged_jpeg(-33.8568, 151.2153)))
+        self.assertAlmostEqual(lat, -33.8568, places=4)
+        self.assertAlmostEqual(lng, 151.2153, places=4)
+        
+        lat, lng = read_gps(BytesIO(geotagged_jpeg(40.7128, -74.0060)))
+        self.assertAlmostEqual(lat, 40.7128, places=4)
+        self.assertAlmostEqual(lng, -74.0060, places=4)
+    
+    def test_read_gps_without_location(self):
+        """Images without GPS data, or with a zero fix, have no location."""
+        file = BytesIO()
+        Image.new('RGB', (10, 10)).save(file, 'JPEG')
+        self.assertIsNone(read_gps(BytesIO(file.getvalue())))
+        self.assertIsNone(read_gps(BytesIO(geotagged_jpeg(0, 0))))
+        self.assertIsNone(read_gps(BytesIO(b'not an image')))
+    
+    def test_distance(self):
+        """Distances use the haversine formula."""
+        self.assertAlmostEqual(distance_m(0, 0, 1, 0), 111195, delta=10)
+        self.assertAlmostEqual(distance_m(40.7128, -74.0060, 40.7128, -74.0060), 0)
+    
+    def test_batch_records_location(self):
+        """Batch uploads store each photo's location without moving it by default."""
+        response = self.upload_batch([(48.8584, 2.2945)])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        photo = Photo.objects.get()
+        self.assertTrue(photo.geotag_checked)
+        self.assertAlmostEqual(photo.latitude, 48.8584, places=4)
+        self.assertEqual(photo.feature, self.feature)
+    
+    def test_batch_place(self):
+        """Photos away from the feature are matched to, or create, nearby point features."""
+        cafe = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-73.9855, 40.7580]}),
+            title='Cafe'
+        )
+        response = self.upload_batch([
+            (40.7128, -74.0060),   # At the feature
+            (40.7581, -73.9856),   # About 14m from the cafe
+            (48.8584, 2.2945),     # Paris, no feature yet
+            (48.8585, 2.2946),     # Paris again, same spot
+        ], place='true')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        features = [result['feature'] for result in response.data['results']]
+        self.assertEqual(features[0], self.feature.id)
+        self.assertEqual(features[1], cafe.id)
+        self.assertEqual(features[2], features[3])
+        
+        paris = MapFeature.objects.get(id=features[2])
+        self.assertEqual(paris.feature_type, 'point')
+        self.assertEqual(paris.map, self.map)
+        self.assertEqual(paris.photo_count, 2)
+        self.feature.refresh_from_db()
+        cafe.refresh_from_db()
+        self.assertEqual(self.feature.photo_count, 1)
+        self.assertEqual(cafe.photo_count, 1)
+    
+    def test_command(self):
+        """The management command reads existing photos and places them when asked."""
+        image = SimpleUploadedFile('trip.jpg', geotagged_jpeg(48.8584, 2.2945), content_type='image/jpeg')
+        response = self.client.post(
+            reverse('memory_maps:photo-list'),
+            {'feature': self.feature.id, 'image': image},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        photo = Photo.objects.get()
+        self.assertFalse(photo.geotag_checked)
+        
+        call_command('geotag_photos', '--place', stdout=StringIO())
+        
+        photo.refresh_from_db()
+        self.assertTrue(photo.geotag_checked)
+        self.assertAlmostEqual(photo.longitude, 2.2945, places=4)
+        self.assertNotEqual(photo.feature_id, self.feature.id)
+        self.assertEqual(photo.feature.photo_count, 1)
+        self.feature.refresh_from_db()
+        self.assertEqual(self.feature.photo_count, 0)
+        
+        # Checked photos are not read again
+        with mock.patch('memory_maps.management.commands.geotag_photos.read_photo_gps') as read:
+            call_command('geotag_photos', stdout=StringIO())
+        read.assert_not_called()
+
+
+# =============================================================================
+# Photo Deduplication Tests
+# =============================================================================
+
+class PhotoDeduplicationTest(APITestCase):
+    """Test cases for sharing the stored file of identical photo uploads."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        self.feature = MapFeature.objects.create(
+            map=self.map,
+            feature_type='point',
+            geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060, 40.7128]}),
+            title='Feature'
+        )
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def image_bytes(self, color='blue'):
+        file = BytesIO()
+        Image.new('RGB', (40, 30), color).save(file, 'JPEG')
+        return file.getvalue()
+    
+    def upload(self, data, name='beach.jpg'):
+        response = self.client.post(
+            reverse('memory_maps:photo-list'),
+            {'feature': self.feature.id, 'image': SimpleUploadedFile(name, data, content_type='image/jpeg')},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Photo.objects.get(id=response.data['id'])
+    
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(os.path.join(self.media_root, 'photos'))
+            for name in names
+        )
+    
+    def test_reupload_shares_file(self):
+        """Uploading the same image again reuses the stored file."""
+        data = self.image_bytes()
+        first = self.upload(data)
+        second = self.upload(data, name='copy.jpg')
+        
+        self.assertEqual(len(first.content_hash), 64)
+        self.assertEqual(first.content_hash, second.content_hash)
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(len(self.stored_files()), 1)
+        
+        third = self.upload(self.image_bytes('red'))
+        self.assertNotEqual(third.image.name, first.image.name)
+        self.assertEqual(len(self.stored_files()), 2)
+    
+    def test_reference_counted_delete(self):
+        """The shared file is removed with the last photo using it."""
+        from memory_maps.deletions import drain_storage_deletions
+        
+        data = self.image_bytes()
+        first = self.upload(data)
+        second = self.upload(data)
+        
+        first.delete()
+        drain_storage_deletions()
+        self.assertEqual(len(self.stored_files()), 1)
+        self.assertTrue(second.image.storage.exists(second.image.name))
+        
+        second.delete()
+        drain_storage_deletions()
+        self.assertEqual(self.stored_files(), [])
+    
+    def test_renditions_shared(self):
+        """A re-upload reuses the renditions of the stored file."""
+        from memory_maps.deletions import drain_storage_deletions
+        
+        data = self.image_bytes()
+        first = self.upload(data)
+        process_photo(claim_pending_photo())
+        first.refresh_from_db()
+        
+        second = self.upload(data)
+        self.assertEqual(second.rendition_status, Photo.RENDITIONS_READY)
+        self.assertEqual(second.renditions, first.renditions)
+        
+        first.delete()
+        drain_storage_deletions()
+        storage = second.image.storage
+        self.assertTrue(all(storage.exists(path) for path in second.renditions.values()))
+    
+    def test_unfinished_renditions_shared_when_ready(self):
+        """A re-upload of a photo still being processed gets the same renditions once they are ready."""
+        data = self.image_bytes()
+        first = self.upload(data)
+        claimed = claim_pending_photo()
+        
+        second = self.upload(data)
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(second.rendition_status, Photo.RENDITIONS_PENDING)
+        self.assertEqual(second.renditions, {})
+        
+        # The shared image is not rendered twice
+        self.assertIsNone(claim_pending_photo())
+        process_photo(claimed)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.rendition_status, Photo.RENDITIONS_READY)
+        self.assertEqual(second.renditions, first.renditions)
+    
+    def test_pending_photos_sharing_image_rendered_once(self):
+        """Photos sharing a pending image are all processed from one rendering."""
+        from memory_maps import renditions
+        
+        data = self.image_bytes()
+        first = self.upload(data)
+        second = self.upload(data, name='copy.jpg')
+        self.assertEqual(second.image.name, first.image.name)
+        
+        with mock.patch.object(renditions, 'generate_renditions', wraps=renditions.generate_renditions) as generate:
+            process_photo(claim_pending_photo())
+            self.assertIsNone(claim_pending_photo())
+        self.assertEqual(generate.call_count, 1)
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.rendition_status, Photo.RENDITIONS_READY)
+        self.assertEqual(second.rendition_status, Photo.RENDITIONS_READY)
+        self.assertEqual(second.renditions, first.renditions)
+        storage = first.image.storage
+        self.assertTrue(all(storage.exists(path) for path in first.renditions.values()))
+        self.assertEqual(len(self.stored_files()), 1 + len(first.renditions))
+        
+        # A copy left pending after the image was rendered reuses its renditions
+        Photo.objects.filter(pk=second.pk).update(rendition_status=Photo.RENDITIONS_PENDING, renditions={})
+        with mock.patch.object(renditions, 'generate_renditions') as generate:
+            process_photo(claim_pending_photo())
+        generate.assert_not_called()
+        second.refresh_from_db()
+        self.assertEqual(second.rendition_status, Photo.RENDITIONS_READY)
+        self.assertEqual(second.renditions, first.renditions)
+    
+    def test_other_users_do_not_share(self):
+        """Files are only shared between photos of the same uploader."""
+        data = self.image_bytes()
+        first = self.upload(data)
+        
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.map.owner = other
+        self.map.save()
+        self.client.force_authenticate(user=other)
+        second = self.upload(data)
+        
+        self.assertNotEqual(first.image.name, second.image.name)
+    
+    def test_batch_upload_stores_each_content_once(self):
+        """Batch uploads write one file per distinct content, reusing earlier uploads."""
+        blue = self.image_bytes()
+        existing = self.upload(blue)
+        
+        images = [
+            SimpleUploadedFile(f'photo{i}.jpg', data, content_type='image/jpeg')
+            for i, data in enumerate([blue, self.image_bytes('red'), self.image_bytes('red')])
+        ]
+        response = self.client.post(
+            reverse('memory_maps:photo-list') + 'batch/',
+            {'feature': self.feature.id, 'images': images},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        blue_copy, red, red_copy = [Photo.objects.get(id=r['id']) for r in response.data['results']]
+        self.assertEqual(blue_copy.image.name, existing.image.name)
+        self.assertEqual(red.image.name, red_copy.image.name)
+        self.assertEqual(len(self.stored_files()), 2)
+
+
+# =============================================================================
+# Storage Deletion Tests
+# =============================================================================
+
+from memory_maps.deletions import drain_storage_deletions
+from memory_maps.models import StorageDeletion
+
+
+class StorageDeletionTest(APITestCase):
+    """Test cases for the deferred deletion of stored photo files."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.map = Map.objects.create(
+            title='Test Map',
+            owner=self.user,
+            center_lat=40.7128,
+            center_lng=-74.0060
+        )
+        self.features = [
+            MapFeature.objects.create(
+                map=self.map,
+                feature_type='point',
+                geometry=json.dumps({'type': 'Point', 'coordinates': [-74.0060 + i, 40.7128]}),
+                title=f'Feature {i}'
+            )
+            for i in range(2)
+        ]
+        self.photos = []
+        for i in range(6):
+            file = BytesIO()
+            # Distinct content, so no files are shared
+            Image.new('RGB', (20, 20), (i * 40, 0, 0)).save(file, 'JPEG')
+            self.photos.append(Photo.objects.create(
+                feature=self.features[i % 2],
+                uploaded_by=self.user,
+                image=SimpleUploadedFile(f'photo{i}.jpg', file.getvalue(), content_type='image/jpeg')
+            ))
+    
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def exists(self, photo):
+        return photo.image.storage.exists(photo.image.name)
+    
+    def test_photo_delete_is_deferred(self):
+        """Deleting a photo queues its file instead of removing it at once."""
+        photo = self.photos[0]
+        photo.delete()
+        
+        self.assertTrue(self.exists(photo))
+        self.assertEqual(list(StorageDeletion.objects.values_list('name', flat=True)), [photo.image.name])
+        
+        self.assertEqual(drain_storage_deletions(), (1, 0, 0))
+        self.assertFalse(self.exists(photo))
+        self.assertFalse(StorageDeletion.objects.exists())
+    
+    def test_map_cascade_queues_files(self):
+        """Deleting a map queues all its photos' files with batched inserts."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.map.delete()
+        
+        sql = [query['sql'] for query in queries]
+        self.assertEqual(sum(1 for q in sql if q.startswith('INSERT INTO "memory_maps_storagedeletion"')), 1)
+        # Counters of features being deleted are not updated photo by photo
+        self.assertFalse([q for q in sql if q.startswith('UPDATE "memory_maps_mapfeature"')])
+        
+        self.assertEqual(StorageDeletion.objects.count(), 6)
+        drain_storage_deletions()
+        self.assertFalse(any(self.exists(photo) for photo in self.photos))
+    
+    def test_feature_and_queryset_deletes(self):
+        """Feature cascades and Photo queryset deletes both queue files."""
+        self.features[0].delete()
+        self.assertEqual(StorageDeletion.objects.count(), 3)
+        
+        Photo.objects.filter(feature=self.features[1]).delete()
+        self.assertEqual(StorageDeletion.objects.count(), 6)
+        
+        self.assertEqual(drain_storage_deletions(), (6, 0, 0))
+        self.assertFalse(any(self.exists(photo) for photo in self.photos))
+    
+    def test_user_delete_queues_files(self):
+        """Deleting a user queues the files of their photos."""
+        self.user.delete()
+        drain_storage_deletions()
+        self.assertFalse(any(self.exists(photo) for photo in self.photos))
+    
+    def test_files_in_use_are_kept(self):
+        """Queued files whose image is still used by a photo are not deleted."""
+        photo = self.photos[0]
+        StorageDeletion.objects.create(name=photo.image.name, image=photo.image.name)
+        
+        self.assertEqual(drain_storage_deletions(), (0, 1, 0))
+        self.assertTrue(self.exists(photo))
+        self.assertFalse(StorageDeletion.objects.exists())
+    
+    def test_failures_are_retried(self):
+        """Failed deletions stay queued with the error until they succeed."""
+        photo = self.photos[0]
+        photo.delete()
+        
+        with mock.patch.object(photo.image.storage, 'delete', side_effect=OSError('denied')):
+            self.assertEqual(drain_storage_deletions(), (0, 0, 1))
+        row = StorageDeletion.objects.get()
+        self.assertEqual(row.attempts, 1)
+        self.assertIn('denied', row.last_error)
+        
+        self.assertEqual(drain_storage_deletions(), (1, 0, 0))
+        self.assertFalse(self.exists(photo))
+    
+    def test_command(self):
+        """The management command drains the queue."""
+        Photo.objects.all().delete()
+        call_command('drain_storage_deletions', '--once', stdout=StringIO())
+        self.assertFalse(StorageDeletion.objects.exists())
+        self.assertFalse(any(self.exists(photo) for photo in self.photos))
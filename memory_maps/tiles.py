@@ -0,0 +1,74 @@
+"""
+Mapbox Vector Tile rendering for memory_maps app.
+Builds protobuf tiles directly in PostGIS with ST_AsMVT/ST_AsMVTGeom.
+"""
+
+from django.db import connection
+
+from .models import MapFeature, POSTGIS_ENABLED
+from .simplify import geometry_column
+
+# Name of the layer inside each tile
+TILE_LAYER = 'features'
+
+# Tile coordinate space and edge buffer, in tile units
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+
+class TilesUnavailable(Exception):
+    """Raised when the database backend cannot render vector tiles."""
+
+
+def tiles_supported() -> bool:
+    """Return True if the database can build vector tiles."""
+    return POSTGIS_ENABLED and connection.vendor == 'postgresql'
+
+
+def render_feature_tile(map_id: int, z: int, x: int, y: int) -> bytes:
+    """
+    Render the features of a map that fall inside one XYZ tile.
+    
+    The tile envelope is transformed to EPSG:4326 for the && test so the
+    GiST index on geometry is used, then the stored geometry column for the
+    zoom level is clipped and quantised to the tile grid by ST_AsMVTGeom.
+    
+    Args:
+        map_id: ID of the map to render
+        z: Zoom level
+        x: Tile column
+        y: Tile row
+        
+    Returns:
+        Encoded Mapbox Vector Tile (empty bytes if no features intersect)
+    """
+    if not tiles_supported():
+        raise TilesUnavailable("Vector tiles require a PostGIS database")
+    
+    # Simplified columns are null where they would equal the full geometry
+    column = geometry_column(z)
+    geometry = f'COALESCE(f.{column}, f.geometry)' if column != 'geometry' else 'f.geometry'
+    
+    sql = f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+        ),
+        mvtgeom AS (
+            SELECT
+                ST_AsMVTGeom(
+                    ST_Transform({geometry}, 3857), bounds.geom, %s, %s, true
+                ) AS geom,
+                f.id, f.title, f.feature_type, f.category
+            FROM {MapFeature._meta.db_table} AS f, bounds
+            WHERE f.map_id = %s
+              AND f.geometry && ST_Transform(bounds.geom, 4326)
+        )
+        SELECT ST_AsMVT(mvtgeom.*, %s, %s, 'geom') FROM mvtgeom
+    """
+    params = [z, x, y, TILE_EXTENT, TILE_BUFFER, map_id, TILE_LAYER, TILE_EXTENT]
+    
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    
+    return bytes(row[0]) if row and row[0] else b''
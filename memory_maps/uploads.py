@@ -0,0 +1,290 @@
+"""
+Photo uploads for memory_maps app.
+Clients can ask for a presigned S3 POST, send the image straight to the
+bucket, and then finalize the upload to create the Photo row, so large
+images never pass through a web worker. Batch uploads write many files
+to storage concurrently and insert their rows together. Files are hashed
+so that identical uploads by the same user share one stored copy.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+
+from .caching import invalidate_map
+from .counters import adjust_counter
+from .models import MapFeature, Photo, photo_upload_path
+
+# Largest photo accepted, matching Photo.clean
+MAX_PHOTO_SIZE = 10 * 1024 * 1024
+
+# Seconds a presigned upload stays valid
+UPLOAD_URL_EXPIRY = 15 * 60
+
+# Files accepted in one batch upload, matching Django's default
+# DATA_UPLOAD_MAX_NUMBER_FILES
+MAX_BATCH_FILES = 100
+
+# Concurrent storage writes of a batch upload
+BATCH_UPLOAD_WORKERS = 8
+
+# Content types of the accepted photo extensions
+PHOTO_CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+
+
+def direct_upload_storage():
+    """
+    Return the photo storage if it can issue presigned uploads.
+
+    Returns:
+        An S3Boto3Storage (or compatible) instance, or None for storages
+        such as the local filesystem used in development
+    """
+    storage = Photo._meta.get_field('image').storage
+    if getattr(storage, 'bucket_name', None) and hasattr(storage, 'bucket'):
+        return storage
+    return None
+
+
+def photo_content_type(filename: str) -> Optional[str]:
+    """Return the content type for a photo filename, or None if its extension is not accepted."""
+    return PHOTO_CONTENT_TYPES.get(os.path.splitext(filename)[1].lower())
+
+
+def upload_prefix(feature, user) -> str:
+    """Return the directory that photo_upload_path places a user's photos of a feature in."""
+    return os.path.dirname(photo_upload_path(Photo(feature=feature, uploaded_by=user), 'photo'))
+
+
+def upload_key(storage, feature, user, filename: str) -> str:
+    """
+    Choose the storage name for a direct upload.
+
+    A random suffix is always added, as the object is written by the client
+    and the storage cannot pick a free name at save time.
+
+    Args:
+        storage: Photo storage
+        feature: MapFeature the photo will be attached to
+        user: Uploading user
+        filename: Client filename
+
+    Returns:
+        Storage name under photo_upload_path
+    """
+    name = photo_upload_path(Photo(feature=feature, uploaded_by=user), filename)
+    root, ext = os.path.splitext(name)
+    key = storage.get_alternative_name(root, ext.lower())
+
+    # Trim the filename like Storage.get_available_name() so the key fits the column
+    overflow = len(key) - Photo._meta.get_field('image').max_length
+    if overflow > 0:
+        key = storage.get_alternative_name(root[:-overflow], ext.lower())
+    return key
+
+
+def bucket_key(storage, name: str) -> str:
+    """Return the bucket key of a storage name, including the storage's location prefix."""
+    # django-storages has no public API for this
+    return storage._normalize_name(name)
+
+
+def presigned_photo_upload(storage, name: str, content_type: str) -> Dict:
+    """
+    Create a presigned POST for uploading a photo straight to the bucket.
+
+    The policy pins the key and content type and caps the size, so the
+    client cannot use it to write anything else.
+
+    Args:
+        storage: Photo storage, from direct_upload_storage()
+        name: Storage name, from upload_key()
+        content_type: Content type of the photo
+
+    Returns:
+        Dictionary with the form 'url' and the 'fields' to send with the file
+    """
+    fields = {'Content-Type': content_type}
+    if storage.default_acl:
+        fields['acl'] = storage.default_acl
+    cache_control = storage.object_parameters.get('CacheControl')
+    if cache_control:
+        fields['Cache-Control'] = cache_control
+
+    conditions = [{key: value} for key, value in fields.items()]
+    conditions.append(['content-length-range', 1, MAX_PHOTO_SIZE])
+
+    return storage.bucket.meta.client.generate_presigned_post(
+        Bucket=storage.bucket_name,
+        Key=bucket_key(storage, name),
+        Fields=fields,
+        Conditions=conditions,
+        ExpiresIn=UPLOAD_URL_EXPIRY,
+    )
+
+
+def uploaded_object(storage, name: str):
+    """
+    Fetch the metadata of an uploaded object with a HEAD request.
+
+    Args:
+        storage: Photo storage
+        name: Storage name
+
+    Returns:
+        boto3 Object with its metadata loaded, or None if it does not exist
+    """
+    from botocore.exceptions import ClientError
+
+    obj = storage.bucket.Object(bucket_key(storage, name))
+    try:
+        obj.load()
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return obj
+
+
+def file_sha256(file) -> str:
+    """Return the SHA-256 hex digest of a file, read in chunks so it is never loaded whole."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def share_file(photo: Photo, source: Photo):
+    """
+    Point a photo at another photo's stored image file.
+
+    Renditions are only copied once the source's are ready. Otherwise the
+    photo is left pending, and the worker rendering the shared image
+    records the same renditions on it (see renditions.process_photo).
+    """
+    photo.image = source.image.name
+    if source.rendition_status == Photo.RENDITIONS_READY:
+        photo.renditions = source.renditions
+        photo.rendition_status = Photo.RENDITIONS_READY
+    else:
+        photo.renditions = {}
+        photo.rendition_status = Photo.RENDITIONS_PENDING
+
+
+def store_photo_batch(feature, user, uploads: List[Tuple], place: bool = False,
+                      tolerance_m: Optional[float] = None) -> Tuple[List[Photo], Dict[int, str]]:
+    """
+    Save a batch of validated photos to storage in parallel and insert them with one bulk_create.
+
+    Work runs in a bounded thread pool in two passes. First each file is
+    hashed and its GPS EXIF header read. Then the files that are not
+    already stored for this user are written (S3 PUTs in production), once
+    per distinct content. Model validation is skipped, so files must
+    already have passed PhotoBatchFileSerializer.
+
+    Args:
+        feature: MapFeature the photos are attached to, with its map loaded
+        user: Uploading user
+        uploads: List of (index, uploaded file, caption)
+        place: Attach geotagged photos taken away from the feature to a
+               nearby point feature instead (see geotag.place_photos)
+        tolerance_m: Matching distance for place, in metres
+
+    Returns:
+        Tuple of (created photos in upload order, errors by upload index)
+    """
+    from collections import Counter
+    from .geotag import DEFAULT_TOLERANCE_M, place_photos, read_gps
+
+    field = Photo._meta.get_field('image')
+    storage = field.storage
+    photos = [
+        Photo(feature=feature, uploaded_by=user, caption=caption, geotag_checked=True)
+        for _, _, caption in uploads
+    ]
+    files = [upload for _, upload, _ in uploads]
+    indexes = [index for index, _, _ in uploads]
+
+    def prepare(photo, upload):
+        # Only the EXIF header is parsed
+        photo.latitude, photo.longitude = read_gps(upload) or (None, None)
+        upload.seek(0)
+        photo.content_hash = file_sha256(upload)
+
+    def store(photo, upload):
+        name = field.generate_filename(photo, upload.name)
+        return storage.save(name, upload, max_length=field.max_length)
+
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(BATCH_UPLOAD_WORKERS, len(uploads)))) as executor:
+        prepared = []
+        for photo, upload, index, future in zip(
+            photos, files, indexes, [executor.submit(prepare, *pair) for pair in zip(photos, files)]
+        ):
+            try:
+                future.result()
+            except Exception as e:
+                errors[index] = f"Could not read file: {str(e)}"
+            else:
+                prepared.append((photo, upload, index))
+
+        existing = {}
+        sources = Photo.objects.filter(
+            uploaded_by=user, content_hash__in={photo.content_hash for photo, _, _ in prepared}
+        ).exclude(image='').order_by('id')
+        for source in sources:
+            existing.setdefault(source.content_hash, source)
+
+        # Files already stored for this user, or repeated within the batch, are written once
+        firsts, copies, writes = {}, [], []
+        for photo, upload, index in prepared:
+            if photo.content_hash in existing:
+                share_file(photo, existing[photo.content_hash])
+            elif photo.content_hash in firsts:
+                copies.append((photo, index, firsts[photo.content_hash]))
+            else:
+                firsts[photo.content_hash] = (photo, index)
+                writes.append((photo, index, executor.submit(store, photo, upload)))
+
+    new_names = []
+    for photo, index, future in writes:
+        try:
+            photo.image.name = future.result()
+        except Exception as e:
+            errors[index] = f"Could not store file: {str(e)}"
+        else:
+            new_names.append(photo.image.name)
+    for photo, index, (first, first_index) in copies:
+        if first_index in errors:
+            errors[index] = errors[first_index]
+        else:
+            share_file(photo, first)
+    stored = [photo for photo, _, index in prepared if index not in errors]
+
+    try:
+        with transaction.atomic():
+            if place:
+                place_photos(stored, DEFAULT_TOLERANCE_M if tolerance_m is None else tolerance_m)
+            created = Photo.objects.bulk_create(stored)
+            # Bulk writes skip post_save, so maintain the counters here
+            for feature_id, count in Counter(photo.feature_id for photo in created).items():
+                adjust_counter(MapFeature, feature_id, 'photo_count', count)
+    except Exception:
+        # Don't leave orphaned files behind
+        for name in new_names:
+            storage.delete(name)
+        raise
+
+    # Bulk writes skip post_save, so cached responses are invalidated here
+    invalidate_map(feature.map_id)
+    feature.photo_count += sum(1 for photo in created if photo.feature_id == feature.pk)
+    return created, errors
@@ -2,9 +2,9 @@
 URL configuration for memory_maps app.
 """
 
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from .views import MapViewSet, MapFeatureViewSet, StoryViewSet, PhotoViewSet
+from .views import MapViewSet, MapFeatureViewSet, StoryViewSet, PhotoViewSet, ImportJobViewSet
 
 app_name = 'memory_maps'
 
@@ -15,7 +15,26 @@ router.register(r'maps', MapViewSet, basename='map')
 router.register(r'features', MapFeatureViewSet, basename='feature')
 router.register(r'stories', StoryViewSet, basename='story')
 router.register(r'photos', PhotoViewSet, basename='photo')
+router.register(r'import-jobs', ImportJobViewSet, basename='import-job')
+
+# Vector tiles and exports are addressed like static files, without a
+# trailing slash
+map_tiles = MapViewSet.as_view({'get': 'tiles'})
+EXPORT_EXTENSIONS = ['geojson', 'kml', 'kmz', 'csv', 'fgb']
 
 urlpatterns = [
+    re_path(
+        r'^maps/(?P<pk>[^/.]+)/tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.mvt$',
+        map_tiles,
+        name='map-tiles'
+    ),
+    *[
+        re_path(
+            rf'^maps/(?P<pk>[^/.]+)/export\.{extension}$',
+            MapViewSet.as_view({'get': f'export_{extension}'}),
+            name=f'map-export-{extension}'
+        )
+        for extension in EXPORT_EXTENSIONS
+    ],
     path('', include(router.urls)),
 ]
@@ -1,21 +1,174 @@
 """
 DRF views and viewsets for memory_maps app.
-Handles API endpoints for maps, features, stories, and photos.
+Handles API endpoints for maps, features, stories, photos and import jobs.
 """
 
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from django.db.models import Q, Count
+from django.core.cache import cache
+from django.db.models import Q, Count, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
 
-from .models import Map, MapFeature, Story, Photo
+from .models import Map, MapFeature, Story, Photo, ImportJob, POSTGIS_ENABLED
 from .serializers import (
     MapSerializer, MapListSerializer,
     MapFeatureSerializer, MapFeatureListSerializer,
-    StorySerializer, PhotoSerializer
+    StorySerializer, PhotoSerializer, ImportJobSerializer,
+    PhotoBatchFileSerializer, PhotoUploadURLSerializer, PhotoFinalizeSerializer
 )
 from .permissions import IsOwnerOrReadOnly
+from .pagination import PageOrCursorPagination
+from .caching import get_map_version, get_map_list_version, response_cache_key
+from .conditional import map_validator, not_modified_response, set_validators
+from .spatial import pad_bounds
+from .tiles import render_feature_tile, tiles_supported
+from .clustering import cluster_points, CLUSTER_MAX_ZOOM
+from .gis_export import GeoJSONExporter, KMLExporter, KMZExporter, CSVExporter, FlatGeobufExporter
+from .simplify import (
+    GeometryOptions, MAX_PRECISION, annotate_simplified, geometry_column, simplify_features
+)
+
+# Padding (in screen pixels) added around a viewport bbox when a zoom level is
+# given, so markers whose icon overlaps the edge of the screen are still returned
+VIEWPORT_PADDING_PX = 32
+
+# Zoom levels accepted in viewport queries
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+
+
+def parse_bbox(value):
+    """
+    Parse a 'minx,miny,maxx,maxy' bounding box query parameter.
+    
+    Args:
+        value: Comma-separated longitude/latitude bounds
+        
+    Returns:
+        Tuple of (min_lng, min_lat, max_lng, max_lat)
+    """
+    import math
+    from rest_framework.exceptions import ValidationError
+    
+    try:
+        min_x, min_y, max_x, max_y = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValidationError({'bbox': 'bbox must be four comma-separated numbers: minx,miny,maxx,maxy'})
+    if not all(math.isfinite(part) for part in (min_x, min_y, max_x, max_y)):
+        raise ValidationError({'bbox': 'bbox must be four comma-separated numbers: minx,miny,maxx,maxy'})
+    
+    if min_x > max_x or min_y > max_y:
+        raise ValidationError({'bbox': 'bbox minimum values must not exceed maximum values'})
+    if not (-90.0 <= min_y <= 90.0 and -90.0 <= max_y <= 90.0):
+        raise ValidationError({'bbox': 'bbox latitudes must be between -90 and 90 degrees'})
+    if not (-180.0 <= min_x <= 180.0 and -180.0 <= max_x <= 180.0):
+        raise ValidationError({'bbox': 'bbox longitudes must be between -180 and 180 degrees'})
+    
+    return min_x, min_y, max_x, max_y
+
+
+def parse_zoom(value):
+    """
+    Parse a zoom query parameter.
+    
+    Args:
+        value: Zoom level as string
+        
+    Returns:
+        Zoom level as integer
+    """
+    from rest_framework.exceptions import ValidationError
+    
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({'zoom': 'zoom must be an integer'})
+    
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise ValidationError({'zoom': f'zoom must be between {MIN_ZOOM} and {MAX_ZOOM}'})
+    
+    return zoom
+
+
+def parse_geometry_options(query_params):
+    """
+    Parse the simplify and precision query parameters of a feature listing.
+    
+    simplify is a tolerance in degrees, or 'auto' to use the stored
+    geometry column for the zoom parameter. precision is the number of
+    decimal places to keep in coordinates.
+    
+    Args:
+        query_params: Request query parameters
+        
+    Returns:
+        GeometryOptions, or None if neither parameter was given
+    """
+    from rest_framework.exceptions import ValidationError
+    
+    simplify = query_params.get('simplify', None)
+    precision = query_params.get('precision', None)
+    if simplify is None and precision is None:
+        return None
+    
+    tolerance = None
+    column = None
+    if simplify == 'auto':
+        if 'zoom' not in query_params:
+            raise ValidationError({'simplify': 'simplify=auto requires a zoom parameter'})
+        column = geometry_column(parse_zoom(query_params['zoom']))
+    elif simplify is not None:
+        try:
+            tolerance = float(simplify)
+        except ValueError:
+            raise ValidationError({'simplify': "simplify must be a number of degrees or 'auto'"})
+        if not 0.0 <= tolerance < float('inf'):
+            raise ValidationError({'simplify': 'simplify must be a finite, non-negative number'})
+    
+    if precision is not None:
+        try:
+            precision = int(precision)
+        except ValueError:
+            raise ValidationError({'precision': 'precision must be an integer'})
+        if not 0 <= precision <= MAX_PRECISION:
+            raise ValidationError({'precision': f'precision must be between 0 and {MAX_PRECISION}'})
+    
+    return GeometryOptions(tolerance, precision, column)
+
+
+def filter_by_bbox(queryset, bounds):
+    """
+    Restrict a MapFeature queryset to features intersecting a bounding box.
+    
+    On PostGIS this is an ST_Intersects test, which uses the GiST index on
+    geometry. Otherwise the stored bbox columns are compared, which uses the
+    (map, bbox_*) B-tree index.
+    
+    Args:
+        queryset: MapFeature queryset
+        bounds: Tuple of (min_lng, min_lat, max_lng, max_lat)
+        
+    Returns:
+        Filtered queryset
+    """
+    min_x, min_y, max_x, max_y = bounds
+    
+    if POSTGIS_ENABLED:
+        from django.contrib.gis.geos import Polygon
+        envelope = Polygon.from_bbox(bounds)
+        envelope.srid = 4326
+        return queryset.filter(geometry__intersects=envelope)
+    
+    return queryset.filter(
+        bbox_min_lng__lte=max_x,
+        bbox_max_lng__gte=min_x,
+        bbox_min_lat__lte=max_y,
+        bbox_max_lat__gte=min_y,
+    )
 
 
 class MapViewSet(viewsets.ModelViewSet):
@@ -28,9 +181,20 @@ class MapViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description']
-    ordering_fields = ['created_at', 'updated_at', 'title']
+    ordering_fields = ['created_at', 'updated_at', 'title', 'feature_count']
     ordering = ['-created_at']
     
+    def filter_by_size(self, queryset):
+        """Filter maps by the min_features query parameter, if provided."""
+        min_features = self.request.query_params.get('min_features', None)
+        if min_features is not None:
+            try:
+                queryset = queryset.filter(feature_count__gte=int(min_features))
+            except ValueError:
+                from rest_framework.exceptions import ValidationError
+                raise ValidationError({'min_features': 'min_features must be an integer'})
+        return queryset
+    
     def get_queryset(self):
         """
         Return maps based on user permissions.
@@ -48,7 +212,7 @@ class MapViewSet(viewsets.ModelViewSet):
             # Show only public maps to anonymous users
             queryset = queryset.filter(is_public=True)
         
-        return queryset
+        return self.filter_by_size(queryset)
     
     def get_serializer_class(self):
         """Use lightweight serializer for list view."""
@@ -60,13 +224,63 @@ class MapViewSet(viewsets.ModelViewSet):
         """Set the owner to the current user when creating a map."""
         serializer.save(owner=self.request.user)
     
+    def get_response_cache_key(self, name, map_id=None):
+        """
+        Return the response cache key for this request.
+        
+        Args:
+            name: Name of the cached view
+            map_id: ID of the map for per-map responses, or None for listings
+        """
+        if map_id is None:
+            return response_cache_key(name, get_map_list_version(), self.request)
+        return response_cache_key(name, get_map_version(map_id), self.request, map_id)
+    
+    def get_map_response(self, name, build):
+        """
+        Return a per-map GET response with caching and conditional GET.
+        
+        Public map responses are cached together with their ETag and
+        Last-Modified, so a cache hit needs no queries. On a miss the
+        validators are computed before serializing, so an unchanged map is
+        answered with 304 Not Modified straight away.
+        
+        Args:
+            name: Name of the cached view
+            build: Callable taking the Map and returning a Response
+        """
+        key = self.get_response_cache_key(name, self.kwargs['pk'])
+        entry = cache.get(key)
+        
+        if entry is None:
+            map_obj = self.get_object()
+            etag, last_modified = map_validator(map_obj.pk)
+            entry = {'etag': etag, 'last_modified': last_modified, 'public': map_obj.is_public}
+        
+        response = not_modified_response(self.request, entry['etag'], entry['last_modified'])
+        if response is None:
+            if 'data' not in entry:
+                entry['data'] = build(map_obj).data
+                # Only public maps are cached; making a map private bumps its version
+                if entry['public']:
+                    cache.set(key, entry)
+            response = Response(entry['data'])
+        
+        return set_validators(response, entry['etag'], entry['last_modified'], entry['public'])
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Return a map, serving public maps from the response cache."""
+        return self.get_map_response(
+            'retrieve', lambda map_obj: Response(self.get_serializer(map_obj).data)
+        )
+    
     @action(detail=False, methods=['get'])
     def my_maps(self, request):
         """
         Custom endpoint to get only the current user's maps.
         GET /api/maps/my_maps/
         """
-        queryset = Map.objects.filter(owner=request.user).order_by('-created_at')
+        queryset = Map.objects.filter(owner=request.user).select_related('owner').order_by('-created_at')
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -80,34 +294,183 @@ class MapViewSet(viewsets.ModelViewSet):
     def public_maps(self, request):
         """
         Custom endpoint to get only public maps.
-        GET /api/maps/public_maps/
+        GET /api/maps/public_maps/?ordering=-feature_count&min_features=10
         """
-        queryset = Map.objects.filter(is_public=True).select_related('owner').order_by('-created_at')
+        key = self.get_response_cache_key('public_maps')
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        
+        queryset = Map.objects.filter(is_public=True).select_related('owner')
+        
+        # Support ?ordering=-feature_count for "largest public maps"
+        queryset = self.filter_queryset(self.filter_by_size(queryset))
         
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = MapListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = MapListSerializer(queryset, many=True)
+            response = Response(serializer.data)
         
-        serializer = MapListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        cache.set(key, response.data)
+        return response
     
     @action(detail=True, methods=['get'])
     def features(self, request, pk=None):
         """
         Get all features for a specific map.
-        GET /api/maps/{id}/features/
+        GET /api/maps/{id}/features/?simplify=auto&zoom=8&precision=5
+        """
+        options = parse_geometry_options(request.query_params)
+        
+        def build(map_obj):
+            features = annotate_simplified(map_obj.features.order_by('-created_at'), options)
+            
+            page = self.paginate_queryset(features)
+            if page is not None:
+                serializer = MapFeatureListSerializer(simplify_features(page, options), many=True)
+                return self.get_paginated_response(serializer.data)
+            
+            serializer = MapFeatureListSerializer(simplify_features(features, options), many=True)
+            return Response(serializer.data)
+        
+        return self.get_map_response('features', build)
+    
+    @action(detail=True, methods=['get'])
+    def clusters(self, request, pk=None):
+        """
+        Get point features grouped into clusters for a zoom level.
+        GET /api/maps/{id}/clusters/?zoom=5&bbox=minx,miny,maxx,maxy
+        
+        Below CLUSTER_MAX_ZOOM returns clusters with a centroid, count and
+        sample feature ids; from that zoom on returns the raw points.
+        """
+        if 'zoom' not in request.query_params:
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({'zoom': 'zoom is required'})
+        zoom = parse_zoom(request.query_params['zoom'])
+        
+        bounds = None
+        bbox = request.query_params.get('bbox', None)
+        if bbox is not None:
+            bounds = pad_bounds(parse_bbox(bbox), VIEWPORT_PADDING_PX, zoom)
+        
+        def build(map_obj):
+            points = map_obj.features.filter(feature_type='point')
+            if bounds is not None:
+                points = filter_by_bbox(points, bounds)
+            
+            if zoom >= CLUSTER_MAX_ZOOM:
+                serializer = MapFeatureListSerializer(points.order_by('id'), many=True)
+                return Response({'zoom': zoom, 'clustered': False, 'features': serializer.data})
+            
+            clusters = cluster_points(map_obj.id, points, bounds, zoom)
+            return Response({'zoom': zoom, 'clustered': True, 'clusters': clusters})
+        
+        return self.get_map_response('clusters', build)
+    
+    def tiles(self, request, pk=None, z=None, x=None, y=None):
+        """
+        Get a Mapbox Vector Tile of the map's features.
+        GET /api/maps/{id}/tiles/{z}/{x}/{y}.mvt
+        
+        Routed in urls.py rather than with @action, as tile URLs have no
+        trailing slash.
         """
         map_obj = self.get_object()
-        features = map_obj.features.order_by('-created_at')
         
-        page = self.paginate_queryset(features)
-        if page is not None:
-            serializer = MapFeatureListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        z, x, y = int(z), int(x), int(y)
+        if z > MAX_ZOOM or x >= 2 ** z or y >= 2 ** z:
+            return Response(
+                {'error': f'Tile {z}/{x}/{y} is out of range'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        serializer = MapFeatureListSerializer(features, many=True)
-        return Response(serializer.data)
+        if not tiles_supported():
+            return Response(
+                {'error': 'Vector tiles require a PostGIS database'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        tile = render_feature_tile(map_obj.id, z, x, y)
+        
+        response = HttpResponse(tile, content_type='application/vnd.mapbox-vector-tile')
+        # Public tiles can be cached by shared caches such as a CDN
+        if map_obj.is_public:
+            patch_cache_control(response, public=True, max_age=300)
+        else:
+            patch_cache_control(response, private=True, max_age=60)
+        return response
+    
+    def export_response(self, exporter_class):
+        """
+        Stream the map's features as a file download.
+        
+        Supports the simplify, zoom and precision parameters of feature
+        listings, and answers 304 Not Modified for an unchanged map.
+        
+        Args:
+            exporter_class: Exporter class from gis_export
+            
+        Returns:
+            StreamingHttpResponse
+        """
+        map_obj = self.get_object()
+        options = parse_geometry_options(self.request.query_params)
+        
+        if not exporter_class.available():
+            return Response(
+                {'error': f'Export to .{exporter_class.extension} is not available on this server'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        etag, last_modified = map_validator(map_obj.pk)
+        response = not_modified_response(self.request, etag, last_modified)
+        if response is None:
+            exporter = exporter_class(map_obj, options)
+            response = StreamingHttpResponse(exporter.stream(), content_type=exporter.content_type)
+            response['Content-Disposition'] = f'attachment; filename="{exporter.filename()}"'
+        return set_validators(response, etag, last_modified, map_obj.is_public)
+    
+    # Export downloads are routed in urls.py rather than with @action, as
+    # their URLs end in the file extension without a trailing slash
+    
+    def export_geojson(self, request, pk=None):
+        """
+        Download all features of the map as a GeoJSON FeatureCollection.
+        GET /api/maps/{id}/export.geojson
+        """
+        return self.export_response(GeoJSONExporter)
+    
+    def export_kml(self, request, pk=None):
+        """
+        Download all features of the map as a KML document.
+        GET /api/maps/{id}/export.kml
+        """
+        return self.export_response(KMLExporter)
+    
+    def export_kmz(self, request, pk=None):
+        """
+        Download all features of the map as a KMZ archive.
+        GET /api/maps/{id}/export.kmz
+        """
+        return self.export_response(KMZExporter)
+    
+    def export_csv(self, request, pk=None):
+        """
+        Download all features of the map as CSV with lat, lng and name columns.
+        GET /api/maps/{id}/export.csv
+        """
+        return self.export_response(CSVExporter)
+    
+    def export_fgb(self, request, pk=None):
+        """
+        Download all features of the map as FlatGeobuf with a spatial index.
+        GET /api/maps/{id}/export.fgb
+        """
+        return self.export_response(FlatGeobufExporter)
 
 
 class MapFeatureViewSet(viewsets.ModelViewSet):
@@ -118,9 +481,10 @@ class MapFeatureViewSet(viewsets.ModelViewSet):
     
     serializer_class = MapFeatureSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = PageOrCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description', 'category']
-    ordering_fields = ['created_at', 'updated_at', 'title']
+    ordering_fields = ['created_at', 'updated_at', 'title', 'story_count', 'photo_count']
     ordering = ['-created_at']
     
     def get_queryset(self):
@@ -154,14 +518,101 @@ class MapFeatureViewSet(viewsets.ModelViewSet):
         if category is not None:
             queryset = queryset.filter(category__icontains=category)
         
+        # Restrict to the visible viewport if a bbox is provided
+        bbox = self.request.query_params.get('bbox', None)
+        if bbox is not None:
+            bounds = parse_bbox(bbox)
+            zoom = self.request.query_params.get('zoom', None)
+            if zoom is not None:
+                bounds = pad_bounds(bounds, VIEWPORT_PADDING_PX, parse_zoom(zoom))
+            queryset = filter_by_bbox(queryset, bounds)
+        
+        # Pick or simplify geometries for display (?simplify=, ?precision=)
+        if self.action == 'list':
+            queryset = annotate_simplified(queryset, self.get_geometry_options())
+        
+        # Prefetch nested content requested with ?include=
+        include = self.get_include()
+        if 'stories' in include:
+            queryset = queryset.prefetch_related(Prefetch(
+                'stories',
+                queryset=Story.objects.select_related('author').order_by('-created_at')
+            ))
+        if 'photos' in include:
+            queryset = queryset.prefetch_related(Prefetch(
+                'photos',
+                queryset=Photo.objects.select_related('uploaded_by').order_by('-uploaded_at')
+            ))
+        
         return queryset
     
+    def get_include(self):
+        """
+        Parse the include query parameter into a set of nested fields.
+        e.g. ?include=stories,photos
+        """
+        value = self.request.query_params.get('include', '')
+        include = {name.strip() for name in value.split(',') if name.strip()}
+        
+        unknown = include - set(MapFeatureSerializer.EXPANDABLE_FIELDS)
+        if unknown:
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({
+                'include': f'Unknown include value(s): {", ".join(sorted(unknown))}. '
+                           f'Allowed: {", ".join(MapFeatureSerializer.EXPANDABLE_FIELDS)}'
+            })
+        
+        return include
+    
+    def get_geometry_options(self):
+        """Parse the simplify and precision query parameters."""
+        return parse_geometry_options(self.request.query_params)
+    
+    def paginate_queryset(self, queryset):
+        """Simplify the geometries of the page on non-PostGIS backends."""
+        page = super().paginate_queryset(queryset)
+        if page is None:
+            return None
+        return simplify_features(page, self.get_geometry_options())
+    
+    def get_serializer_context(self):
+        """Pass the requested nested fields to the serializer."""
+        context = super().get_serializer_context()
+        context['include'] = self.get_include()
+        return context
+    
     def get_serializer_class(self):
-        """Use lightweight serializer for list view."""
-        if self.action == 'list':
+        """Use lightweight serializer for list view unless nested content is requested."""
+        if self.action == 'list' and not self.get_include():
             return MapFeatureListSerializer
         return MapFeatureSerializer
     
+    def list(self, request, *args, **kwargs):
+        """
+        List features, answering 304 Not Modified for an unchanged map
+        when filtered by map_id.
+        """
+        map_id = request.query_params.get('map_id', None)
+        if map_id is None:
+            return super().list(request, *args, **kwargs)
+        
+        visible_maps = Map.objects.filter(pk=map_id)
+        if request.user.is_authenticated:
+            visible_maps = visible_maps.filter(Q(owner=request.user) | Q(is_public=True))
+        else:
+            visible_maps = visible_maps.filter(is_public=True)
+        
+        is_public = visible_maps.values_list('is_public', flat=True).first()
+        validator = map_validator(map_id) if is_public is not None else None
+        if validator is None:
+            return super().list(request, *args, **kwargs)
+        
+        etag, last_modified = validator
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified, is_public)
+    
     def perform_create(self, serializer):
         """Validate user has permission to add features to the map."""
         map_obj = serializer.validated_data['map']
@@ -209,6 +660,7 @@ class StoryViewSet(viewsets.ModelViewSet):
     
     serializer_class = StorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = PageOrCursorPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'updated_at']
@@ -271,6 +723,7 @@ class PhotoViewSet(viewsets.ModelViewSet):
     
     serializer_class = PhotoSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = PageOrCursorPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['uploaded_at']
     ordering = ['-uploaded_at']
@@ -321,6 +774,162 @@ class PhotoViewSet(viewsets.ModelViewSet):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You can only delete your own photos.")
         instance.delete()
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def batch(self, request):
+        """
+        Upload several photos to a feature in one request.
+        POST /api/photos/batch/
+        
+        Accepts:
+        - feature: Feature ID
+        - images: One or more image files
+        - captions: Optional captions, in the same order as the images
+        - place: If true, geotagged photos taken away from the feature are
+          attached to a point feature at their location instead
+        - tolerance: Distance in metres for place (default: 50)
+        
+        The feature's permissions are checked once, files are written to
+        storage concurrently and the rows are inserted together. Results
+        are reported per file, in upload order.
+        """
+        from .geotag import DEFAULT_TOLERANCE_M
+        from .uploads import MAX_BATCH_FILES, store_photo_batch
+        
+        try:
+            feature = MapFeature.objects.select_related('map').get(pk=int(request.data.get('feature')))
+        except (TypeError, ValueError, MapFeature.DoesNotExist):
+            return Response(
+                {'error': 'A valid "feature" parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if feature.map.owner != request.user:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You can only add photos to features on your own maps.")
+        
+        place = str(request.data.get('place', '')).lower() in ('1', 'true', 'yes')
+        try:
+            tolerance = float(request.data.get('tolerance', DEFAULT_TOLERANCE_M))
+        except (TypeError, ValueError):
+            tolerance = None
+        if tolerance is None or not 0 < tolerance <= 10000:
+            return Response(
+                {'error': 'tolerance must be a distance in metres between 0 and 10000'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        images = request.FILES.getlist('images')
+        captions = request.data.getlist('captions')
+        if not images:
+            return Response(
+                {'error': '"images" parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(images) > MAX_BATCH_FILES:
+            return Response(
+                {'error': f'At most {MAX_BATCH_FILES} photos can be uploaded at once'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        results = [{'filename': image.name, 'success': False} for image in images]
+        uploads = []
+        for index, image in enumerate(images):
+            data = {'image': image}
+            if index < len(captions):
+                data['caption'] = captions[index]
+            serializer = PhotoBatchFileSerializer(data=data)
+            if serializer.is_valid():
+                uploads.append((index, image, serializer.validated_data['caption']))
+            else:
+                results[index]['errors'] = serializer.errors
+        
+        if uploads:
+            created, errors = store_photo_batch(feature, request.user, uploads, place, tolerance)
+            for index, message in errors.items():
+                results[index]['errors'] = {'image': [message]}
+            stored = [index for index, _, _ in uploads if index not in errors]
+            for index, photo in zip(stored, created):
+                results[index].update(
+                    success=True, id=photo.id, image=photo.image.url, feature=photo.feature_id,
+                    latitude=photo.latitude, longitude=photo.longitude
+                )
+        
+        count = sum(1 for result in results if result['success'])
+        if count < len(results):
+            response_status = status.HTTP_400_BAD_REQUEST if count == 0 else status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'success': count == len(results),
+            'imported': count,
+            'results': results
+        }, status=response_status)
+    
+    @action(detail=False, methods=['post'])
+    def upload_url(self, request):
+        """
+        Issue a presigned POST for uploading a photo straight to storage.
+        POST /api/photos/upload_url/
+        
+        Body: feature, filename. Send the file to the returned 'url' with the
+        returned 'fields', then call finalize with the returned 'key'.
+        """
+        from .uploads import (
+            UPLOAD_URL_EXPIRY, direct_upload_storage, photo_content_type,
+            presigned_photo_upload, upload_key
+        )
+        
+        storage = direct_upload_storage()
+        if storage is None:
+            return Response(
+                {'error': 'Direct uploads require S3 storage; upload the file to /photos/ instead'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        serializer = PhotoUploadURLSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        feature = serializer.validated_data['feature']
+        if feature.map.owner != request.user:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You can only add photos to features on your own maps.")
+        
+        filename = serializer.validated_data['filename']
+        key = upload_key(storage, feature, request.user, filename)
+        upload = presigned_photo_upload(storage, key, photo_content_type(filename))
+        return Response({
+            'key': key,
+            'url': upload['url'],
+            'fields': upload['fields'],
+            'expires_in': UPLOAD_URL_EXPIRY,
+        })
+    
+    @action(detail=False, methods=['post'])
+    def finalize(self, request):
+        """
+        Create the Photo for an object uploaded with upload_url.
+        POST /api/photos/finalize/
+        
+        Body: feature, key, caption (optional).
+        """
+        from .uploads import direct_upload_storage
+        
+        if direct_upload_storage() is None:
+            return Response(
+                {'error': 'Direct uploads require S3 storage; upload the file to /photos/ instead'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        
+        serializer = PhotoFinalizeSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data['feature'].map.owner != request.user:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You can only add photos to features on your own maps.")
+        
+        photo = serializer.save()
+        return Response(
+            PhotoSerializer(photo, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
 
 
 
@@ -328,7 +937,10 @@ class PhotoViewSet(viewsets.ModelViewSet):
 
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
-from .gis_import import GeoJSONImporter, KMLImporter, CoordinateImporter
+from .gis_import import (
+    GeoJSONImporter, KMLImporter, CoordinateImporter, FlatGeobufImporter, DEFAULT_BATCH_SIZE
+)
+from .import_jobs import guess_file_format
 
 
 class MapImportMixin:
@@ -351,28 +963,19 @@ class MapImportMixin:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You can only import data to your own maps.")
         
-        # Get GeoJSON data
+        importer = GeoJSONImporter(map_obj, batch_size=DEFAULT_BATCH_SIZE)
+        
+        # Import, streaming uploaded files feature by feature
         if 'file' in request.FILES:
-            geojson_file = request.FILES['file']
-            try:
-                geojson_string = geojson_file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                return Response(
-                    {'error': 'File must be UTF-8 encoded'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            count, errors, warnings = importer.import_from_file(request.FILES['file'])
         elif 'data' in request.data:
-            geojson_string = request.data['data']
+            count, errors, warnings = importer.import_from_string(request.data['data'])
         else:
             return Response(
                 {'error': 'Either "file" or "data" parameter is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Import
-        importer = GeoJSONImporter(map_obj)
-        count, errors, warnings = importer.import_from_string(geojson_string)
-        
         if errors:
             return Response({
                 'success': False,
@@ -385,7 +988,7 @@ class MapImportMixin:
             'success': True,
             'imported': count,
             'warnings': warnings,
-            'features': [{'id': f.id, 'title': f.title} for f in importer.imported_features]
+            'features': [{'id': pk, 'title': title} for pk, title in importer.imported_features]
         }, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
@@ -414,7 +1017,7 @@ class MapImportMixin:
         kml_file = request.FILES['file']
         
         # Import
-        importer = KMLImporter(map_obj)
+        importer = KMLImporter(map_obj, batch_size=DEFAULT_BATCH_SIZE)
         count, errors, warnings = importer.import_from_file(kml_file)
         
         if errors:
@@ -429,7 +1032,49 @@ class MapImportMixin:
             'success': True,
             'imported': count,
             'warnings': warnings,
-            'features': [{'id': f.id, 'title': f.title} for f in importer.imported_features]
+            'features': [{'id': pk, 'title': title} for pk, title in importer.imported_features]
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def import_flatgeobuf(self, request, pk=None):
+        """
+        Import FlatGeobuf data to a map.
+        POST /api/maps/{id}/import_flatgeobuf/
+        
+        Accepts:
+        - file: FlatGeobuf (.fgb) file upload
+        """
+        map_obj = self.get_object()
+        
+        # Check if user owns the map
+        if map_obj.owner != request.user:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You can only import data to your own maps.")
+        
+        # Get file
+        if 'file' not in request.FILES:
+            return Response(
+                {'error': '"file" parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Import
+        importer = FlatGeobufImporter(map_obj, batch_size=DEFAULT_BATCH_SIZE)
+        count, errors, warnings = importer.import_from_file(request.FILES['file'])
+        
+        if errors:
+            return Response({
+                'success': False,
+                'imported': count,
+                'errors': errors,
+                'warnings': warnings
+            }, status=status.HTTP_400_BAD_REQUEST if count == 0 else status.HTTP_207_MULTI_STATUS)
+        
+        return Response({
+            'success': True,
+            'imported': count,
+            'warnings': warnings,
+            'features': [{'id': pk, 'title': title} for pk, title in importer.imported_features]
         }, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
@@ -465,18 +1110,9 @@ class MapImportMixin:
         lng_col = request.data.get('lng_col', 'lng')
         name_col = request.data.get('name_col', 'name')
         
-        # Read CSV
-        try:
-            csv_content = csv_file.read().decode('utf-8')
-        except UnicodeDecodeError:
-            return Response(
-                {'error': 'File must be UTF-8 encoded'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Import
-        importer = CoordinateImporter(map_obj)
-        count, errors, warnings = importer.import_from_csv(csv_content, lat_col, lng_col, name_col)
+        # Import, reading the file row by row
+        importer = CoordinateImporter(map_obj, batch_size=DEFAULT_BATCH_SIZE)
+        count, errors, warnings = importer.import_from_file(csv_file, lat_col, lng_col, name_col)
         
         if errors:
             return Response({
@@ -490,8 +1126,85 @@ class MapImportMixin:
             'success': True,
             'imported': count,
             'warnings': warnings,
-            'features': [{'id': f.id, 'title': f.title} for f in importer.imported_features]
+            'features': [{'id': pk, 'title': title} for pk, title in importer.imported_features]
         }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def queue_import(self, request, pk=None):
+        """
+        Queue a file import to run in the background.
+        POST /api/maps/{id}/queue_import/
+        
+        Accepts:
+        - file: GeoJSON, KML/KMZ or CSV file upload
+        - file_format: 'geojson', 'kml', 'csv' or 'flatgeobuf' (default: from file extension)
+        - lat_col, lng_col, name_col: CSV column names
+        
+        Returns the job immediately; poll /api/import-jobs/{job_id}/ for progress.
+        """
+        map_obj = self.get_object()
+        
+        # Check if user owns the map
+        if map_obj.owner != request.user:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied("You can only import data to your own maps.")
+        
+        # Get file
+        if 'file' not in request.FILES:
+            return Response(
+                {'error': '"file" parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        upload = request.FILES['file']
+        file_format = request.data.get('file_format') or guess_file_format(upload.name)
+        if file_format not in dict(ImportJob.FORMAT_CHOICES):
+            return Response(
+                {'error': '"file_format" must be one of: geojson, kml, csv, flatgeobuf'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        options = {}
+        if file_format == 'csv':
+            options = {
+                'lat_col': request.data.get('lat_col', 'lat'),
+                'lng_col': request.data.get('lng_col', 'lng'),
+                'name_col': request.data.get('name_col', 'name'),
+            }
+        
+        job = ImportJob.objects.create(
+            map=map_obj,
+            created_by=request.user,
+            file_format=file_format,
+            file=upload,
+            options=options,
+        )
+        
+        return Response({
+            'job_id': job.id,
+            **ImportJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for ImportJob model.
+    Lets users poll the status and progress of their queued imports.
+    """
+    
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Return the current user's import jobs, optionally for one map."""
+        queryset = ImportJob.objects.filter(created_by=self.request.user)
+        
+        # Filter by map_id if provided in query params
+        map_id = self.request.query_params.get('map_id', None)
+        if map_id is not None:
+            queryset = queryset.filter(map_id=map_id)
+        
+        return queryset
 
 
 # Update MapViewSet to include import functionality